@@ -0,0 +1,201 @@
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+from flask import Flask, Response, abort, g, jsonify, request, stream_with_context
+from werkzeug.serving import BaseWSGIServer
+
+import servicos
+from servicos import (LoginBloqueado, TAMANHO_PAGINA, buscar_alertas, centavos_para_decimal, criar_tabelas, gerar_csv,
+                      iterar_dados_relatorio, listar_clientes_pagina, listar_pagamentos_pagina, listar_projetos_pagina,
+                      normalizar_data, verificar_login, versao_dados)
+
+# Maior quantidade de itens aceita no parâmetro "limite"
+LIMITE_MAXIMO_API = 1000
+
+# Segundos em que um login bem-sucedido dispensa nova verificação do bcrypt
+VALIDADE_CREDENCIAIS = 300
+
+# Logins guardados ao mesmo tempo; acima disso os usados há mais tempo são descartados
+MAX_CREDENCIAIS = 1000
+
+# Threads fixas do servidor; cada uma mantém a sua conexão SQLite entre requisições
+THREADS_API = 8
+
+TIPOS_RELATORIO = {'pagamentos': 'Pagamentos', 'projetos': 'Projetos', 'ambos': 'Ambos'}
+
+class CacheCredenciais:
+    # _usuarios guarda (usuario_id, expira_em) na ordem do último uso
+    def __init__(self, validade=VALIDADE_CREDENCIAIS, max_usuarios=MAX_CREDENCIAIS):
+        self.validade = validade
+        self.max_usuarios = max_usuarios
+        self._usuarios = {}
+        self._trava = threading.Lock()
+
+    def _chave(self, username, password):
+        return hashlib.sha256(f"{username}\0{password}".encode('utf-8')).digest()
+
+    def _limpar(self, agora):
+        for chave in [chave for chave, usuario in self._usuarios.items() if usuario[1] <= agora]:
+            del self._usuarios[chave]
+        while len(self._usuarios) >= self.max_usuarios:
+            del self._usuarios[next(iter(self._usuarios))]
+
+    def buscar(self, username, password):
+        chave = self._chave(username, password)
+        with self._trava:
+            usuario = self._usuarios.pop(chave, None)
+            if usuario is None or usuario[1] <= time.monotonic():
+                return None
+            self._usuarios[chave] = usuario
+        return usuario[0]
+
+    def guardar(self, username, password, usuario_id):
+        chave = self._chave(username, password)
+        agora = time.monotonic()
+        with self._trava:
+            self._usuarios.pop(chave, None)
+            if len(self._usuarios) >= self.max_usuarios:
+                self._limpar(agora)
+            self._usuarios[chave] = (usuario_id, agora + self.validade)
+
+class ServidorAPI(BaseWSGIServer):
+    # O servidor de desenvolvimento abre uma thread por requisição; aqui as
+    # requisições vão para um pool fixo, e a conexão de cada thread é
+    # reaproveitada (e fechada quando a thread termina).
+    def __init__(self, host, porta, app, threads=THREADS_API):
+        super().__init__(host, porta, app)
+        self._pool = ThreadPoolExecutor(threads, thread_name_prefix='api')
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._atender, request, client_address)
+
+    def _atender(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown()
+
+def _limite():
+    try:
+        limite = int(request.args.get('limite', TAMANHO_PAGINA))
+    except ValueError:
+        abort(400, description="limite inválido")
+    return max(1, min(limite, LIMITE_MAXIMO_API))
+
+def _depois():
+    try:
+        return int(request.args.get('depois', 0))
+    except ValueError:
+        abort(400, description="depois inválido")
+
+def _pagina(linhas, converter, limite):
+    return jsonify({
+        'itens': [converter(linha) for linha in linhas],
+        'proximo': linhas[-1][0] if len(linhas) == limite else None,
+    })
+
+def _cliente(linha):
+    return {'id': linha[0], 'nome': linha[1], 'email': linha[2], 'telefone': linha[3]}
+
+def _pagamento(linha):
+    return {'id': linha[0], 'tipo_pagamento': linha[1], 'valor': str(centavos_para_decimal(linha[2])),
+            'data_pagamento': linha[3], 'status': linha[4]}
+
+def _projeto(linha):
+    return {'id': linha[0], 'cliente_id': linha[1], 'nome_projeto': linha[2], 'tipo_projeto': linha[3],
+            'valor': str(centavos_para_decimal(linha[4])), 'data_entrega': linha[5], 'recorrente': bool(linha[6])}
+
+def criar_app(caminho_banco=None):
+    if caminho_banco:
+        servicos.bd.caminho = caminho_banco
+    criar_tabelas()
+
+    app = Flask(__name__)
+    credenciais = CacheCredenciais()
+
+    @app.before_request
+    def autenticar():
+        auth = request.authorization
+        if not auth or not auth.username or auth.password is None:
+            return Response("Autenticação necessária.", 401, {'WWW-Authenticate': 'Basic realm="clientes"'})
+        usuario_id = credenciais.buscar(auth.username, auth.password)
+        if usuario_id is None:
+            try:
+                usuario_id = verificar_login(auth.username, auth.password)
+            except LoginBloqueado as erro:
+                return Response(str(erro), 429)
+            if usuario_id is None:
+                return Response("Usuário ou senha incorretos.", 401, {'WWW-Authenticate': 'Basic realm="clientes"'})
+            credenciais.guardar(auth.username, auth.password, usuario_id)
+        g.usuario_id = usuario_id
+
+        # Toda resposta depende só dos dados do usuário (e da data, nos alertas),
+        # então a versão dos dados decide o 304 antes de qualquer consulta.
+        if request.method == 'GET':
+            g.etag = f"{usuario_id}-{versao_dados(usuario_id)}-{date.today().isoformat()}"
+            if request.if_none_match.contains(g.etag):
+                return Response(status=304, headers={'ETag': f'"{g.etag}"'})
+
+    @app.after_request
+    def adicionar_etag(resposta):
+        if 'etag' in g and resposta.status_code == 200:
+            resposta.set_etag(g.etag)
+        return resposta
+
+    @app.get('/api/clientes')
+    def clientes():
+        limite = _limite()
+        return _pagina(listar_clientes_pagina(g.usuario_id, _depois(), limite=limite), _cliente, limite)
+
+    @app.get('/api/clientes/<int:cliente_id>/pagamentos')
+    def pagamentos(cliente_id):
+        limite = _limite()
+        return _pagina(listar_pagamentos_pagina(cliente_id, g.usuario_id, _depois(), limite=limite), _pagamento, limite)
+
+    @app.get('/api/projetos')
+    def projetos():
+        limite = _limite()
+        return _pagina(listar_projetos_pagina(g.usuario_id, _depois(), limite=limite), _projeto, limite)
+
+    @app.get('/api/alertas')
+    def alertas():
+        pagamentos, projetos = buscar_alertas(g.usuario_id)
+        return jsonify({
+            'pagamentos': [{'cliente': nome, 'tipo_pagamento': tipo, 'valor': str(centavos_para_decimal(valor)), 'data_pagamento': data}
+                           for nome, tipo, valor, data in pagamentos],
+            'projetos': [{'cliente': nome, 'nome_projeto': projeto, 'data_entrega': data} for nome, projeto, data in projetos],
+        })
+
+    @app.get('/api/clientes/<int:cliente_id>/relatorio.csv')
+    def relatorio_csv(cliente_id):
+        tipo = TIPOS_RELATORIO.get(request.args.get('tipo', 'ambos'))
+        try:
+            inicio = normalizar_data(request.args['inicio'])
+            fim = normalizar_data(request.args['fim'])
+        except (KeyError, ValueError):
+            abort(400, description="informe inicio e fim como datas válidas")
+        if tipo is None:
+            abort(400, description="tipo deve ser pagamentos, projetos ou ambos")
+        dados = iterar_dados_relatorio(g.usuario_id, cliente_id, tipo, inicio, fim)
+        return Response(stream_with_context(gerar_csv(dados)), mimetype='text/csv',
+                        headers={'Content-Disposition': f'attachment; filename="relatorio_{cliente_id}.csv"'})
+
+    return app
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    servidor = ServidorAPI('127.0.0.1', 5000, criar_app())
+    try:
+        servidor.serve_forever()
+    finally:
+        servidor.server_close()
@@ -1,301 +1,561 @@
+import logging
 import os
-import sqlite3
+import re
+import queue
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
 from tkinter import *
 from tkinter import messagebox, filedialog, ttk
 from tkcalendar import Calendar, DateEntry
-from decimal import Decimal, InvalidOperation
+from decimal import InvalidOperation
 import locale
-import csv
-import xml.etree.ElementTree as ET
-from fpdf import FPDF
-from datetime import datetime, timedelta
-import bcrypt
+
+import servicos
+from servicos import (CLIENTES_PAINEL, FilaExportacao, MESES_PAINEL, MotorAlertas, RASTREAR, TAMANHO_PAGINA, bd,
+                      buscar_clientes, buscar_painel, buscar_projeto, cadastrar_cliente, cadastrar_pagamento,
+                      cadastrar_projeto, carregar_projetos, criar_tabelas, diretorio_clientes, editar_cliente,
+                      editar_pagamento, editar_projeto, excluir_cliente, excluir_pagamento, excluir_projeto,
+                      formatar_centavos, formatar_data, importar_csv, iniciar_tarefas_dados, listar_pagamentos_pagina,
+                      podar_alteracoes, reconstruir_resumos, registrar_usuario, texto_para_decimal, totais_cliente,
+                      verificar_login, versao_banco)
 
 locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
+servicos.avisar_erro = messagebox.showerror
 
-# Caminho do banco de dados local SQLite
-DB_PATH = 'clientes.db'
-
-def conectar_bd():
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        print("Conexão ao banco de dados SQLite realizada com sucesso!")
-        return conn
-    except Exception as error:
-        print(f"Erro ao conectar ao banco de dados: {error}")
-        messagebox.showerror("Erro", f"Erro ao conectar ao banco de dados: {error}")
-        return None
-
-def criar_tabelas():
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS usuarios (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    username TEXT UNIQUE NOT NULL,
-                    password TEXT NOT NULL
-                );
-            ''')
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS clientes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    nome TEXT NOT NULL,
-                    email TEXT,
-                    telefone TEXT,
-                    usuario_id INTEGER NOT NULL,
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
-                );
-            ''')
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS pagamentos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    cliente_id INTEGER NOT NULL,
-                    tipo_pagamento TEXT NOT NULL,
-                    valor DECIMAL(10, 2) NOT NULL,
-                    data_pagamento DATE NOT NULL,
-                    status TEXT NOT NULL,
-                    usuario_id INTEGER NOT NULL,
-                    FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
-                );
-            ''')
-
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS projetos (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    cliente_id INTEGER NOT NULL,
-                    nome_projeto TEXT NOT NULL,
-                    tipo_projeto TEXT NOT NULL,
-                    valor DECIMAL(10, 2) NOT NULL,
-                    data_entrega DATE NOT NULL,
-                    recorrente BOOLEAN NOT NULL DEFAULT FALSE,
-                    usuario_id INTEGER NOT NULL,
-                    FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
-                    FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
-                );
-            ''')
-
-            conn.commit()
-            print("Tabelas 'usuarios', 'clientes', 'pagamentos' e 'projetos' criadas ou já existentes.")
-        except Exception as error:
-            print(f"Erro ao criar tabelas: {error}")
-        finally:
-            conn.close()
-    else:
-        print("Erro ao conectar ao banco de dados para criar tabelas.")
-
-def verificar_login(username, password):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id, password FROM usuarios WHERE username=?", (username,))
-        user = cursor.fetchone()
-        conn.close()
-
-        if user:
-            stored_hash = user[1].encode('utf-8')
-            if bcrypt.checkpw(password.encode('utf-8'), stored_hash):
-                return user[0]
-        return None
-
-def registrar_usuario(username, password):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("SELECT id FROM usuarios WHERE username = ?", (username,))
-        if cursor.fetchone():
-            messagebox.showerror("Erro", "Nome de usuário já existe.")
-            conn.close()
+class ExecutorBD:
+    def __init__(self, root, trabalhadores=2, intervalo=50, ao_mudar_estado=None):
+        self.root = root
+        self.intervalo = intervalo
+        self.ao_mudar_estado = ao_mudar_estado
+        self.tarefas = queue.Queue()
+        self.resultados = queue.Queue()
+        self.pendentes = 0
+        self.threads = []
+        for numero in range(trabalhadores):
+            thread = threading.Thread(target=self._trabalhar, name=f"executor-bd-{numero + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+        self.root.after(self.intervalo, self._verificar)
+
+    def submeter(self, funcao, *args, ao_concluir=None, ao_falhar=None, **kwargs):
+        self.pendentes += 1
+        if self.pendentes == 1 and self.ao_mudar_estado:
+            self.ao_mudar_estado(True)
+        self.tarefas.put((funcao, args, kwargs, ao_concluir, ao_falhar))
+
+    def notificar(self, funcao, valor):
+        self.resultados.put((funcao, valor, False, False))
+
+    def encerrar(self):
+        for _ in self.threads:
+            self.tarefas.put(None)
+
+    def _trabalhar(self):
+        while True:
+            tarefa = self.tarefas.get()
+            if tarefa is None:
+                bd.fechar()
+                return
+            funcao, args, kwargs, ao_concluir, ao_falhar = tarefa
+            try:
+                resultado = funcao(*args, **kwargs)
+            except Exception as erro:
+                self.resultados.put((ao_falhar, erro, True, True))
+            else:
+                self.resultados.put((ao_concluir, resultado, False, True))
+
+    def _verificar(self):
+        while True:
+            try:
+                retorno, valor, falhou, concluida = self.resultados.get_nowait()
+            except queue.Empty:
+                break
+            if concluida:
+                self.pendentes -= 1
+            try:
+                if retorno:
+                    retorno(valor)
+                elif falhou:
+                    print(f"Erro em tarefa de segundo plano: {valor}")
+                    messagebox.showerror("Erro", f"Ocorreu um erro: {valor}")
+            except Exception as erro:
+                print(f"Erro ao processar resultado de tarefa: {erro}")
+            if concluida and self.pendentes == 0 and self.ao_mudar_estado:
+                self.ao_mudar_estado(False)
+        self.root.after(self.intervalo, self._verificar)
+
+class TreeviewPaginada:
+    def __init__(self, tree, buscar_pagina, formatar=None, tamanho_pagina=TAMANHO_PAGINA, max_paginas=3, executor=None):
+        self.tree = tree
+        self.buscar_pagina = buscar_pagina
+        self.executor = executor
+        self._geracao = 0
+        self.formatar = formatar or (lambda linha: linha)
+        self.tamanho_pagina = tamanho_pagina
+        self.max_paginas = max_paginas
+        self.paginas = deque()
+        self.inicio_alcancado = True
+        self.fim_alcancado = False
+        self._agendado = None
+
+        self.scrollbar = ttk.Scrollbar(tree.master, orient=VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=self._ao_rolar)
+
+    def limpar(self):
+        if self._agendado and self._agendado != 'buscando':
+            self.tree.after_cancel(self._agendado)
+        self._agendado = None
+        self._geracao += 1
+        self.tree.delete(*self.tree.get_children())
+        self.paginas.clear()
+        self.inicio_alcancado = True
+        self.fim_alcancado = False
+
+    def recarregar(self):
+        self.limpar()
+        self._carregar('proxima')
+
+    def atualizar_linha(self, linha):
+        iid = str(linha[0])
+        if self.tree.exists(iid):
+            self.tree.item(iid, values=self.formatar(linha))
+
+    def remover_linha(self, registro_id):
+        iid = str(registro_id)
+        if self.tree.exists(iid):
+            self.tree.delete(iid)
+            for pagina in self.paginas:
+                if iid in pagina:
+                    pagina.remove(iid)
+                    break
+
+    def _ao_rolar(self, primeiro, ultimo):
+        self.scrollbar.set(primeiro, ultimo)
+        if self._agendado:
+            return
+        if float(ultimo) >= 0.95 and not self.fim_alcancado:
+            self._agendado = self.tree.after_idle(self._carregar, 'proxima')
+        elif float(primeiro) <= 0.05 and not self.inicio_alcancado:
+            self._agendado = self.tree.after_idle(self._carregar, 'anterior')
+
+    def _item_no_topo(self):
+        itens = self.tree.get_children()
+        if not itens:
+            return None
+        return itens[min(int(self.tree.yview()[0] * len(itens)), len(itens) - 1)]
+
+    def _restaurar_topo(self, iid):
+        itens = self.tree.get_children()
+        if iid and itens and self.tree.exists(iid):
+            self.tree.yview_moveto(self.tree.index(iid) / len(itens))
+
+    def _carregar(self, direcao):
+        if direcao == 'proxima':
+            ancora = int(self.paginas[-1][-1]) if self.paginas and self.paginas[-1] else None
+        else:
+            ancora = int(self.paginas[0][0]) if self.paginas and self.paginas[0] else None
+            if ancora is None:
+                self._agendado = None
+                self.inicio_alcancado = True
+                return
+
+        if self.executor is None:
+            self._aplicar_pagina(self._geracao, direcao, self.buscar_pagina(ancora, direcao, self.tamanho_pagina))
+            return
+        # Mantém _agendado preenchido enquanto a busca estiver em andamento
+        self._agendado = 'buscando'
+        geracao = self._geracao
+        self.executor.submeter(self.buscar_pagina, ancora, direcao, self.tamanho_pagina,
+                               ao_concluir=lambda linhas: self._aplicar_pagina(geracao, direcao, linhas),
+                               ao_falhar=lambda erro: self._falha_pagina(geracao, erro))
+
+    def _falha_pagina(self, geracao, erro):
+        # Libera a paginação para uma nova tentativa na próxima rolagem
+        if geracao == self._geracao:
+            self._agendado = None
+        messagebox.showerror("Erro", f"Erro ao carregar a lista: {erro}")
+
+    def _aplicar_pagina(self, geracao, direcao, linhas):
+        if geracao != self._geracao or not self.tree.winfo_exists():
+            return
+        self._agendado = None
+        completa = len(linhas) == self.tamanho_pagina
+        if not linhas:
+            if direcao == 'proxima':
+                self.fim_alcancado = True
+            else:
+                self.inicio_alcancado = True
             return
 
-        hashed_password = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        cursor.execute("INSERT INTO usuarios (username, password) VALUES (?, ?)", (username, hashed_password))
-        conn.commit()
-        conn.close()
-        print("Usuário registrado com sucesso!")
-
-def cadastrar_cliente(nome, email, telefone, usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("INSERT INTO clientes (nome, email, telefone, usuario_id) VALUES (?, ?, ?, ?)", (nome, email, telefone, usuario_id))
-        conn.commit()
-        conn.close()
-
-def editar_cliente(cliente_id, nome, email, telefone, usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute('''UPDATE clientes SET nome=?, email=?, telefone=? WHERE id=? AND usuario_id=?''', 
-                       (nome, email, telefone, cliente_id, usuario_id))
-        conn.commit()
-        conn.close()
-
-def excluir_cliente(cliente_id, usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
+        topo = self._item_no_topo()
+        pagina = [str(linha[0]) for linha in linhas]
+        if direcao == 'proxima':
+            for linha in linhas:
+                self.tree.insert("", END, iid=str(linha[0]), values=self.formatar(linha))
+            self.paginas.append(pagina)
+            self.fim_alcancado = not completa
+            if len(self.paginas) > self.max_paginas:
+                self.tree.delete(*self.paginas.popleft())
+                self.inicio_alcancado = False
+        else:
+            for posicao, linha in enumerate(linhas):
+                self.tree.insert("", posicao, iid=str(linha[0]), values=self.formatar(linha))
+            self.paginas.appendleft(pagina)
+            self.inicio_alcancado = not completa
+            if len(self.paginas) > self.max_paginas:
+                self.tree.delete(*self.paginas.pop())
+                self.fim_alcancado = False
+        self._restaurar_topo(topo)
+
+class ListaProjetos:
+    # Edições feitas nesta janela atualizam só a linha do projeto (iid = id);
+    # a lista inteira é recarregada apenas quando PRAGMA data_version indica
+    # que outra conexão gravou no banco. As edições daqui rodam nas threads do
+    # ExecutorBD, cuja conexão também é "outra": a versão é relida quando a
+    # linha é aplicada, e uma gravação externa nesse intervalo só aparece na
+    # próxima recarga.
+    def __init__(self, tree, executor):
+        self.tree = tree
+        self.executor = executor
+        self.usuario_id = None
+        self.versao = None
+        self._ordem = []
+        self._geracao = 0
+
+    def exibir(self, usuario_id):
+        versao = versao_banco()
+        if usuario_id != self.usuario_id or versao != self.versao:
+            self.usuario_id = usuario_id
+            self.versao = versao
+            self.recarregar()
+
+    def invalidar(self):
+        self.versao = None
+
+    def recarregar(self):
+        self._geracao += 1
+        geracao = self._geracao
+        self.executor.submeter(carregar_projetos, self.usuario_id,
+                               ao_concluir=lambda projetos: self._preencher(geracao, projetos))
+
+    def atualizar_linha(self, projeto_id):
+        geracao = self._geracao
+        self.executor.submeter(buscar_projeto, projeto_id, self.usuario_id,
+                               ao_concluir=lambda projeto: self._aplicar_linha(geracao, projeto_id, projeto))
+
+    def remover_linha(self, projeto_id):
+        self._absorver_versao()
+        self._remover(projeto_id)
+
+    def _absorver_versao(self):
+        if self.versao is not None:
+            self.versao = versao_banco()
+
+    def _remover(self, projeto_id):
+        iid = str(projeto_id)
+        if self.tree.exists(iid):
+            del self._ordem[self.tree.index(iid)]
+            self.tree.delete(iid)
+
+    def _chave(self, projeto):
+        return (projeto[2], projeto[4])
+
+    def _formatar(self, projeto):
+        return (projeto[0], projeto[1], formatar_data(projeto[2]), "Mensal" if projeto[3] else "Único", projeto[4])
+
+    def _preencher(self, geracao, projetos):
+        if geracao != self._geracao or not self.tree.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        self._ordem = []
+        for projeto in projetos or ():
+            self.tree.insert("", END, iid=str(projeto[4]), values=self._formatar(projeto))
+            self._ordem.append(self._chave(projeto))
 
-        try:
-            cursor.execute("DELETE FROM pagamentos WHERE cliente_id=? AND usuario_id=?", (cliente_id, usuario_id))
-            cursor.execute("DELETE FROM projetos WHERE cliente_id=? AND usuario_id=?", (cliente_id, usuario_id))
-            cursor.execute("DELETE FROM clientes WHERE id=? AND usuario_id=?", (cliente_id, usuario_id))
-            conn.commit()
-            messagebox.showinfo("Sucesso", "Cliente excluído com sucesso!")
-        except Exception as e:
-            conn.rollback()
-            messagebox.showerror("Erro", f"Erro ao excluir cliente: {e}")
-        finally:
-            conn.close()
-
-def cadastrar_pagamento(cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute('''INSERT INTO pagamentos (cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id) 
-                          VALUES (?, ?, ?, ?, ?, ?)''', (cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id))
-        conn.commit()
-        conn.close()
-
-def editar_pagamento(pagamento_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute('''UPDATE pagamentos SET tipo_pagamento=?, valor=?, data_pagamento=?, status=? 
-                          WHERE id=? AND usuario_id=?''', (tipo_pagamento, valor, data_pagamento, status, pagamento_id, usuario_id))
-        conn.commit()
-        conn.close()
-
-def excluir_pagamento(pagamento_id, usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM pagamentos WHERE id=? AND usuario_id=?", (pagamento_id, usuario_id))
-        conn.commit()
-        conn.close()
-
-def cadastrar_projeto(cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute('''INSERT INTO projetos (cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id) 
-                          VALUES (?, ?, ?, ?, ?, ?, ?)''', (cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id))
-        conn.commit()
-        conn.close()
-
-def editar_projeto(projeto_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute('''UPDATE projetos SET nome_projeto=?, tipo_projeto=?, valor=?, data_entrega=?, recorrente=? 
-                          WHERE id=? AND usuario_id=?''', (nome_projeto, tipo_projeto, valor, data_entrega, recorrente, projeto_id, usuario_id))
-        conn.commit()
-        conn.close()
-
-def excluir_projeto(projeto_id, usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute("DELETE FROM projetos WHERE id=? AND usuario_id=?", (projeto_id, usuario_id))
-        conn.commit()
-        conn.close()
-
-def verificar_alertas(usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT clientes.nome, pagamentos.tipo_pagamento, pagamentos.valor, pagamentos.data_pagamento
-            FROM pagamentos
-            JOIN clientes ON pagamentos.cliente_id = clientes.id
-            WHERE pagamentos.status = 'Em Aberto'
-            AND pagamentos.data_pagamento <= DATE('now', '+7 days')
-            AND pagamentos.usuario_id = ?
-        ''', (usuario_id,))
-        pagamentos_pendentes = cursor.fetchall()
-
-        if pagamentos_pendentes:
-            alerta_pagamentos = "Pagamentos próximos do vencimento:\n"
-            for pagamento in pagamentos_pendentes:
-                alerta_pagamentos += f"Cliente: {pagamento[0]}, Tipo: {pagamento[1]}, Valor: {pagamento[2]}, Data: {pagamento[3]}\n"
-            messagebox.showwarning("Alertas de Pagamentos", alerta_pagamentos)
-
-        cursor.execute('''
-            SELECT clientes.nome, projetos.nome_projeto, projetos.data_entrega
-            FROM projetos
-            JOIN clientes ON projetos.cliente_id = clientes.id
-            WHERE projetos.data_entrega <= DATE('now', '+7 days')
-            AND projetos.usuario_id = ?
-        ''', (usuario_id,))
-        projetos_proximos = cursor.fetchall()
-
-        if projetos_proximos:
-            alerta_projetos = "Projetos com entrega próxima:\n"
-            for projeto in projetos_proximos:
-                alerta_projetos += f"Cliente: {projeto[0]}, Projeto: {projeto[1]}, Data de Entrega: {projeto[2]}\n"
-            messagebox.showwarning("Alertas de Projetos", alerta_projetos)
-
-        conn.close()
-
-def carregar_projetos(usuario_id):
-    conn = conectar_bd()
-    if conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT clientes.nome, projetos.nome_projeto, projetos.data_entrega, projetos.recorrente, projetos.id
-            FROM projetos
-            JOIN clientes ON projetos.cliente_id = clientes.id
-            WHERE projetos.usuario_id = ?
-            ORDER BY projetos.data_entrega
-        ''', (usuario_id,))
-        projetos = cursor.fetchall()
-        conn.close()
-        return projetos
-
-def exportar_csv(dados, filepath):
-    with open(filepath, mode='w', newline='', encoding='utf-8') as file:
-        writer = csv.writer(file)
-        writer.writerow(["Cliente ID", "Nome", "Email", "Telefone", "Pagamento ID", "Tipo de Pagamento", "Valor", "Data", "Status"])
-        writer.writerows(dados)
-
-def exportar_xml(dados, filepath):
-    root = ET.Element("Clientes")
-    for row in dados:
-        cliente = ET.SubElement(root, "Cliente")
-        ET.SubElement(cliente, "ClienteID").text = str(row[0])
-        ET.SubElement(cliente, "Nome").text = row[1]
-        ET.SubElement(cliente, "Email").text = row[2]
-        ET.SubElement(cliente, "Telefone").text = row[3]
-        pagamento = ET.SubElement(cliente, "Pagamento")
-        ET.SubElement(pagamento, "PagamentoID").text = str(row[4])
-        ET.SubElement(pagamento, "TipoPagamento").text = row[5]
-        ET.SubElement(pagamento, "Valor").text = str(row[6])
-        ET.SubElement(pagamento, "Data").text = row[7]
-        ET.SubElement(pagamento, "Status").text = row[8]
-    
-    tree = ET.ElementTree(root)
-    tree.write(filepath, encoding='utf-8', xml_declaration=True)
-
-def exportar_pdf(dados, filepath):
-    pdf = FPDF()
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.add_page()
-    pdf.set_font("Arial", size=12)
-
-    pdf.cell(200, 10, txt="Relatório de Clientes e Pagamentos", ln=True, align='C')
-    pdf.ln(10)
-
-    for row in dados:
-        pdf.cell(0, 10, txt=f"Cliente ID: {row[0]}, Nome: {row[1]}, Email: {row[2]}, Telefone: {row[3]}", ln=True)
-        pdf.cell(0, 10, txt=f"Pagamento ID: {row[4]}, Tipo: {row[5]}, Valor: R$ {row[6]}, Data: {row[7]}, Status: {row[8]}", ln=True)
-        pdf.ln(5)
-
-    pdf.output(filepath)
+    def _aplicar_linha(self, geracao, projeto_id, projeto):
+        if geracao != self._geracao or not self.tree.winfo_exists():
+            return
+        self._absorver_versao()
+        iid = str(projeto_id)
+        selecionado = iid in self.tree.selection()
+        self._remover(projeto_id)
+        if projeto is None:
+            return
+        # A data de entrega pode ter mudado: a linha volta na posição ordenada
+        chave = self._chave(projeto)
+        posicao = bisect_left(self._ordem, chave)
+        self._ordem.insert(posicao, chave)
+        self.tree.insert("", posicao, iid=iid, values=self._formatar(projeto))
+        if selecionado:
+            self.tree.selection_add(iid)
+
+class BuscaClientes:
+    def __init__(self, combobox, buscar, executor, atraso=150):
+        self.combobox = combobox
+        self.buscar = buscar
+        self.executor = executor
+        self.atraso = atraso
+        self._agendado = None
+        self._consulta = 0
+        combobox.bind('<KeyRelease>', self._ao_digitar)
+
+    def _ao_digitar(self, event):
+        if event.keysym in ('Up', 'Down', 'Return', 'Escape', 'Tab', 'Shift_L', 'Shift_R'):
+            return
+        if self._agendado:
+            self.combobox.after_cancel(self._agendado)
+        self._agendado = self.combobox.after(self.atraso, self.atualizar)
+
+    def atualizar(self):
+        self._agendado = None
+        texto = self.combobox.get()
+        # Um valor já escolhido na lista ("id - nome") não dispara nova busca
+        if re.match(r'^\d+ - ', texto):
+            return
+        self._consulta += 1
+        consulta = self._consulta
+        self.executor.submeter(self.buscar, texto, ao_concluir=lambda clientes: self._exibir(consulta, clientes))
+
+    def _exibir(self, consulta, clientes):
+        if consulta != self._consulta or not self.combobox.winfo_exists():
+            return
+        self.combobox['values'] = [f"{cliente[0]} - {cliente[1]}" for cliente in clientes]
+
+# Intervalo entre as atualizações dos alertas, em milissegundos
+INTERVALO_ALERTAS = 60000
+
+# Quantidade de alertas exibidos por página no painel
+ALERTAS_POR_PAGINA = 20
+
+class PainelAlertas:
+    def __init__(self, root, executor, apos=None, intervalo=INTERVALO_ALERTAS, por_pagina=ALERTAS_POR_PAGINA):
+        self.root = root
+        self.apos = apos
+        self.executor = executor
+        self.intervalo = intervalo
+        self.por_pagina = por_pagina
+        self.motor = None
+        self.alertas = []
+        self.pagina = 0
+        self._agendado = None
+        self._atualizando = False
+
+        self.frame = Frame(root, relief=GROOVE, borderwidth=1)
+        cabecalho = Frame(self.frame)
+        cabecalho.pack(side=TOP, fill=X)
+        self.titulo_label = Label(cabecalho, text="", font=("Arial", 11, "bold"))
+        self.titulo_label.pack(side=LEFT, padx=10)
+        Button(cabecalho, text="Ocultar", command=self.ocultar).pack(side=RIGHT, padx=5, pady=2)
+        Button(cabecalho, text="Dispensar todos", command=self.dispensar_pagina).pack(side=RIGHT, padx=5, pady=2)
+        Button(cabecalho, text="Dispensar", command=self.dispensar_selecionados).pack(side=RIGHT, padx=5, pady=2)
+        Button(cabecalho, text="Próxima", command=lambda: self.mudar_pagina(1)).pack(side=RIGHT, padx=5, pady=2)
+        Button(cabecalho, text="Anterior", command=lambda: self.mudar_pagina(-1)).pack(side=RIGHT, padx=5, pady=2)
+
+        self.tree = ttk.Treeview(self.frame, columns=("Data", "Tipo", "Cliente", "Descrição", "Valor"), show="headings", height=6)
+        for coluna in ("Data", "Tipo", "Cliente", "Descrição", "Valor"):
+            self.tree.heading(coluna, text=coluna)
+        self.tree.pack(fill=X)
+
+    def iniciar(self, usuario_id):
+        self.parar()
+        self.motor = MotorAlertas(usuario_id)
+        self.alertas = []
+        self.pagina = 0
+        self.atualizar()
+
+    def parar(self):
+        if self._agendado:
+            self.root.after_cancel(self._agendado)
+            self._agendado = None
+        self.motor = None
+        self.ocultar()
+
+    def atualizar(self):
+        self._agendado = None
+        if self.motor is None:
+            return
+        if not self._atualizando:
+            self._atualizando = True
+            motor = self.motor
+            self.executor.submeter(motor.atualizar,
+                                   ao_concluir=lambda alertas: self._atualizado(motor, alertas),
+                                   ao_falhar=lambda erro: self._atualizado(motor, None))
+        self._agendado = self.root.after(self.intervalo, self.atualizar)
+
+    def _atualizado(self, motor, alertas):
+        self._atualizando = False
+        if motor is not self.motor or alertas is None:
+            return
+        novos = len(alertas) > len(self.alertas)
+        self.alertas = alertas
+        self.exibir(mostrar=novos)
+
+    def exibir(self, mostrar=False):
+        paginas = max(1, -(-len(self.alertas) // self.por_pagina))
+        self.pagina = min(self.pagina, paginas - 1)
+        self.titulo_label.config(text=f"Alertas: {len(self.alertas)} (página {self.pagina + 1} de {paginas})")
+        self.tree.delete(*self.tree.get_children())
+        inicio = self.pagina * self.por_pagina
+        for data, tabela, registro_id, cliente, descricao, valor in self.alertas[inicio:inicio + self.por_pagina]:
+            tipo = "Pagamento" if tabela == 'pagamentos' else "Entrega"
+            valor = formatar_centavos(valor) if valor is not None else ""
+            self.tree.insert("", END, iid=f"{tabela}:{registro_id}", values=(formatar_data(data), tipo, cliente, descricao, valor))
+        if not self.alertas:
+            self.ocultar()
+        elif mostrar and not self.frame.winfo_ismapped():
+            if self.apos is not None:
+                self.frame.pack(side=BOTTOM, fill=X, after=self.apos)
+            else:
+                self.frame.pack(side=BOTTOM, fill=X)
+
+    def mudar_pagina(self, passo):
+        self.pagina = max(0, self.pagina + passo)
+        self.exibir()
+
+    def dispensar_selecionados(self):
+        self._dispensar(self.tree.selection())
+
+    def dispensar_pagina(self):
+        self._dispensar(self.tree.get_children())
+
+    def _dispensar(self, itens):
+        if self.motor is None:
+            return
+        removidos = set()
+        for item in itens:
+            tabela, registro_id = item.split(":")
+            self.motor.dispensar(tabela, int(registro_id))
+            removidos.add((tabela, int(registro_id)))
+        self.alertas = [alerta for alerta in self.alertas if (alerta[1], alerta[2]) not in removidos]
+        self.exibir()
+
+    def ocultar(self):
+        self.frame.pack_forget()
+
+# Intervalo, em milissegundos, entre as leituras do progresso das exportações em andamento
+INTERVALO_EXPORTACOES = 200
+
+class PainelExportacoes:
+    # Janela com os trabalhos da FilaExportacao; o progresso é lido enquanto
+    # houver trabalhos pendentes, mesmo com a janela fechada.
+    def __init__(self, root, fila, ao_encerrar=None, intervalo=INTERVALO_EXPORTACOES):
+        self.root = root
+        self.fila = fila
+        self.ao_encerrar = ao_encerrar
+        self.intervalo = intervalo
+        self.janela = None
+        self.tree = None
+        self._agendado = None
+
+    def submeter(self, descricao, destinos, *args, **kwargs):
+        trabalho = self.fila.submeter(descricao, destinos, *args, **kwargs)
+        self.exibir()
+        self._exibir_trabalho(trabalho)
+        if self._agendado is None:
+            self._agendado = self.root.after(self.intervalo, self._verificar)
+        return trabalho
+
+    def exibir(self):
+        if self.janela is not None and self.janela.winfo_exists():
+            self.janela.lift()
+            return
+        self.janela = Toplevel(self.root)
+        self.janela.title("Exportações")
+
+        self.tree = ttk.Treeview(self.janela, columns=("Trabalho", "Formato", "Estado", "Linhas", "Destino"), show="tree headings", height=10)
+        self.tree.column("#0", width=0, stretch=False)
+        for coluna in ("Trabalho", "Formato", "Estado", "Linhas", "Destino"):
+            self.tree.heading(coluna, text=coluna)
+        self.tree.pack(fill=BOTH, expand=True)
+
+        botoes = Frame(self.janela)
+        botoes.pack(fill=X)
+        Button(botoes, text="Cancelar", command=self.cancelar_selecionados).pack(side=LEFT, padx=5, pady=5)
+        Button(botoes, text="Limpar concluídos", command=self.limpar_encerrados).pack(side=LEFT, padx=5, pady=5)
+        Button(botoes, text="Fechar", command=self.janela.destroy).pack(side=RIGHT, padx=5, pady=5)
+        for trabalho in self.fila.trabalhos.values():
+            self._exibir_trabalho(trabalho)
+
+    def _exibir_trabalho(self, trabalho):
+        if self.janela is None or not self.janela.winfo_exists():
+            return
+        iid = str(trabalho.id)
+        if not self.tree.exists(iid):
+            self.tree.insert("", END, iid=iid, values=(trabalho.descricao, "", "", "", ""), open=True)
+        for formato, tarefa in trabalho.tarefas.items():
+            valores = (trabalho.descricao, formato.upper(), tarefa.erro or tarefa.estado, tarefa.linhas, tarefa.destino)
+            filho = f"{iid}:{formato}"
+            if self.tree.exists(filho):
+                self.tree.item(filho, values=valores)
+            else:
+                self.tree.insert(iid, END, iid=filho, values=valores)
+        estado = "Encerrado" if trabalho.encerrado else "Em andamento"
+        self.tree.item(iid, values=(trabalho.descricao, "", estado, sum(t.linhas for t in trabalho.tarefas.values()), ""))
+
+    def _verificar(self):
+        self._agendado = None
+        for trabalho in self.fila.atualizar():
+            self._exibir_trabalho(trabalho)
+            if trabalho.encerrado and self.ao_encerrar:
+                self.ao_encerrar(trabalho)
+        if self.fila.pendentes():
+            self._agendado = self.root.after(self.intervalo, self._verificar)
+
+    def cancelar_selecionados(self):
+        for item in self.tree.selection():
+            self.fila.cancelar(int(item.split(":")[0]))
+
+    def limpar_encerrados(self):
+        encerrados = [trabalho.id for trabalho in self.fila.trabalhos.values() if trabalho.encerrado]
+        self.fila.remover_encerrados()
+        for trabalho_id in encerrados:
+            self.tree.delete(str(trabalho_id))
+
+class RegistroTelas:
+    # Cada tela é construída na primeira visita e reaproveitada nas seguintes;
+    # ao voltar a ela, só os dados são atualizados. construir devolve a lista
+    # de (widget, gerenciador, opções) usada para exibir e esconder a tela.
+    def __init__(self, root):
+        self.root = root
+        self.atual = None
+        self.tempos = {}
+        self._construtores = {}
+        self._atualizadores = {}
+        self._telas = {}
+
+    def registrar(self, nome, construir, atualizar=None):
+        self._construtores[nome] = construir
+        self._atualizadores[nome] = atualizar
+
+    def exibir(self, nome):
+        inicio = time.perf_counter()
+        if self.atual is not None:
+            for widget, gerenciador, _ in self._telas[self.atual]:
+                getattr(widget, f"{gerenciador}_forget")()
+        construida = nome not in self._telas
+        if construida:
+            self._telas[nome] = self._construtores[nome]()
+        for widget, gerenciador, opcoes in self._telas[nome]:
+            getattr(widget, gerenciador)(**opcoes)
+        self.atual = nome
+        atualizar = self._atualizadores[nome]
+        if atualizar:
+            atualizar()
+        # O redesenho do Tk roda como tarefa ociosa; esta é agendada depois dele
+        self.root.after_idle(self._medir, nome, inicio, construida)
+
+    def _medir(self, nome, inicio, construida):
+        duracao = (time.perf_counter() - inicio) * 1000
+        tempos = self.tempos.setdefault(nome, {'construcao_ms': None, 'exibicoes': 0, 'ultima_ms': None, 'maximo_ms': 0.0})
+        if construida:
+            tempos['construcao_ms'] = duracao
+        tempos['exibicoes'] += 1
+        tempos['ultima_ms'] = duracao
+        tempos['maximo_ms'] = max(tempos['maximo_ms'], duracao)
+        if RASTREAR:
+            print(f"Tela '{nome}' exibida em {duracao:.1f} ms{' (construída)' if construida else ''}.")
 
 class Application:
     def __init__(self, root):
@@ -304,8 +564,27 @@ class Application:
         self.root.state('zoomed')  
         self.usuario_id = None  
 
-        self.login_frame = Frame(root)
-        self.login_frame.place(relx=0.5, rely=0.5, anchor=CENTER)
+        self.status_label = Label(root, text="", anchor=W, font=("Arial", 10))
+        self.status_label.pack(side=BOTTOM, fill=X)
+        self.executor = ExecutorBD(root, ao_mudar_estado=self.indicar_ocupado)
+        self.diretorio = diretorio_clientes
+        self.painel_alertas = PainelAlertas(root, self.executor, apos=self.status_label)
+        self.fila_exportacao = FilaExportacao()
+        self.painel_exportacoes = PainelExportacoes(root, self.fila_exportacao, ao_encerrar=self.exportacao_encerrada)
+
+        self.telas = RegistroTelas(root)
+        self.telas.registrar('login', self.construir_login, self.limpar_login)
+        self.telas.registrar('registro', self.construir_registro, self.limpar_registro)
+        self.telas.registrar('menu', self.construir_menu, self.atualizar_menu)
+        self.telas.registrar('cadastrar_cliente', self.construir_cadastrar_cliente, self.limpar_cadastro_cliente)
+        self.telas.registrar('cadastrar_pagamento', self.construir_cadastrar_pagamento, self.limpar_cadastro_pagamento)
+        self.telas.registrar('clientes_pagamentos', self.construir_clientes_pagamentos, self.carregar_clientes_pagamentos)
+        self.telas.registrar('relatorios', self.construir_relatorios, self.atualizar_relatorios)
+        self.telas.registrar('cadastrar_projeto', self.construir_cadastrar_projeto, self.limpar_cadastro_projeto)
+        self.show_login()
+
+    def construir_login(self):
+        self.login_frame = Frame(self.root)
 
         Label(self.login_frame, text="Usuário", font=("Arial", 14)).grid(row=0, column=0, padx=10, pady=10)
         Label(self.login_frame, text="Senha", font=("Arial", 14)).grid(row=1, column=0, padx=10, pady=10)
@@ -318,6 +597,14 @@ class Application:
 
         Button(self.login_frame, text="Login", command=self.login, font=("Arial", 14)).grid(row=2, column=0, columnspan=2, pady=10)
         Button(self.login_frame, text="Registrar", command=self.show_register, font=("Arial", 14)).grid(row=3, column=0, columnspan=2, pady=10)
+        return [(self.login_frame, 'place', {'relx': 0.5, 'rely': 0.5, 'anchor': CENTER})]
+
+    def limpar_login(self):
+        self.password_entry.delete(0, END)
+
+    def indicar_ocupado(self, ocupado):
+        self.status_label.config(text="Processando..." if ocupado else "")
+        self.root.config(cursor="watch" if ocupado else "")
 
     def login(self):
         username = self.username_entry.get().strip()
@@ -327,19 +614,22 @@ class Application:
             messagebox.showerror("Erro", "Por favor, preencha ambos os campos: Usuário e Senha.")
             return
 
-        user_id = verificar_login(username, password)
+        self.executor.submeter(verificar_login, username, password, ao_concluir=self.login_concluido,
+                               ao_falhar=lambda erro: messagebox.showerror("Erro", str(erro)))
+
+    def login_concluido(self, user_id):
         if user_id:
             self.usuario_id = user_id  
-            self.login_frame.place_forget()  
             self.show_menu()
-            verificar_alertas(self.usuario_id)  
+            self.painel_alertas.iniciar(self.usuario_id)
         else:
             messagebox.showerror("Erro", "Usuário ou senha incorretos")
 
     def show_register(self):
-        self.login_frame.pack_forget()
+        self.telas.exibir('registro')
+
+    def construir_registro(self):
         self.register_frame = Frame(self.root)
-        self.register_frame.place(relx=0.5, rely=0.5, anchor=CENTER)
 
         Label(self.register_frame, text="Novo Usuário", font=("Arial", 14)).grid(row=0, column=0, padx=10, pady=10)
         Label(self.register_frame, text="Senha", font=("Arial", 14)).grid(row=1, column=0, padx=10, pady=10)
@@ -352,6 +642,11 @@ class Application:
 
         Button(self.register_frame, text="Registrar", command=self.register, font=("Arial", 14)).grid(row=2, column=0, columnspan=2, pady=10)
         Button(self.register_frame, text="Voltar", command=self.show_login, font=("Arial", 14)).grid(row=3, column=0, columnspan=2, pady=10)
+        return [(self.register_frame, 'place', {'relx': 0.5, 'rely': 0.5, 'anchor': CENTER})]
+
+    def limpar_registro(self):
+        self.new_username_entry.delete(0, END)
+        self.new_password_entry.delete(0, END)
 
     def register(self):
         username = self.new_username_entry.get().strip()
@@ -361,77 +656,146 @@ class Application:
             messagebox.showerror("Erro", "Por favor, preencha ambos os campos: Usuário e Senha.")
             return
 
-        registrar_usuario(username, password)
+        self.executor.submeter(registrar_usuario, username, password, ao_concluir=self.registro_concluido,
+                               ao_falhar=lambda erro: messagebox.showerror("Erro", str(erro)))
+
+    def registro_concluido(self, _):
         messagebox.showinfo("Sucesso", "Usuário registrado com sucesso!")
         self.show_login()
 
     def show_login(self):
-        if hasattr(self, 'register_frame'):
-            self.register_frame.place_forget()  
-        if hasattr(self, 'menu_frame'):
-            self.menu_frame.pack_forget()  
-        self.login_frame.place(relx=0.5, rely=0.5, anchor=CENTER)  
+        self.telas.exibir('login')
 
     def show_menu(self):
-        if hasattr(self, 'menu_frame'):
-            self.menu_frame.pack_forget()  
-        if hasattr(self, 'projetos_frame'):
-            self.projetos_frame.pack_forget()  
-        if hasattr(self, 'cadastrar_cliente_frame'):
-            self.cadastrar_cliente_frame.place_forget()  
+        self.telas.exibir('menu')
 
+    def construir_menu(self):
         self.menu_frame = Frame(self.root)
-        self.menu_frame.pack(side=TOP, fill=X)
 
         Button(self.menu_frame, text="Cadastrar Cliente", command=self.show_cadastrar_cliente, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
         Button(self.menu_frame, text="Cadastrar Pagamento", command=self.show_cadastrar_pagamento, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
         Button(self.menu_frame, text="Ver Clientes e Pagamentos", command=self.show_clientes_pagamentos, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
         Button(self.menu_frame, text="Gerar Relatórios", command=self.show_relatorios, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
         Button(self.menu_frame, text="Cadastrar Projeto", command=self.show_cadastrar_projeto, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
+        Button(self.menu_frame, text="Importar CSV", command=self.show_importar_csv, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
+        Button(self.menu_frame, text="Painel", command=self.show_painel, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
+        Button(self.menu_frame, text="Exportações", command=self.painel_exportacoes.exibir, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
         Button(self.menu_frame, text="Sair", command=self.logout, font=("Arial", 12)).pack(side=RIGHT, padx=10, pady=10)
-        
-        self.mostrar_projetos_cadastrados()  
 
-    def mostrar_projetos_cadastrados(self):
-       
         self.projetos_frame = Frame(self.root)
-        self.projetos_frame.pack(fill=BOTH, expand=True)
 
-        self.tree = ttk.Treeview(self.projetos_frame, columns=("Cliente", "Projeto", "Data de Entrega", "Recorrente", "ID do Projeto"), show="headings")
-        self.tree.heading("Cliente", text="Cliente")
-        self.tree.heading("Projeto", text="Projeto")
-        self.tree.heading("Data de Entrega", text="Data de Entrega")
-        self.tree.heading("Recorrente", text="Recorrente")
-        self.tree.heading("ID do Projeto", text="ID do Projeto") 
+        self.projetos_tree = ttk.Treeview(self.projetos_frame, columns=("Cliente", "Projeto", "Data de Entrega", "Recorrente", "ID do Projeto"), show="headings")
+        self.projetos_tree.heading("Cliente", text="Cliente")
+        self.projetos_tree.heading("Projeto", text="Projeto")
+        self.projetos_tree.heading("Data de Entrega", text="Data de Entrega")
+        self.projetos_tree.heading("Recorrente", text="Recorrente")
+        self.projetos_tree.heading("ID do Projeto", text="ID do Projeto")
 
-        self.tree.pack(fill=BOTH, expand=True)
-
-        self.tree.delete(*self.tree.get_children())
-
-        projetos = carregar_projetos(self.usuario_id)
-        if projetos:
-            for projeto in projetos:
-                recorrente_texto = "Mensal" if projeto[3] else "Único"
-                self.tree.insert("", END, values=(projeto[0], projeto[1], projeto[2], recorrente_texto, projeto[4]))
+        self.projetos_tree.pack(fill=BOTH, expand=True)
+        self.lista_projetos = ListaProjetos(self.projetos_tree, self.executor)
 
         self.btn_editar_projeto = Button(self.projetos_frame, text="Editar Projeto", command=self.editar_projeto, font=("Arial", 12))
         self.btn_editar_projeto.pack(side=LEFT, padx=10, pady=10)
 
         self.btn_excluir_projeto = Button(self.projetos_frame, text="Excluir Projeto", command=self.excluir_projeto, font=("Arial", 12))
         self.btn_excluir_projeto.pack(side=LEFT, padx=10, pady=10)
+        return [(self.menu_frame, 'pack', {'side': TOP, 'fill': X}),
+                (self.projetos_frame, 'pack', {'fill': BOTH, 'expand': True})]
+
+    def atualizar_menu(self):
+        self.lista_projetos.exibir(self.usuario_id)
+
+    def show_importar_csv(self):
+        if hasattr(self, 'importar_toplevel') and self.importar_toplevel.winfo_exists():
+            self.importar_toplevel.focus()
+            return
+
+        self.importar_toplevel = Toplevel(self.root)
+        self.importar_toplevel.title("Importar CSV")
+
+        Label(self.importar_toplevel, text="Importar", font=("Arial", 12)).grid(row=0, column=0, pady=5, padx=5, sticky=E)
+        self.importar_tabela_combobox = ttk.Combobox(self.importar_toplevel, font=("Arial", 12), state="readonly", values=[
+            'Clientes', 'Pagamentos', 'Projetos'
+        ])
+        self.importar_tabela_combobox.grid(row=0, column=1, pady=5, padx=5)
+        self.importar_tabela_combobox.set('Clientes')
+
+        Label(self.importar_toplevel, text="Colunas: nome, email, telefone | cliente_id, tipo_pagamento, valor, data_pagamento, status |\n"
+              "cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente", font=("Arial", 9), justify=LEFT).grid(row=1, column=0, columnspan=2, padx=5)
+
+        Button(self.importar_toplevel, text="Selecionar Arquivo", command=self.importar_csv, font=("Arial", 12)).grid(row=2, column=0, columnspan=2, pady=10)
+
+    def importar_csv(self):
+        tabela = self.importar_tabela_combobox.get().lower()
+        filepath = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
+        if filepath:
+            self.importar_toplevel.destroy()
+            self.executor.submeter(importar_csv, tabela, filepath, self.usuario_id,
+                                   progresso=lambda linhas: self.executor.notificar(self.exibir_progresso_importacao, linhas),
+                                   ao_concluir=self.importacao_concluida)
+
+    def exibir_progresso_importacao(self, linhas):
+        self.status_label.config(text=f"Importando... {linhas} linhas gravadas")
+
+    def importacao_concluida(self, resultado):
+        mensagem = f"{resultado.inseridos} linhas importadas, {resultado.rejeitados} rejeitadas."
+        if resultado.rejeitados:
+            detalhes = "\n".join(f"Linha {linha}: {motivo}" for linha, motivo in resultado.exemplos_rejeitados[:10])
+            mensagem += f"\n\n{detalhes}\n\nLinhas rejeitadas gravadas em:\n{resultado.arquivo_rejeitados}"
+        messagebox.showinfo("Importação", mensagem)
+        if self.telas.atual == 'menu':
+            self.atualizar_menu()
+
+    def show_painel(self):
+        if hasattr(self, 'painel_toplevel') and self.painel_toplevel.winfo_exists():
+            self.painel_toplevel.focus()
+        else:
+            self.painel_toplevel = Toplevel(self.root)
+            self.painel_toplevel.title("Painel")
+
+            self.painel_totais_label = Label(self.painel_toplevel, text="", font=("Arial", 12), justify=LEFT)
+            self.painel_totais_label.pack(anchor=W, padx=10, pady=10)
+
+            Label(self.painel_toplevel, text="Últimos meses", font=("Arial", 12, "bold")).pack(anchor=W, padx=10)
+            self.painel_meses_tree = ttk.Treeview(self.painel_toplevel, columns=("Mês", "Pago", "Em Aberto", "Pagamentos", "Projetos"), show="headings", height=MESES_PAINEL)
+            for coluna in ("Mês", "Pago", "Em Aberto", "Pagamentos", "Projetos"):
+                self.painel_meses_tree.heading(coluna, text=coluna)
+            self.painel_meses_tree.pack(fill=X, padx=10)
+
+            Label(self.painel_toplevel, text="Maiores valores em aberto", font=("Arial", 12, "bold")).pack(anchor=W, padx=10, pady=(10, 0))
+            self.painel_clientes_tree = ttk.Treeview(self.painel_toplevel, columns=("Cliente", "Em Aberto"), show="headings", height=CLIENTES_PAINEL)
+            self.painel_clientes_tree.heading("Cliente", text="Cliente")
+            self.painel_clientes_tree.heading("Em Aberto", text="Em Aberto")
+            self.painel_clientes_tree.pack(fill=X, padx=10)
+
+            Button(self.painel_toplevel, text="Atualizar", command=self.show_painel, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
+            Button(self.painel_toplevel, text="Reconstruir Totais", command=self.reconstruir_painel, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
+        self.executor.submeter(buscar_painel, self.usuario_id, ao_concluir=self.exibir_painel)
+
+    def reconstruir_painel(self):
+        self.executor.submeter(reconstruir_resumos, ao_concluir=lambda _: self.show_painel())
+
+    def exibir_painel(self, painel):
+        if not painel or not self.painel_toplevel.winfo_exists():
+            return
+        pago, aberto, quantidade = painel['totais']
+        self.painel_totais_label.config(text=f"Pago: {formatar_centavos(pago)}    Em aberto: {formatar_centavos(aberto)}    Pagamentos: {quantidade}")
+        self.painel_meses_tree.delete(*self.painel_meses_tree.get_children())
+        for mes, pago, aberto, quantidade, projetos in painel['por_mes']:
+            self.painel_meses_tree.insert("", END, values=(mes, formatar_centavos(pago), formatar_centavos(aberto), quantidade, formatar_centavos(projetos)))
+        self.painel_clientes_tree.delete(*self.painel_clientes_tree.get_children())
+        for nome, aberto in painel['maiores_abertos']:
+            self.painel_clientes_tree.insert("", END, values=(nome, formatar_centavos(aberto)))
 
     def logout(self):
-        if hasattr(self, 'projetos_frame'):
-            self.projetos_frame.pack_forget()  
+        self.painel_alertas.parar()
         self.show_login()
 
     def show_cadastrar_cliente(self):
-        self.menu_frame.pack_forget()
-        if hasattr(self, 'projetos_frame'):
-            self.projetos_frame.pack_forget()  
+        self.telas.exibir('cadastrar_cliente')
 
+    def construir_cadastrar_cliente(self):
         self.cadastrar_cliente_frame = Frame(self.root)
-        self.cadastrar_cliente_frame.place(relx=0.5, rely=0.5, anchor=CENTER)
 
         Label(self.cadastrar_cliente_frame, text="Cadastrar Cliente", font=("Arial", 14)).grid(row=0, column=0, columnspan=2, pady=10)
 
@@ -449,36 +813,37 @@ class Application:
         self.cliente_telefone_entry.grid(row=3, column=1, pady=5)
 
         Button(self.cadastrar_cliente_frame, text="Salvar", command=self.salvar_cliente, font=("Arial", 12)).grid(row=4, column=0, columnspan=2, pady=10)
-        Button(self.cadastrar_cliente_frame, text="Voltar", command=self.show_menu_from_cliente, font=("Arial", 12)).grid(row=5, column=0, columnspan=2, pady=10)
+        Button(self.cadastrar_cliente_frame, text="Voltar", command=self.show_menu, font=("Arial", 12)).grid(row=5, column=0, columnspan=2, pady=10)
+        return [(self.cadastrar_cliente_frame, 'place', {'relx': 0.5, 'rely': 0.5, 'anchor': CENTER})]
+
+    def limpar_cadastro_cliente(self):
+        self.cliente_nome_entry.delete(0, END)
+        self.cliente_email_entry.delete(0, END)
+        self.cliente_telefone_entry.delete(0, END)
 
     def salvar_cliente(self):
         nome = self.cliente_nome_entry.get()
         email = self.cliente_email_entry.get()
         telefone = self.cliente_telefone_entry.get()
-        cadastrar_cliente(nome, email, telefone, self.usuario_id)
-        messagebox.showinfo("Sucesso", "Cliente cadastrado com sucesso!")
-        self.cliente_nome_entry.delete(0, END)
-        self.cliente_email_entry.delete(0, END)
-        self.cliente_telefone_entry.delete(0, END)
+        self.executor.submeter(cadastrar_cliente, nome, email, telefone, self.usuario_id,
+                               ao_concluir=self.cliente_cadastrado)
 
-    def show_menu_from_cliente(self):
-        self.cadastrar_cliente_frame.place_forget()
-        self.show_menu()
+    def cliente_cadastrado(self, _):
+        messagebox.showinfo("Sucesso", "Cliente cadastrado com sucesso!")
+        self.limpar_cadastro_cliente()
 
     def show_cadastrar_pagamento(self):
-        self.menu_frame.pack_forget()
-        if hasattr(self, 'projetos_frame'):
-            self.projetos_frame.pack_forget()  
+        self.telas.exibir('cadastrar_pagamento')
 
+    def construir_cadastrar_pagamento(self):
         self.cadastrar_pagamento_frame = Frame(self.root)
-        self.cadastrar_pagamento_frame.place(relx=0.5, rely=0.5, anchor=CENTER)
 
         Label(self.cadastrar_pagamento_frame, text="Cadastrar Pagamento", font=("Arial", 14)).grid(row=0, column=0, columnspan=2, pady=10)
 
         Label(self.cadastrar_pagamento_frame, text="Cliente", font=("Arial", 12)).grid(row=1, column=0, sticky=E, pady=5)
         self.pagamento_cliente_id_combobox = ttk.Combobox(self.cadastrar_pagamento_frame, font=("Arial", 12))
         self.pagamento_cliente_id_combobox.grid(row=1, column=1, pady=5)
-        self.carregar_clientes()
+        self.busca_clientes_pagamento = self.ligar_busca_clientes(self.pagamento_cliente_id_combobox)
 
         Label(self.cadastrar_pagamento_frame, text="Tipo de Pagamento", font=("Arial", 12)).grid(row=2, column=0, sticky=E, pady=5)
         self.pagamento_tipo_combobox = ttk.Combobox(self.cadastrar_pagamento_frame, font=("Arial", 12), values=[
@@ -504,7 +869,16 @@ class Application:
         self.pagamento_status_combobox.grid(row=5, column=1, pady=5)
 
         Button(self.cadastrar_pagamento_frame, text="Salvar", command=self.salvar_pagamento, font=("Arial", 12)).grid(row=6, column=0, columnspan=2, pady=10)
-        Button(self.cadastrar_pagamento_frame, text="Voltar", command=self.show_menu_from_pagamento, font=("Arial", 12)).grid(row=7, column=0, columnspan=2, pady=10)
+        Button(self.cadastrar_pagamento_frame, text="Voltar", command=self.show_menu, font=("Arial", 12)).grid(row=7, column=0, columnspan=2, pady=10)
+        return [(self.cadastrar_pagamento_frame, 'place', {'relx': 0.5, 'rely': 0.5, 'anchor': CENTER})]
+
+    def limpar_cadastro_pagamento(self):
+        self.pagamento_cliente_id_combobox.set('')
+        self.pagamento_tipo_combobox.set('')
+        self.pagamento_valor_entry.delete(0, END)
+        self.pagamento_data_entry.delete(0, END)
+        self.pagamento_status_combobox.set('')
+        self.busca_clientes_pagamento.atualizar()
 
     def mostrar_calendario(self):
         self.calendario_toplevel = Toplevel(self.root)
@@ -517,18 +891,12 @@ class Application:
         self.pagamento_data_entry.insert(0, self.calendario.get_date())
         self.calendario_toplevel.destroy()
 
-    def carregar_clientes(self):
-        conn = conectar_bd()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nome FROM clientes WHERE usuario_id=?", (self.usuario_id,))
-            clientes = cursor.fetchall()
-            self.pagamento_cliente_id_combobox['values'] = [f"{cliente[0]} - {cliente[1]}" for cliente in clientes]
-            conn.close()
+    def ligar_busca_clientes(self, combobox):
+        return BuscaClientes(combobox, lambda texto: buscar_clientes(self.usuario_id, texto), self.executor)
 
     def formatar_valor(self, event):
         try:
-            valor = Decimal(self.pagamento_valor_entry.get().replace('R$', '').replace('.', '').replace(',', '.'))
+            valor = texto_para_decimal(self.pagamento_valor_entry.get())
             self.pagamento_valor_entry.delete(0, END)
             self.pagamento_valor_entry.insert(0, locale.currency(valor, grouping=True))
         except InvalidOperation:
@@ -537,35 +905,33 @@ class Application:
     def salvar_pagamento(self):
         cliente_id = int(self.pagamento_cliente_id_combobox.get().split(' - ')[0])
         tipo_pagamento = self.pagamento_tipo_combobox.get()
-        valor = Decimal(self.pagamento_valor_entry.get().replace('R$', '').replace('.', '').replace(',', '.'))
+        valor = texto_para_decimal(self.pagamento_valor_entry.get())
         data_pagamento = self.pagamento_data_entry.get()
         status = self.pagamento_status_combobox.get()
-        cadastrar_pagamento(cliente_id, tipo_pagamento, valor, data_pagamento, status, self.usuario_id)
+        self.executor.submeter(cadastrar_pagamento, cliente_id, tipo_pagamento, valor, data_pagamento, status, self.usuario_id,
+                               ao_concluir=self.pagamento_cadastrado, ao_falhar=self.falha_gravacao)
+
+    def pagamento_cadastrado(self, _):
         messagebox.showinfo("Sucesso", "Pagamento cadastrado com sucesso!")
-        self.pagamento_cliente_id_combobox.set('')
-        self.pagamento_tipo_combobox.set('')
-        self.pagamento_valor_entry.delete(0, END)
-        self.pagamento_data_entry.delete(0, END)
-        self.pagamento_status_combobox.set('')
+        self.limpar_cadastro_pagamento()
 
-    def show_menu_from_pagamento(self):
-        self.cadastrar_pagamento_frame.place_forget()
-        self.show_menu()
+    def falha_gravacao(self, erro):
+        # Os ValueError de servicos já trazem a mensagem de validação (ex.: "Data inválida: '31/02/2024'")
+        if isinstance(erro, ValueError):
+            messagebox.showerror("Erro", str(erro))
+        else:
+            messagebox.showerror("Erro", f"Ocorreu um erro: {erro}")
 
     def show_clientes_pagamentos(self):
-        self.menu_frame.pack_forget()
-        if hasattr(self, 'projetos_frame'):
-            self.projetos_frame.pack_forget()  
+        self.telas.exibir('clientes_pagamentos')
 
+    def construir_clientes_pagamentos(self):
         self.clientes_pagamentos_frame = Frame(self.root)
-        self.clientes_pagamentos_frame.pack(fill=BOTH, expand=True)
-
         self.clientes_pagamentos_buttons_frame = Frame(self.root)
-        self.clientes_pagamentos_buttons_frame.pack(side=TOP, fill=X)
 
         Button(self.clientes_pagamentos_buttons_frame, text="Editar Cliente", command=self.editar_cliente, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
         Button(self.clientes_pagamentos_buttons_frame, text="Excluir Cliente", command=self.excluir_cliente, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
-        Button(self.clientes_pagamentos_buttons_frame, text="Voltar", command=self.show_menu_from_clientes_pagamentos).pack(side=RIGHT, pady=10)
+        Button(self.clientes_pagamentos_buttons_frame, text="Voltar", command=self.show_menu).pack(side=RIGHT, pady=10)
 
         self.tree = ttk.Treeview(self.clientes_pagamentos_frame, columns=(
             "Cliente ID", "Nome", "Email", "Telefone"), show="headings")
@@ -575,35 +941,54 @@ class Application:
         self.tree.heading("Telefone", text="Telefone")
         self.tree.pack(side=LEFT, fill=Y)
 
-        self.carregar_clientes_pagamentos()
+        self.clientes_paginados = TreeviewPaginada(self.tree, self.buscar_pagina_clientes, executor=self.executor)
+        self.clientes_paginados.scrollbar.pack(side=LEFT, fill=Y)
 
         self.detalhes_frame = Frame(self.clientes_pagamentos_frame)
         self.detalhes_frame.pack(side=LEFT, fill=BOTH, expand=True)
 
-        self.detalhes_tree = ttk.Treeview(self.detalhes_frame, columns=(
+        self.detalhes_lista_frame = Frame(self.detalhes_frame)
+        self.detalhes_lista_frame.pack(fill=BOTH, expand=True)
+
+        self.detalhes_tree = ttk.Treeview(self.detalhes_lista_frame, columns=(
             "Pagamento ID", "Tipo de Pagamento", "Valor", "Data", "Status"), show="headings")
         self.detalhes_tree.heading("Pagamento ID", text="Pagamento ID")
         self.detalhes_tree.heading("Tipo de Pagamento", text="Tipo de Pagamento")
         self.detalhes_tree.heading("Valor", text="Valor (R$)")
         self.detalhes_tree.heading("Data", text="Data de Pagamento")
         self.detalhes_tree.heading("Status", text="Status")
-        self.detalhes_tree.pack(fill=BOTH, expand=True)
+        self.detalhes_tree.pack(side=LEFT, fill=BOTH, expand=True)
+
+        self.pagamentos_paginados = TreeviewPaginada(self.detalhes_tree, self.buscar_pagina_pagamentos, formatar=self.formatar_linha_pagamento, executor=self.executor)
+        self.pagamentos_paginados.scrollbar.pack(side=LEFT, fill=Y)
+
+        self.totais_label = Label(self.detalhes_frame, text="", font=("Arial", 12))
+        self.totais_label.pack(anchor=W, padx=10)
 
         self.tree.bind("<<TreeviewSelect>>", self.mostrar_detalhes_pagamentos)
 
         Button(self.detalhes_frame, text="Editar Pagamento", command=self.editar_pagamento, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
         Button(self.detalhes_frame, text="Excluir Pagamento", command=self.excluir_pagamento, font=("Arial", 12)).pack(side=LEFT, padx=10, pady=10)
+        return [(self.clientes_pagamentos_frame, 'pack', {'fill': BOTH, 'expand': True}),
+                (self.clientes_pagamentos_buttons_frame, 'pack', {'side': TOP, 'fill': X})]
 
     def carregar_clientes_pagamentos(self):
-        conn = conectar_bd()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nome, email, telefone FROM clientes WHERE usuario_id=?", (self.usuario_id,))
-            clientes = cursor.fetchall()
-            for cliente in clientes:
-                self.tree.insert("", END, values=cliente)
-            self.clientes = clientes
-            conn.close()
+        self.limpar_detalhes_pagamentos()
+        self.clientes_paginados.recarregar()
+
+    def limpar_detalhes_pagamentos(self):
+        self.cliente_detalhes_id = None
+        self.pagamentos_paginados.limpar()
+        self.totais_label.config(text="")
+
+    def buscar_pagina_clientes(self, ancora, direcao, limite):
+        return self.diretorio.pagina(self.usuario_id, ancora, direcao, limite)
+
+    def buscar_pagina_pagamentos(self, ancora, direcao, limite):
+        return listar_pagamentos_pagina(self.cliente_detalhes_id, self.usuario_id, ancora, direcao, limite)
+
+    def formatar_linha_pagamento(self, pagamento):
+        return (pagamento[0], pagamento[1], formatar_centavos(pagamento[2]), formatar_data(pagamento[3]), pagamento[4])
 
     def mostrar_detalhes_pagamentos(self, event):
         selected_item = self.tree.selection()
@@ -611,18 +996,14 @@ class Application:
             return
         
         cliente_id = self.tree.item(selected_item[0], "values")[0]
+        self.cliente_detalhes_id = cliente_id
+        self.pagamentos_paginados.recarregar()
+        self.executor.submeter(totais_cliente, cliente_id, self.usuario_id, ao_concluir=self.exibir_totais_cliente)
 
-        self.detalhes_tree.delete(*self.detalhes_tree.get_children())  
-
-        conn = conectar_bd()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, tipo_pagamento, valor, data_pagamento, status FROM pagamentos WHERE cliente_id=? AND usuario_id=?", 
-                           (cliente_id, self.usuario_id))
-            pagamentos = cursor.fetchall()
-            for pagamento in pagamentos:
-                self.detalhes_tree.insert("", END, values=pagamento)
-            conn.close()
+    def exibir_totais_cliente(self, totais):
+        if totais and self.totais_label.winfo_exists():
+            pago, em_aberto, quantidade = totais
+            self.totais_label.config(text=f"Pago: {formatar_centavos(pago)}    Em aberto: {formatar_centavos(em_aberto)}    Pagamentos: {quantidade}")
 
     def editar_cliente(self):
         selected_item = self.tree.selection()
@@ -660,11 +1041,15 @@ class Application:
         nome = self.editar_cliente_nome_entry.get()
         email = self.editar_cliente_email_entry.get()
         telefone = self.editar_cliente_telefone_entry.get()
-        editar_cliente(cliente_id, nome, email, telefone, self.usuario_id)
+        self.executor.submeter(editar_cliente, cliente_id, nome, email, telefone, self.usuario_id,
+                               ao_concluir=lambda _: self.cliente_editado((cliente_id, nome, email, telefone)))
+
+    def cliente_editado(self, cliente):
         messagebox.showinfo("Sucesso", "Cliente editado com sucesso!")
         self.editar_cliente_toplevel.destroy()
-        self.tree.delete(*self.tree.get_children())  
-        self.carregar_clientes_pagamentos()  
+        self.clientes_paginados.atualizar_linha(cliente)
+        # A lista de projetos exibe o nome do cliente
+        self.lista_projetos.invalidar()
 
     def excluir_cliente(self):
         selected_item = self.tree.selection()
@@ -675,8 +1060,17 @@ class Application:
         cliente_id = self.tree.item(selected_item[0], "values")[0]
         confirmar = messagebox.askyesno("Confirmação", "Tem certeza que deseja excluir este cliente?")
         if confirmar:
-            excluir_cliente(cliente_id, self.usuario_id)
-            self.show_clientes_pagamentos()  
+            # Excluir um cliente apaga também os pagamentos e projetos dele, o que pode demorar
+            self.executor.submeter(excluir_cliente, cliente_id, self.usuario_id,
+                                   ao_concluir=lambda _: self.cliente_excluido(cliente_id),
+                                   ao_falhar=lambda erro: messagebox.showerror("Erro", f"Erro ao excluir cliente: {erro}"))
+
+    def cliente_excluido(self, cliente_id):
+        self.lista_projetos.invalidar()
+        messagebox.showinfo("Sucesso", "Cliente excluído com sucesso!")
+        self.clientes_paginados.remover_linha(cliente_id)
+        if self.cliente_detalhes_id == cliente_id:
+            self.limpar_detalhes_pagamentos()
 
     def editar_pagamento(self):
         selected_item = self.detalhes_tree.selection()
@@ -723,7 +1117,7 @@ class Application:
 
     def formatar_valor_pagamento(self, event):
         try:
-            valor = Decimal(self.editar_pagamento_valor_entry.get().replace('R$', '').replace('.', '').replace(',', '.'))
+            valor = texto_para_decimal(self.editar_pagamento_valor_entry.get())
             self.editar_pagamento_valor_entry.delete(0, END)
             self.editar_pagamento_valor_entry.insert(0, locale.currency(valor, grouping=True))
         except InvalidOperation:
@@ -732,19 +1126,20 @@ class Application:
     def salvar_edicao_pagamento(self, pagamento_id):
         tipo_pagamento = self.editar_pagamento_tipo_combobox.get()
         try:
-            valor = Decimal(self.editar_pagamento_valor_entry.get().replace('R$', '').replace('.', '').replace(',', '.'))
+            valor = texto_para_decimal(self.editar_pagamento_valor_entry.get())
         except InvalidOperation:
             messagebox.showerror("Erro", "Valor inválido!")
             return
         data_pagamento = self.editar_pagamento_data_entry.get()
         status = self.editar_pagamento_status_combobox.get()
-        try:
-            editar_pagamento(pagamento_id, tipo_pagamento, valor, data_pagamento, status, self.usuario_id)
-            messagebox.showinfo("Sucesso", "Pagamento editado com sucesso!")
-            self.editar_pagamento_toplevel.destroy()
-            self.mostrar_detalhes_pagamentos(None)  
-        except Exception as e:
-            messagebox.showerror("Erro", f"Ocorreu um erro ao editar o pagamento: {e}")
+        self.executor.submeter(editar_pagamento, pagamento_id, tipo_pagamento, valor, data_pagamento, status, self.usuario_id,
+                               ao_concluir=self.pagamento_editado,
+                               ao_falhar=lambda erro: messagebox.showerror("Erro", f"Ocorreu um erro ao editar o pagamento: {erro}"))
+
+    def pagamento_editado(self, _):
+        messagebox.showinfo("Sucesso", "Pagamento editado com sucesso!")
+        self.editar_pagamento_toplevel.destroy()
+        self.mostrar_detalhes_pagamentos(None)
 
     def excluir_pagamento(self):
         selected_item = self.detalhes_tree.selection()
@@ -755,19 +1150,13 @@ class Application:
         pagamento_id = self.detalhes_tree.item(selected_item[0], "values")[0]
         confirmar = messagebox.askyesno("Confirmação", "Tem certeza que deseja excluir este pagamento?")
         if confirmar:
-            excluir_pagamento(pagamento_id, self.usuario_id)
-            self.mostrar_detalhes_pagamentos(None)  
-
-    def show_menu_from_clientes_pagamentos(self):
-        self.clientes_pagamentos_frame.pack_forget()
-        self.clientes_pagamentos_buttons_frame.pack_forget()
-        self.show_menu()
+            self.executor.submeter(excluir_pagamento, pagamento_id, self.usuario_id,
+                                   ao_concluir=lambda _: self.mostrar_detalhes_pagamentos(None))
 
     def show_relatorios(self):
-        self.menu_frame.pack_forget()
-        if hasattr(self, 'projetos_frame'):
-            self.projetos_frame.pack_forget()
+        self.telas.exibir('relatorios')
 
+    def construir_relatorios(self):
         largura_janela = 800
         altura_janela = 600
 
@@ -777,12 +1166,12 @@ class Application:
         y_posicao = (altura_tela // 2) - (altura_janela // 2)
 
         self.relatorios_frame = Frame(self.root, width=largura_janela, height=altura_janela)
-        self.relatorios_frame.place(x=x_posicao, y=y_posicao)
+        self.relatorios_usuario_id = None
 
         Label(self.relatorios_frame, text="Cliente", font=("Arial", 12)).grid(row=0, column=0, sticky=E, pady=5)
         self.relatorios_cliente_id_combobox = ttk.Combobox(self.relatorios_frame, font=("Arial", 12))
         self.relatorios_cliente_id_combobox.grid(row=0, column=1, pady=5)
-        self.carregar_clientes_para_relatorio()
+        self.busca_clientes_relatorio = self.ligar_busca_clientes(self.relatorios_cliente_id_combobox)
 
         Label(self.relatorios_frame, text="Data Inicial", font=("Arial", 12)).grid(row=1, column=0, sticky=E, pady=5)
         self.relatorios_data_inicial_entry = DateEntry(self.relatorios_frame, font=("Arial", 12), date_pattern='dd-mm-yyyy')
@@ -798,43 +1187,63 @@ class Application:
         ])
         self.relatorios_tipo_combobox.grid(row=3, column=1, pady=5)
 
-        Button(self.relatorios_frame, text="Exportar CSV", command=self.exportar_csv_relatorio, font=("Arial", 12)).grid(row=4, column=0, pady=10)
-        Button(self.relatorios_frame, text="Exportar XML", command=self.exportar_xml_relatorio, font=("Arial", 12)).grid(row=4, column=1, pady=10)
-        Button(self.relatorios_frame, text="Exportar PDF", command=self.exportar_pdf_relatorio, font=("Arial", 12)).grid(row=4, column=2, pady=10)
-        Button(self.relatorios_frame, text="Voltar", command=self.show_menu_from_relatorios, font=("Arial", 12)).grid(row=5, column=0, columnspan=3, pady=10)
-
-    def carregar_clientes_para_relatorio(self):
-        conn = conectar_bd()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nome FROM clientes WHERE usuario_id=?", (self.usuario_id,))
-            clientes = cursor.fetchall()
-            self.relatorios_cliente_id_combobox['values'] = [f"{cliente[0]} - {cliente[1]}" for cliente in clientes]
-            conn.close()
-
-    def exportar_csv_relatorio(self):
-        cliente_id, tipo_relatorio, data_inicial, data_final = self.obter_parametros_relatorio()
-        dados = self.carregar_dados_para_relatorio(cliente_id, tipo_relatorio, data_inicial, data_final)
-        filepath = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
-        if filepath:
-            exportar_csv(dados, filepath)
-            messagebox.showinfo("Sucesso", "Relatório exportado como CSV com sucesso!")
-
-    def exportar_xml_relatorio(self):
-        cliente_id, tipo_relatorio, data_inicial, data_final = self.obter_parametros_relatorio()
-        dados = self.carregar_dados_para_relatorio(cliente_id, tipo_relatorio, data_inicial, data_final)
-        filepath = filedialog.asksaveasfilename(defaultextension=".xml", filetypes=[("XML files", "*.xml")])
-        if filepath:
-            exportar_xml(dados, filepath)
-            messagebox.showinfo("Sucesso", "Relatório exportado como XML com sucesso!")
+        self.relatorios_todos_var = BooleanVar()
+        Checkbutton(self.relatorios_frame, text="Todos os clientes", variable=self.relatorios_todos_var, font=("Arial", 12)).grid(row=4, column=0, sticky=W, pady=5)
+        self.relatorios_separar_var = BooleanVar(value=True)
+        Checkbutton(self.relatorios_frame, text="Um arquivo por cliente", variable=self.relatorios_separar_var, font=("Arial", 12)).grid(row=4, column=1, sticky=W, pady=5)
+
+        self.relatorios_formatos_vars = {}
+        for coluna, formato in enumerate(('csv', 'xml', 'pdf')):
+            self.relatorios_formatos_vars[formato] = BooleanVar(value=formato == 'pdf')
+            Checkbutton(self.relatorios_frame, text=formato.upper(), variable=self.relatorios_formatos_vars[formato],
+                        font=("Arial", 12)).grid(row=5, column=coluna, sticky=W, pady=5)
+
+        Button(self.relatorios_frame, text="Exportar", command=self.exportar_relatorio, font=("Arial", 12)).grid(row=6, column=0, pady=10)
+        Button(self.relatorios_frame, text="Exportações", command=self.painel_exportacoes.exibir, font=("Arial", 12)).grid(row=6, column=1, pady=10)
+        Button(self.relatorios_frame, text="Voltar", command=self.show_menu, font=("Arial", 12)).grid(row=7, column=0, columnspan=3, pady=10)
+        return [(self.relatorios_frame, 'place', {'x': x_posicao, 'y': y_posicao})]
+
+    def atualizar_relatorios(self):
+        # Mantém os filtros da última exportação do mesmo usuário; só a lista de clientes é refeita
+        if self.relatorios_usuario_id != self.usuario_id:
+            self.relatorios_usuario_id = self.usuario_id
+            self.relatorios_cliente_id_combobox.set('')
+        self.busca_clientes_relatorio.atualizar()
+
+    def exportar_relatorio(self):
+        # Um trabalho por exportação, com uma tarefa por formato marcado
+        formatos = [formato for formato, var in self.relatorios_formatos_vars.items() if var.get()]
+        if not formatos:
+            messagebox.showerror("Erro", "Selecione ao menos um formato.")
+            return
+        todos = self.relatorios_todos_var.get()
+        separar = self.relatorios_separar_var.get()
+        if todos:
+            cliente_id = None
+            tipo_relatorio = self.relatorios_tipo_combobox.get()
+            data_inicial = self.relatorios_data_inicial_entry.get_date().strftime('%Y-%m-%d')
+            data_final = self.relatorios_data_final_entry.get_date().strftime('%Y-%m-%d')
+            descricao = f"Todos os clientes ({tipo_relatorio})"
+        else:
+            cliente_id, tipo_relatorio, data_inicial, data_final = self.obter_parametros_relatorio()
+            descricao = f"{self.relatorios_cliente_id_combobox.get()} ({tipo_relatorio})"
 
-    def exportar_pdf_relatorio(self):
-        cliente_id, tipo_relatorio, data_inicial, data_final = self.obter_parametros_relatorio()
-        dados = self.carregar_dados_para_relatorio(cliente_id, tipo_relatorio, data_inicial, data_final)
-        filepath = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF files", "*.pdf")])
-        if filepath:
-            exportar_pdf(dados, filepath)
-            messagebox.showinfo("Sucesso", "Relatório exportado como PDF com sucesso!")
+        if todos and separar:
+            # Os arquivos de cada formato se distinguem pela extensão
+            diretorio = filedialog.askdirectory(title="Pasta dos relatórios")
+            destinos = {formato: diretorio for formato in formatos} if diretorio else None
+        else:
+            filepath = filedialog.asksaveasfilename(defaultextension=f".{formatos[0]}",
+                                                    filetypes=[(f"{formato.upper()} files", f"*.{formato}") for formato in formatos])
+            base = os.path.splitext(filepath)[0]
+            destinos = {formato: f"{base}.{formato}" for formato in formatos} if filepath else None
+        if destinos:
+            self.painel_exportacoes.submeter(descricao, destinos, self.usuario_id, cliente_id, tipo_relatorio,
+                                             data_inicial, data_final, separar=separar)
+
+    def exportacao_encerrada(self, trabalho):
+        estados = ", ".join(f"{formato.upper()}: {tarefa.estado}" for formato, tarefa in trabalho.tarefas.items())
+        self.status_label.config(text=f"Exportação {trabalho.descricao} encerrada ({estados})")
 
     def obter_parametros_relatorio(self):
         cliente_id = int(self.relatorios_cliente_id_combobox.get().split(' - ')[0])
@@ -843,60 +1252,18 @@ class Application:
         data_final = self.relatorios_data_final_entry.get_date().strftime('%Y-%m-%d')
         return cliente_id, tipo_relatorio, data_inicial, data_final
 
-    def carregar_dados_para_relatorio(self, cliente_id, tipo_relatorio, data_inicial, data_final):
-        conn = conectar_bd()
-        if conn:
-            cursor = conn.cursor()
-            query = """
-                SELECT c.id, c.nome, c.email, c.telefone, p.id, p.tipo_pagamento, p.valor, p.data_pagamento, p.status 
-                FROM clientes c
-                LEFT JOIN pagamentos p ON c.id = p.cliente_id
-                WHERE c.usuario_id = ? AND c.id = ?
-                AND p.data_pagamento BETWEEN ? AND ?
-            """
-            cursor.execute(query, (self.usuario_id, cliente_id, data_inicial, data_final))
-            dados_pagamentos = cursor.fetchall()
-
-            if tipo_relatorio in ['Projetos', 'Ambos']:
-                query_projetos = """
-                    SELECT c.id, c.nome, c.email, c.telefone, pr.id, pr.tipo_projeto, pr.valor, pr.data_entrega, pr.recorrente
-                    FROM clientes c
-                    LEFT JOIN projetos pr ON c.id = pr.cliente_id
-                    WHERE c.usuario_id = ? AND c.id = ?
-                    AND pr.data_entrega BETWEEN ? AND ?
-                """
-                cursor.execute(query_projetos, (self.usuario_id, cliente_id, data_inicial, data_final))
-                dados_projetos = cursor.fetchall()
-            else:
-                dados_projetos = []
-
-            conn.close()
-            if tipo_relatorio == 'Ambos':
-                return dados_pagamentos + dados_projetos
-            elif tipo_relatorio == 'Pagamentos':
-                return dados_pagamentos
-            else:
-                return dados_projetos
-        return []
-
-    def show_menu_from_relatorios(self):
-        self.relatorios_frame.pack_forget()
-        self.show_menu()
-
     def show_cadastrar_projeto(self):
-        self.menu_frame.pack_forget()
-        if hasattr(self, 'projetos_frame'):
-            self.projetos_frame.pack_forget()  
+        self.telas.exibir('cadastrar_projeto')
 
+    def construir_cadastrar_projeto(self):
         self.cadastrar_projeto_frame = Frame(self.root)
-        self.cadastrar_projeto_frame.place(relx=0.5, rely=0.5, anchor=CENTER)  
 
         Label(self.cadastrar_projeto_frame, text="Cadastrar Projeto", font=("Arial", 14)).grid(row=0, column=0, columnspan=2, pady=10)
 
         Label(self.cadastrar_projeto_frame, text="Cliente", font=("Arial", 12)).grid(row=1, column=0, sticky=E, pady=5)
         self.projeto_cliente_id_combobox = ttk.Combobox(self.cadastrar_projeto_frame, font=("Arial", 12))
         self.projeto_cliente_id_combobox.grid(row=1, column=1, pady=5)
-        self.carregar_clientes_para_projetos()
+        self.busca_clientes_projeto = self.ligar_busca_clientes(self.projeto_cliente_id_combobox)
 
         Label(self.cadastrar_projeto_frame, text="Nome do Projeto", font=("Arial", 12)).grid(row=2, column=0, sticky=E, pady=5)
         self.projeto_nome_entry = Entry(self.cadastrar_projeto_frame, font=("Arial", 12))
@@ -924,7 +1291,17 @@ class Application:
         Checkbutton(self.cadastrar_projeto_frame, variable=self.projeto_recorrente_var, onvalue=True, offvalue=False).grid(row=6, column=1, pady=5)
 
         Button(self.cadastrar_projeto_frame, text="Salvar", command=self.salvar_projeto, font=("Arial", 12)).grid(row=7, column=0, columnspan=2, pady=10)
-        Button(self.cadastrar_projeto_frame, text="Voltar", command=self.show_menu_from_projeto, font=("Arial", 12)).grid(row=8, column=0, columnspan=2, pady=10)
+        Button(self.cadastrar_projeto_frame, text="Voltar", command=self.show_menu, font=("Arial", 12)).grid(row=8, column=0, columnspan=2, pady=10)
+        return [(self.cadastrar_projeto_frame, 'place', {'relx': 0.5, 'rely': 0.5, 'anchor': CENTER})]
+
+    def limpar_cadastro_projeto(self):
+        self.projeto_cliente_id_combobox.set('')
+        self.projeto_nome_entry.delete(0, END)
+        self.projeto_tipo_combobox.set('')
+        self.projeto_valor_entry.delete(0, END)
+        self.projeto_data_entry.delete(0, END)
+        self.projeto_recorrente_var.set(False)
+        self.busca_clientes_projeto.atualizar()
 
     def mostrar_calendario_projeto(self):
         self.calendario_toplevel = Toplevel(self.root)
@@ -937,18 +1314,9 @@ class Application:
         self.projeto_data_entry.insert(0, self.calendario.get_date())
         self.calendario_toplevel.destroy()
 
-    def carregar_clientes_para_projetos(self):
-        conn = conectar_bd()
-        if conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, nome FROM clientes WHERE usuario_id=?", (self.usuario_id,))
-            clientes = cursor.fetchall()
-            self.projeto_cliente_id_combobox['values'] = [f"{cliente[0]} - {cliente[1]}" for cliente in clientes]
-            conn.close()
-
     def formatar_valor_projeto(self, event):
         try:
-            valor = Decimal(self.projeto_valor_entry.get().replace('R$', '').replace('.', '').replace(',', '.'))
+            valor = texto_para_decimal(self.projeto_valor_entry.get())
             self.projeto_valor_entry.delete(0, END)
             self.projeto_valor_entry.insert(0, locale.currency(valor, grouping=True))
         except InvalidOperation:
@@ -959,36 +1327,31 @@ class Application:
         nome_projeto = self.projeto_nome_entry.get()
         tipo_projeto = self.projeto_tipo_combobox.get()
         try:
-            valor = Decimal(self.projeto_valor_entry.get().replace('R$', '').replace('.', '').replace(',', '.'))
+            valor = texto_para_decimal(self.projeto_valor_entry.get())
         except InvalidOperation:
             messagebox.showerror("Erro", "Valor inválido!")
             return
         data_entrega = self.projeto_data_entry.get()
         recorrente = self.projeto_recorrente_var.get()
-        cadastrar_projeto(cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, self.usuario_id)
-        messagebox.showinfo("Sucesso", "Projeto cadastrado com sucesso!")
-        self.projeto_cliente_id_combobox.set('')
-        self.projeto_nome_entry.delete(0, END)
-        self.projeto_tipo_combobox.set('')
-        self.projeto_valor_entry.delete(0, END)
-        self.projeto_data_entry.delete(0, END)
-        self.projeto_recorrente_var.set(False)
+        self.executor.submeter(cadastrar_projeto, cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, self.usuario_id,
+                               ao_concluir=self.projeto_cadastrado, ao_falhar=self.falha_gravacao)
 
-    def show_menu_from_projeto(self):
-        self.cadastrar_projeto_frame.place_forget()
-        self.show_menu()
+    def projeto_cadastrado(self, _):
+        self.lista_projetos.invalidar()
+        messagebox.showinfo("Sucesso", "Projeto cadastrado com sucesso!")
+        self.limpar_cadastro_projeto()
 
     def editar_projeto(self):
-        selected_item = self.tree.selection()
+        selected_item = self.projetos_tree.selection()
         if not selected_item:
             messagebox.showerror("Erro", "Por favor, selecione um projeto para editar.")
             return
 
-        projeto_id = self.tree.item(selected_item[0], "values")[4]
-        cliente_nome = self.tree.item(selected_item[0], "values")[0]
-        nome_projeto = self.tree.item(selected_item[0], "values")[1]
-        data_entrega = self.tree.item(selected_item[0], "values")[2]
-        recorrente_texto = self.tree.item(selected_item[0], "values")[3]
+        projeto_id = self.projetos_tree.item(selected_item[0], "values")[4]
+        cliente_nome = self.projetos_tree.item(selected_item[0], "values")[0]
+        nome_projeto = self.projetos_tree.item(selected_item[0], "values")[1]
+        data_entrega = self.projetos_tree.item(selected_item[0], "values")[2]
+        recorrente_texto = self.projetos_tree.item(selected_item[0], "values")[3]
 
         if hasattr(self, 'editar_projeto_toplevel') and self.editar_projeto_toplevel.winfo_exists():
             self.editar_projeto_toplevel.focus()
@@ -1034,7 +1397,7 @@ class Application:
 
     def formatar_valor_edicao_projeto(self, event):
         try:
-            valor = Decimal(self.editar_projeto_valor_entry.get().replace('R$', '').replace('.', '').replace(',', '.'))
+            valor = texto_para_decimal(self.editar_projeto_valor_entry.get())
             self.editar_projeto_valor_entry.delete(0, END)
             self.editar_projeto_valor_entry.insert(0, locale.currency(valor, grouping=True))
         except InvalidOperation:
@@ -1044,31 +1407,41 @@ class Application:
         nome_projeto = self.editar_projeto_nome_entry.get()
         tipo_projeto = self.editar_projeto_tipo_combobox.get()
         try:
-            valor = Decimal(self.editar_projeto_valor_entry.get().replace('R$', '').replace('.', '').replace(',', '.'))
+            valor = texto_para_decimal(self.editar_projeto_valor_entry.get())
         except InvalidOperation:
             messagebox.showerror("Erro", "Valor inválido!")
             return
         data_entrega = self.editar_projeto_data_entry.get()
         recorrente = self.editar_projeto_recorrente_var.get()
-        editar_projeto(projeto_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, self.usuario_id)
+        self.executor.submeter(editar_projeto, projeto_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, self.usuario_id,
+                               ao_concluir=lambda _: self.projeto_editado(projeto_id), ao_falhar=self.falha_gravacao)
+
+    def projeto_editado(self, projeto_id):
         messagebox.showinfo("Sucesso", "Projeto editado com sucesso!")
-        self.editar_projeto_toplevel.destroy()  
-        self.mostrar_projetos_cadastrados()  
+        self.editar_projeto_toplevel.destroy()
+        self.lista_projetos.atualizar_linha(projeto_id)
 
     def excluir_projeto(self):
-        selected_item = self.tree.selection()
+        selected_item = self.projetos_tree.selection()
         if not selected_item:
             messagebox.showerror("Erro", "Por favor, selecione um projeto para excluir.")
             return
 
-        projeto_id = self.tree.item(selected_item[0], "values")[4]
+        projeto_id = self.projetos_tree.item(selected_item[0], "values")[4]
         confirmar = messagebox.askyesno("Confirmação", "Tem certeza que deseja excluir este projeto?")
         if confirmar:
-            excluir_projeto(projeto_id, self.usuario_id)
-            self.mostrar_projetos_cadastrados()  
-
-criar_tabelas()
-
-root = Tk()
-app = Application(root)
-root.mainloop()
+            self.executor.submeter(excluir_projeto, projeto_id, self.usuario_id,
+                                   ao_concluir=lambda _: self.lista_projetos.remover_linha(projeto_id))
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    criar_tabelas()
+    podar_alteracoes()
+    iniciar_tarefas_dados()
+
+    root = Tk()
+    app = Application(root)
+    root.mainloop()
+    app.executor.encerrar()
+    app.fila_exportacao.encerrar()
+    bd.fechar_todas()
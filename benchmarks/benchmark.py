@@ -0,0 +1,121 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import servicos
+from servicos import (MotorAlertas, buscar_alertas, carregar_projetos, exportar_csv, exportar_pdf, exportar_xml,
+                      iterar_dados_relatorio, listar_pagamentos_pagina, totais_cliente, verificar_login)
+
+from benchmarks.gerar_dados import SENHA_PADRAO, gerar
+
+TAMANHOS_PADRAO = (10000, 100000, 1000000)
+
+# Período coberto pelos relatórios medidos (todo o intervalo gerado)
+INICIO_RELATORIO = '2024-01-01'
+FIM_RELATORIO = '2026-12-31'
+
+def _cliente_mais_movimentado(usuario_id):
+    return servicos.bd.conexao().execute('''
+        SELECT cliente_id FROM pagamentos WHERE usuario_id = ?
+        GROUP BY cliente_id ORDER BY COUNT(*) DESC LIMIT 1
+    ''', (usuario_id,)).fetchone()[0]
+
+def operacoes(usuario_id, cliente_id, diretorio):
+    def relatorio():
+        return iterar_dados_relatorio(usuario_id, cliente_id, 'Ambos', INICIO_RELATORIO, FIM_RELATORIO)
+
+    def detalhes_pagamentos():
+        listar_pagamentos_pagina(cliente_id, usuario_id)
+        totais_cliente(cliente_id, usuario_id)
+
+    # Cada operação corresponde a um caminho usado pela interface ao abrir uma tela ou exportar
+    return {
+        'verificar_login': lambda: verificar_login('usuario1', SENHA_PADRAO),
+        'verificar_alertas': lambda: buscar_alertas(usuario_id),
+        'motor_alertas_carga': lambda: MotorAlertas(usuario_id).atualizar(),
+        'carregar_projetos': lambda: carregar_projetos(usuario_id),
+        'mostrar_detalhes_pagamentos': detalhes_pagamentos,
+        'carregar_dados_para_relatorio': lambda: list(relatorio()),
+        'exportar_csv': lambda: exportar_csv(relatorio(), os.path.join(diretorio, 'relatorio.csv')),
+        'exportar_xml': lambda: exportar_xml(relatorio(), os.path.join(diretorio, 'relatorio.xml')),
+        'exportar_pdf': lambda: exportar_pdf(relatorio(), os.path.join(diretorio, 'relatorio.pdf')),
+    }
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return {'mediana_s': statistics.median(tempos), 'minimo_s': min(tempos), 'maximo_s': max(tempos), 'repeticoes': repeticoes}
+
+def _versao():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def executar(tamanhos, repeticoes, filtro=None, diretorio_dados=None):
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="benchmark_") as diretorio:
+        diretorio_dados = diretorio_dados or diretorio
+        for tamanho in tamanhos:
+            caminho = os.path.join(diretorio_dados, f"clientes_{tamanho}.db")
+            if not os.path.exists(caminho):
+                inicio = time.perf_counter()
+                gerar(caminho, tamanho)
+                print(f"Banco com {tamanho} pagamentos gerado em {time.perf_counter() - inicio:.1f}s")
+            servicos.bd.caminho = caminho
+            servicos.diretorio_clientes.invalidar()
+            cliente_id = _cliente_mais_movimentado(1)
+            for nome, funcao in operacoes(1, cliente_id, diretorio).items():
+                if filtro and nome not in filtro:
+                    continue
+                funcao()  # aquece caches do SQLite e do sistema de arquivos
+                resultado = medir(funcao, repeticoes)
+                resultados.append({'tamanho': tamanho, 'operacao': nome, **resultado})
+                print(f"{tamanho:>9} {nome:<32} {resultado['mediana_s'] * 1000:10.2f} ms")
+            servicos.bd.fechar_todas()
+    return {
+        'versao': _versao(),
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'resultados': resultados,
+    }
+
+def comparar(atual, anterior):
+    referencia = {(item['tamanho'], item['operacao']): item['mediana_s'] for item in anterior['resultados']}
+    for item in atual['resultados']:
+        antes = referencia.get((item['tamanho'], item['operacao']))
+        if antes:
+            print(f"{item['tamanho']:>9} {item['operacao']:<32} {antes * 1000:10.2f} ms -> {item['mediana_s'] * 1000:10.2f} ms"
+                  f" ({item['mediana_s'] / antes:.2f}x)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede as operações principais em bancos sintéticos de vários tamanhos")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=TAMANHOS_PADRAO, help="quantidades de pagamentos")
+    parser.add_argument('--repeticoes', type=int, default=5)
+    parser.add_argument('--operacoes', nargs='+', help="mede apenas as operações indicadas")
+    parser.add_argument('--dados', help="diretório onde os bancos gerados são guardados e reaproveitados")
+    parser.add_argument('--saida', default='resultados_benchmark.json')
+    parser.add_argument('--comparar', help="arquivo JSON de uma execução anterior")
+    args = parser.parse_args(argv)
+
+    resultado = executar(args.tamanhos, args.repeticoes, args.operacoes, args.dados)
+    with open(args.saida, 'w', encoding='utf-8') as file:
+        json.dump(resultado, file, indent=2)
+    print(f"Resultados gravados em {args.saida}")
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as file:
+            comparar(resultado, json.load(file))
+
+if __name__ == '__main__':
+    main()
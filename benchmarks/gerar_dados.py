@@ -0,0 +1,95 @@
+import argparse
+import os
+import random
+from datetime import date, timedelta
+
+import servicos
+from servicos import STATUS_PAGAMENTO, criar_tabelas, gerar_hash_senha, transacao
+
+NOMES = ('Ana', 'João', 'Maria', 'José', 'Conceição', 'Pedro', 'Paulo', 'Lucas', 'Fernanda', 'Beatriz', 'Rafael', 'Juliana')
+SOBRENOMES = ('Silva', 'Souza', 'Oliveira', 'Santos', 'Pereira', 'Lima', 'Costa', 'Ribeiro', 'Almeida', 'Gomes')
+TIPOS_PAGAMENTO = ('PIX', 'Cartão de Débito', 'Cartão de Crédito', 'Dinheiro')
+TIPOS_PROJETO = ('Website', 'Aplicativo', 'Marketing', 'Consultoria')
+
+# Senha de todos os usuários gerados (usuario1, usuario2, ...)
+SENHA_PADRAO = 'senha123'
+
+# Linhas gravadas por transação
+TAMANHO_LOTE = 10000
+
+# Data de referência fixa, para que a mesma semente gere sempre o mesmo banco
+DATA_BASE = date(2024, 1, 1)
+
+def _data_aleatoria(rnd, dias):
+    return (DATA_BASE + timedelta(days=rnd.randrange(dias))).isoformat()
+
+def _gravar(comando, linhas):
+    lote = []
+    for linha in linhas:
+        lote.append(linha)
+        if len(lote) >= TAMANHO_LOTE:
+            with transacao() as conn:
+                conn.executemany(comando, lote)
+            lote = []
+    if lote:
+        with transacao() as conn:
+            conn.executemany(comando, lote)
+
+def gerar(caminho, pagamentos, usuarios=1, clientes=None, projetos=None, semente=42, dias=3 * 365):
+    # Sem quantidades explícitas, cada cliente fica com ~100 pagamentos e 1 projeto a cada 10 pagamentos
+    clientes = clientes or max(1, pagamentos // 100)
+    projetos = projetos if projetos is not None else pagamentos // 10
+    rnd = random.Random(semente)
+
+    servicos.bd.caminho = caminho
+    criar_tabelas()
+    hash_senha = gerar_hash_senha(SENHA_PADRAO)
+    with transacao() as conn:
+        conn.executemany("INSERT INTO usuarios (id, username, password) VALUES (?, ?, ?)",
+                         [(numero, f"usuario{numero}", hash_senha) for numero in range(1, usuarios + 1)])
+
+    # Os clientes são distribuídos em rodízio entre os usuários
+    def dono(cliente_id):
+        return (cliente_id - 1) % usuarios + 1
+
+    _gravar("INSERT INTO clientes (id, nome, email, telefone, usuario_id) VALUES (?, ?, ?, ?, ?)",
+            ((numero, f"{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {numero}", f"cliente{numero}@exemplo.com.br",
+              f"(11) 9{rnd.randrange(10000):04d}-{rnd.randrange(10000):04d}", dono(numero))
+             for numero in range(1, clientes + 1)))
+
+    def linhas_pagamentos():
+        for _ in range(pagamentos):
+            cliente_id = rnd.randrange(1, clientes + 1)
+            yield (cliente_id, rnd.choice(TIPOS_PAGAMENTO), rnd.randrange(1000, 500000), _data_aleatoria(rnd, dias),
+                   rnd.choice(STATUS_PAGAMENTO), dono(cliente_id))
+    _gravar("INSERT INTO pagamentos (cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id) VALUES (?, ?, ?, ?, ?, ?)",
+            linhas_pagamentos())
+
+    def linhas_projetos():
+        for numero in range(projetos):
+            cliente_id = rnd.randrange(1, clientes + 1)
+            yield (cliente_id, f"Projeto {numero + 1}", rnd.choice(TIPOS_PROJETO), rnd.randrange(50000, 5000000),
+                   _data_aleatoria(rnd, dias), rnd.random() < 0.2, dono(cliente_id))
+    _gravar("INSERT INTO projetos (cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            linhas_projetos())
+
+    servicos.bd.conexao().execute("ANALYZE")
+    servicos.bd.fechar_todas()
+    return {'usuarios': usuarios, 'clientes': clientes, 'pagamentos': pagamentos, 'projetos': projetos}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um banco clientes.db sintético e determinístico")
+    parser.add_argument('saida', help="caminho do banco a criar (não pode existir)")
+    parser.add_argument('--pagamentos', type=int, default=10000)
+    parser.add_argument('--usuarios', type=int, default=1)
+    parser.add_argument('--clientes', type=int)
+    parser.add_argument('--projetos', type=int)
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args(argv)
+    if os.path.exists(args.saida):
+        parser.error(f"o arquivo {args.saida} já existe")
+    quantidades = gerar(args.saida, args.pagamentos, args.usuarios, args.clientes, args.projetos, args.semente)
+    print(", ".join(f"{quantidade} {tabela}" for tabela, quantidade in quantidades.items()))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+import argparse
+import sqlite3
+import sys
+
+import servicos
+from servicos import (EXPORTADORES, IMPORTACOES, buscar_alertas, buscar_painel, buscar_usuario_id, criar_tabelas,
+                      formatar_centavos, formatar_data, gerar_relatorio, gerar_relatorios_lote, importar_csv,
+                      normalizar_data, reconstruir_resumos)
+
+TIPOS_RELATORIO = {'pagamentos': 'Pagamentos', 'projetos': 'Projetos', 'ambos': 'Ambos'}
+
+def _progresso(args, acao):
+    if args.silencioso:
+        return None
+    def exibir(linhas):
+        print(f"\r{acao}... {linhas} linhas", end='', file=sys.stderr, flush=True)
+    return exibir
+
+def _encerrar_progresso(args):
+    if not args.silencioso:
+        print(file=sys.stderr)
+
+def _usuario(args):
+    usuario_id = buscar_usuario_id(args.usuario)
+    if usuario_id is None:
+        raise SystemExit(f"Usuário não encontrado: {args.usuario}")
+    return usuario_id
+
+def comando_exportar(args):
+    total = gerar_relatorio(EXPORTADORES[args.formato], args.saida, _usuario(args), args.cliente,
+                            TIPOS_RELATORIO[args.tipo], normalizar_data(args.inicio), normalizar_data(args.fim),
+                            progresso=_progresso(args, "Exportando"))
+    _encerrar_progresso(args)
+    print(f"{total} linhas exportadas para {args.saida}")
+
+def comando_exportar_lote(args):
+    total, arquivos = gerar_relatorios_lote(args.formato, args.saida, _usuario(args), TIPOS_RELATORIO[args.tipo],
+                                            normalizar_data(args.inicio), normalizar_data(args.fim),
+                                            separar=not args.combinado, progresso=_progresso(args, "Exportando"))
+    _encerrar_progresso(args)
+    print(f"{total} linhas exportadas em {len(arquivos)} arquivo(s) em {args.saida}")
+
+def comando_importar(args):
+    resultado = importar_csv(args.tabela, args.arquivo, _usuario(args),
+                             progresso=_progresso(args, "Importando"))
+    _encerrar_progresso(args)
+    print(f"{resultado.inseridos} linhas importadas, {resultado.rejeitados} rejeitadas.")
+    if resultado.rejeitados:
+        print(f"Linhas rejeitadas gravadas em: {resultado.arquivo_rejeitados}")
+        return 1
+
+def comando_alertas(args):
+    pagamentos, projetos = buscar_alertas(_usuario(args))
+    for nome, tipo, valor, data in pagamentos:
+        print(f"Pagamento\t{formatar_data(data)}\t{nome}\t{tipo}\t{formatar_centavos(valor)}")
+    for nome, projeto, data in projetos:
+        print(f"Entrega\t{formatar_data(data)}\t{nome}\t{projeto}")
+
+def comando_estatisticas(args):
+    painel = buscar_painel(_usuario(args), meses=args.meses)
+    pago, aberto, quantidade = painel['totais']
+    print(f"Pago: {formatar_centavos(pago)}\nEm aberto: {formatar_centavos(aberto)}\nPagamentos: {quantidade}")
+    for mes, pago, aberto, quantidade, projetos in painel['por_mes']:
+        print(f"{mes}\t{formatar_centavos(pago)}\t{formatar_centavos(aberto)}\t{quantidade}\t{formatar_centavos(projetos)}")
+
+def comando_reconstruir_resumos(args):
+    reconstruir_resumos()
+    print("Resumos reconstruídos.")
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Sistema de Gerenciamento de Clientes - linha de comando")
+    parser.add_argument('--banco', default=servicos.DB_PATH, help="caminho do banco SQLite (padrão: %(default)s)")
+    parser.add_argument('--silencioso', action='store_true', help="não exibe o progresso")
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    exportar = subparsers.add_parser('exportar', help="exporta o relatório de um cliente")
+    exportar.add_argument('--usuario', required=True)
+    exportar.add_argument('--cliente', required=True, type=int)
+    exportar.add_argument('--tipo', choices=TIPOS_RELATORIO, default='ambos')
+    exportar.add_argument('--inicio', required=True, help="data inicial (AAAA-MM-DD ou DD/MM/AAAA)")
+    exportar.add_argument('--fim', required=True, help="data final (AAAA-MM-DD ou DD/MM/AAAA)")
+    exportar.add_argument('--formato', choices=EXPORTADORES, default='csv')
+    exportar.add_argument('saida')
+    exportar.set_defaults(funcao=comando_exportar)
+
+    exportar_lote = subparsers.add_parser('exportar-lote', help="exporta o relatório de todos os clientes com movimento no período")
+    exportar_lote.add_argument('--usuario', required=True)
+    exportar_lote.add_argument('--tipo', choices=TIPOS_RELATORIO, default='ambos')
+    exportar_lote.add_argument('--inicio', required=True, help="data inicial (AAAA-MM-DD ou DD/MM/AAAA)")
+    exportar_lote.add_argument('--fim', required=True, help="data final (AAAA-MM-DD ou DD/MM/AAAA)")
+    exportar_lote.add_argument('--formato', choices=EXPORTADORES, default='csv')
+    exportar_lote.add_argument('--combinado', action='store_true', help="grava um arquivo só em vez de um por cliente")
+    exportar_lote.add_argument('saida', help="diretório dos arquivos por cliente, ou o arquivo com --combinado")
+    exportar_lote.set_defaults(funcao=comando_exportar_lote)
+
+    importar = subparsers.add_parser('importar', help="importa clientes, pagamentos ou projetos de um CSV")
+    importar.add_argument('--usuario', required=True)
+    importar.add_argument('--tabela', choices=IMPORTACOES, required=True)
+    importar.add_argument('arquivo')
+    importar.set_defaults(funcao=comando_importar)
+
+    alertas = subparsers.add_parser('alertas', help="lista pagamentos e entregas próximos")
+    alertas.add_argument('--usuario', required=True)
+    alertas.set_defaults(funcao=comando_alertas)
+
+    estatisticas = subparsers.add_parser('estatisticas', help="exibe os totais do usuário")
+    estatisticas.add_argument('--usuario', required=True)
+    estatisticas.add_argument('--meses', type=int, default=servicos.MESES_PAINEL)
+    estatisticas.set_defaults(funcao=comando_estatisticas)
+
+    reconstruir = subparsers.add_parser('reconstruir-resumos', help="recalcula as tabelas de resumo")
+    reconstruir.set_defaults(funcao=comando_reconstruir_resumos)
+    return parser
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    servicos.bd.caminho = args.banco
+    try:
+        criar_tabelas()
+        return args.funcao(args) or 0
+    except (ValueError, OSError, sqlite3.Error) as erro:
+        print(f"Erro: {erro}", file=sys.stderr)
+        return 1
+    finally:
+        servicos.bd.fechar_todas()
+
+if __name__ == '__main__':
+    sys.exit(main())
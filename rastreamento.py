@@ -0,0 +1,286 @@
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+from itertools import chain
+from time import perf_counter
+
+# Ativa a instrumentação das conexões (CLIENTES_RASTREAR=1)
+RASTREAR = os.environ.get('CLIENTES_RASTREAR', '') not in ('', '0')
+
+# Duração, em milissegundos, a partir da qual uma instrução é gravada no log de consultas lentas
+LIMITE_LENTA_MS = float(os.environ.get('CLIENTES_LIMITE_LENTA_MS', 100))
+
+# Arquivo JSON Lines com as consultas lentas
+LOG_LENTAS = os.environ.get('CLIENTES_LOG_LENTAS', 'consultas_lentas.jsonl')
+
+# Arquivo onde o resumo por instrução é gravado ao encerrar o processo (vazio: não grava)
+ARQUIVO_ESTATISTICAS = os.environ.get('CLIENTES_ESTATISTICAS_CONSULTAS', '')
+
+# Limites superiores, em milissegundos, das faixas do histograma de latência
+FAIXAS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+# Instruções da máquina virtual do SQLite entre duas chamadas do progress handler
+PASSOS_PROGRESSO = 1000
+
+# Funções públicas registradas como origem de cada instrução lenta
+PROFUNDIDADE_PILHA = 4
+
+# Módulos que nunca são apontados como origem de uma consulta
+MODULOS_IGNORADOS = {__name__, 'contextlib', 'heapq', 'sqlite3', 'threading', 'concurrent.futures.thread'}
+
+# Funções de infraestrutura que abrem conexões e transações em nome de quem as chamou
+FUNCOES_IGNORADAS = {'GerenciadorConexao.conexao', 'GerenciadorConexao.transacao'}
+
+def _normalizar_sql(sql):
+    return re.sub(r'\s+', ' ', sql).strip()
+
+def _pilha(frame):
+    # Pula funções privadas, lambdas e geradores internos: o que interessa é
+    # a função de negócio (carregar_projetos, iterar_dados_relatorio...).
+    pilha = []
+    while frame is not None and len(pilha) < PROFUNDIDADE_PILHA:
+        codigo = frame.f_code
+        nome = getattr(codigo, 'co_qualname', codigo.co_name)
+        if (frame.f_globals.get('__name__') not in MODULOS_IGNORADOS
+                and not codigo.co_name.startswith(('_', '<')) and nome not in FUNCOES_IGNORADAS):
+            pilha.append(nome)
+        frame = frame.f_back
+    return pilha
+
+class EstatisticasConsultas:
+    def __init__(self):
+        self._instrucoes = {}
+        self._trava = threading.Lock()
+
+    def registrar(self, medicao):
+        sql = _normalizar_sql(medicao.sql)
+        duracao_ms = medicao.duracao * 1000
+        with self._trava:
+            item = self._instrucoes.get(sql)
+            if item is None:
+                item = self._instrucoes[sql] = {
+                    'chamadas': 0, 'total_ms': 0.0, 'maximo_ms': 0.0, 'linhas': 0, 'passos': 0,
+                    'faixas': [0] * (len(FAIXAS_MS) + 1), 'chamadores': Counter(),
+                }
+            item['chamadas'] += 1
+            item['total_ms'] += duracao_ms
+            item['maximo_ms'] = max(item['maximo_ms'], duracao_ms)
+            item['linhas'] += medicao.linhas
+            item['passos'] += medicao.passos
+            item['faixas'][bisect_left(FAIXAS_MS, duracao_ms)] += 1
+            item['chamadores'][medicao.pilha[0] if medicao.pilha else '?'] += 1
+
+    def _percentil(self, faixas, chamadas, fracao):
+        # Aproximado pelo limite superior da faixa do histograma
+        alvo = chamadas * fracao
+        acumulado = 0
+        for limite, quantidade in zip(FAIXAS_MS + (None,), faixas):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return limite
+        return None
+
+    def resumo(self):
+        with self._trava:
+            itens = [(sql, dict(item, faixas=list(item['faixas']), chamadores=dict(item['chamadores'])))
+                     for sql, item in self._instrucoes.items()]
+        resultado = []
+        for sql, item in sorted(itens, key=lambda par: par[1]['total_ms'], reverse=True):
+            resultado.append({
+                'sql': sql,
+                **item,
+                'media_ms': item['total_ms'] / item['chamadas'],
+                'p50_ms': self._percentil(item['faixas'], item['chamadas'], 0.5),
+                'p95_ms': self._percentil(item['faixas'], item['chamadas'], 0.95),
+                'limites_faixas_ms': list(FAIXAS_MS),
+            })
+        return resultado
+
+    def limpar(self):
+        with self._trava:
+            self._instrucoes.clear()
+
+    def gravar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as file:
+            json.dump(self.resumo(), file, indent=2, ensure_ascii=False)
+
+estatisticas_consultas = EstatisticasConsultas()
+
+class LogConsultasLentas:
+    def __init__(self, caminho=LOG_LENTAS, limite_ms=LIMITE_LENTA_MS):
+        self.caminho = caminho
+        self.limite_ms = limite_ms
+        self._trava = threading.Lock()
+
+    def registrar(self, conn, medicao):
+        duracao_ms = medicao.duracao * 1000
+        if duracao_ms < self.limite_ms:
+            return
+        registro = {
+            'quando': datetime.now().isoformat(timespec='milliseconds'),
+            'duracao_ms': round(duracao_ms, 3),
+            'sql': _normalizar_sql(medicao.sql),
+            'linhas': medicao.linhas,
+            'passos': medicao.passos,
+            'instrucoes': medicao.instrucoes,
+            'chamador': medicao.pilha[0] if medicao.pilha else None,
+            'pilha': medicao.pilha,
+            'thread': threading.current_thread().name,
+            'plano': conn.plano(medicao.sql, medicao.parametros),
+        }
+        linha = json.dumps(registro, ensure_ascii=False)
+        with self._trava:
+            with open(self.caminho, 'a', encoding='utf-8') as file:
+                file.write(linha + '\n')
+
+log_consultas_lentas = LogConsultasLentas()
+
+class Medicao:
+    __slots__ = ('sql', 'parametros', 'pilha', 'duracao', 'linhas', 'passos', 'instrucoes')
+
+    def __init__(self, sql, parametros, pilha):
+        self.sql = sql
+        self.parametros = parametros
+        self.pilha = pilha
+        self.duracao = 0.0
+        self.linhas = 0
+        self.passos = 0
+        self.instrucoes = 0
+
+class CursorRastreado(sqlite3.Cursor):
+    # O tempo de uma consulta inclui a execução e todas as buscas de linhas;
+    # a medição termina quando o cursor se esgota, é reutilizado ou descartado.
+    _medicao = None
+
+    def _medir(self, funcao, *args):
+        conn = self.connection
+        passos, instrucoes = conn.passos, conn.instrucoes
+        inicio = perf_counter()
+        try:
+            return funcao(*args)
+        finally:
+            medicao = self._medicao
+            if medicao is not None:
+                medicao.duracao += perf_counter() - inicio
+                medicao.passos += conn.passos - passos
+                medicao.instrucoes += conn.instrucoes - instrucoes
+
+    def _concluir(self):
+        medicao = self._medicao
+        if medicao is None:
+            return
+        self._medicao = None
+        if not medicao.linhas and self.rowcount > 0:
+            medicao.linhas = self.rowcount
+        estatisticas_consultas.registrar(medicao)
+        log_consultas_lentas.registrar(self.connection, medicao)
+
+    def execute(self, sql, parametros=()):
+        self._concluir()
+        self._medicao = Medicao(sql, parametros, _pilha(sys._getframe(1)))
+        return self._medir(super().execute, sql, parametros)
+
+    def executemany(self, sql, parametros):
+        self._concluir()
+        # Os parâmetros podem ser um gerador: o primeiro conjunto é lido à parte
+        # para o EXPLAIN do log de lentas e devolvido à frente dos demais.
+        parametros = iter(parametros)
+        primeiro = next(parametros, None)
+        if primeiro is not None:
+            parametros = chain([primeiro], parametros)
+        self._medicao = Medicao(sql, primeiro, _pilha(sys._getframe(1)))
+        resultado = self._medir(super().executemany, sql, parametros)
+        self._concluir()
+        return resultado
+
+    def fetchone(self):
+        linha = self._medir(super().fetchone)
+        if linha is None:
+            self._concluir()
+        elif self._medicao is not None:
+            self._medicao.linhas += 1
+        return linha
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        linhas = self._medir(super().fetchmany, size)
+        if self._medicao is not None:
+            self._medicao.linhas += len(linhas)
+        if len(linhas) < size:
+            self._concluir()
+        return linhas
+
+    def fetchall(self):
+        linhas = self._medir(super().fetchall)
+        if self._medicao is not None:
+            self._medicao.linhas += len(linhas)
+        self._concluir()
+        return linhas
+
+    def __next__(self):
+        try:
+            linha = self._medir(super().__next__)
+        except StopIteration:
+            self._concluir()
+            raise
+        if self._medicao is not None:
+            self._medicao.linhas += 1
+        return linha
+
+    def close(self):
+        self._concluir()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._concluir()
+        except Exception:
+            pass
+
+class ConexaoRastreada(sqlite3.Connection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.passos = 0
+        self.instrucoes = 0
+        self._planos = {}
+        # O progress handler conta o trabalho da máquina virtual e o trace
+        # callback conta as instruções iniciadas, inclusive as dos gatilhos.
+        self.set_progress_handler(self._progresso, PASSOS_PROGRESSO)
+        self.set_trace_callback(self._rastrear)
+
+    def _progresso(self):
+        self.passos += PASSOS_PROGRESSO
+        return 0
+
+    def _rastrear(self, sql):
+        self.instrucoes += 1
+
+    def cursor(self, factory=CursorRastreado):
+        return super().cursor(factory)
+
+    # Connection.execute não passa por cursor(); os atalhos são refeitos aqui
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+    def plano(self, sql, parametros):
+        # Um plano por instrução basta: o texto da consulta não muda entre chamadas
+        chave = _normalizar_sql(sql)
+        if chave not in self._planos:
+            if not re.match(r'\s*(WITH|SELECT|INSERT|UPDATE|DELETE|REPLACE)\b', sql, re.IGNORECASE):
+                self._planos[chave] = None
+            else:
+                try:
+                    cursor = sqlite3.Cursor(self)
+                    self._planos[chave] = [linha[3] for linha in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", parametros or ())]
+                except sqlite3.Error as error:
+                    self._planos[chave] = [f"plano indisponível: {error}"]
+        return self._planos[chave]
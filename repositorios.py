@@ -0,0 +1,291 @@
+from abc import ABC, abstractmethod
+
+sa = None
+
+def _importar_sqlalchemy():
+    # SQLAlchemy é opcional e só é importado quando o repositório dele é usado
+    global sa
+    if sa is None:
+        try:
+            import sqlalchemy
+        except ImportError:
+            raise ImportError("O repositório SQLAlchemy requer o pacote SQLAlchemy instalado.")
+        sa = sqlalchemy
+    return sa
+
+# Tabelas e colunas que aceitam inserção em lote
+COLUNAS_LOTE = {
+    'clientes': ('nome', 'email', 'telefone', 'usuario_id'),
+    'pagamentos': ('cliente_id', 'tipo_pagamento', 'valor', 'data_pagamento', 'status', 'usuario_id'),
+    'projetos': ('cliente_id', 'nome_projeto', 'tipo_projeto', 'valor', 'data_entrega', 'recorrente', 'usuario_id'),
+}
+
+# registro_id das marcas de alteração gravadas por lote: o consumidor recarrega a tabela inteira
+REGISTRO_LOTE = 0
+
+# Na inserção em lote, uma linha em lotes_importacao (que só existe dentro da
+# transação) suspende os gatilhos de resumos e alterações de cada linha; os
+# resumos e o log de alterações são atualizados uma vez a partir dos ids novos.
+SUSPENDER_GATILHOS = "INSERT INTO lotes_importacao (ativo) VALUES (1)"
+REATIVAR_GATILHOS = "DELETE FROM lotes_importacao"
+
+ATUALIZACOES_LOTE = {
+    'clientes': [
+        f"INSERT INTO alteracoes (tabela, registro_id, usuario_id) SELECT DISTINCT 'clientes', {REGISTRO_LOTE}, usuario_id FROM clientes WHERE id > ?",
+    ],
+    'pagamentos': [
+        '''INSERT INTO resumo_pagamentos (usuario_id, cliente_id, mes, status, quantidade, total)
+           SELECT usuario_id, cliente_id, substr(data_pagamento, 1, 7), status, COUNT(*), SUM(valor)
+           FROM pagamentos WHERE id > ?
+           GROUP BY usuario_id, cliente_id, substr(data_pagamento, 1, 7), status
+           ON CONFLICT (usuario_id, cliente_id, mes, status)
+           DO UPDATE SET quantidade = quantidade + excluded.quantidade, total = total + excluded.total''',
+        f"INSERT INTO alteracoes (tabela, registro_id, usuario_id) SELECT DISTINCT 'pagamentos', {REGISTRO_LOTE}, usuario_id FROM pagamentos WHERE id > ?",
+    ],
+    'projetos': [
+        '''INSERT INTO resumo_projetos (usuario_id, mes, quantidade, total)
+           SELECT usuario_id, substr(data_entrega, 1, 7), COUNT(*), SUM(valor)
+           FROM projetos WHERE id > ?
+           GROUP BY usuario_id, substr(data_entrega, 1, 7)
+           ON CONFLICT (usuario_id, mes)
+           DO UPDATE SET quantidade = quantidade + excluded.quantidade, total = total + excluded.total''',
+        f"INSERT INTO alteracoes (tabela, registro_id, usuario_id) SELECT DISTINCT 'projetos', {REGISTRO_LOTE}, usuario_id FROM projetos WHERE id > ?",
+    ],
+}
+
+class Repositorio(ABC):
+    # Valores chegam já normalizados: datas em ISO e valores em centavos. Um
+    # repositório que não implemente todos os métodos falha já ao ser criado.
+
+    @abstractmethod
+    def buscar_usuario(self, username):
+        pass
+
+    @abstractmethod
+    def inserir_usuario(self, username, hash_senha):
+        pass
+
+    @abstractmethod
+    def atualizar_senha(self, usuario_id, hash_senha):
+        pass
+
+    @abstractmethod
+    def inserir_cliente(self, nome, email, telefone, usuario_id):
+        pass
+
+    @abstractmethod
+    def atualizar_cliente(self, cliente_id, nome, email, telefone, usuario_id):
+        pass
+
+    @abstractmethod
+    def excluir_cliente(self, cliente_id, usuario_id):
+        pass
+
+    @abstractmethod
+    def inserir_pagamento(self, cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
+        pass
+
+    @abstractmethod
+    def atualizar_pagamento(self, pagamento_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
+        pass
+
+    @abstractmethod
+    def excluir_pagamento(self, pagamento_id, usuario_id):
+        pass
+
+    @abstractmethod
+    def inserir_projeto(self, cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
+        pass
+
+    @abstractmethod
+    def atualizar_projeto(self, projeto_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
+        pass
+
+    @abstractmethod
+    def excluir_projeto(self, projeto_id, usuario_id):
+        pass
+
+    @abstractmethod
+    def inserir_em_lote(self, tabela, linhas):
+        pass
+
+    def fechar(self):
+        pass
+
+class RepositorioSQLite(Repositorio):
+    def __init__(self, gerenciador):
+        self.bd = gerenciador
+
+    def buscar_usuario(self, username):
+        return self.bd.conexao().execute("SELECT id, password FROM usuarios WHERE username=?", (username,)).fetchone()
+
+    def inserir_usuario(self, username, hash_senha):
+        with self.bd.transacao() as conn:
+            conn.execute("INSERT INTO usuarios (username, password) VALUES (?, ?)", (username, hash_senha))
+
+    def atualizar_senha(self, usuario_id, hash_senha):
+        with self.bd.transacao() as conn:
+            conn.execute("UPDATE usuarios SET password=? WHERE id=?", (hash_senha, usuario_id))
+
+    def inserir_cliente(self, nome, email, telefone, usuario_id):
+        with self.bd.transacao() as conn:
+            conn.execute("INSERT INTO clientes (nome, email, telefone, usuario_id) VALUES (?, ?, ?, ?)", (nome, email, telefone, usuario_id))
+
+    def atualizar_cliente(self, cliente_id, nome, email, telefone, usuario_id):
+        with self.bd.transacao() as conn:
+            conn.execute('''UPDATE clientes SET nome=?, email=?, telefone=? WHERE id=? AND usuario_id=?''',
+                         (nome, email, telefone, cliente_id, usuario_id))
+
+    def excluir_cliente(self, cliente_id, usuario_id):
+        with self.bd.transacao() as conn:
+            conn.execute("DELETE FROM pagamentos WHERE cliente_id=? AND usuario_id=?", (cliente_id, usuario_id))
+            conn.execute("DELETE FROM projetos WHERE cliente_id=? AND usuario_id=?", (cliente_id, usuario_id))
+            conn.execute("DELETE FROM clientes WHERE id=? AND usuario_id=?", (cliente_id, usuario_id))
+
+    def inserir_pagamento(self, cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
+        with self.bd.transacao() as conn:
+            conn.execute('''INSERT INTO pagamentos (cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id)
+                            VALUES (?, ?, ?, ?, ?, ?)''', (cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id))
+
+    def atualizar_pagamento(self, pagamento_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
+        with self.bd.transacao() as conn:
+            conn.execute('''UPDATE pagamentos SET tipo_pagamento=?, valor=?, data_pagamento=?, status=?
+                            WHERE id=? AND usuario_id=?''', (tipo_pagamento, valor, data_pagamento, status, pagamento_id, usuario_id))
+
+    def excluir_pagamento(self, pagamento_id, usuario_id):
+        with self.bd.transacao() as conn:
+            conn.execute("DELETE FROM pagamentos WHERE id=? AND usuario_id=?", (pagamento_id, usuario_id))
+
+    def inserir_projeto(self, cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
+        with self.bd.transacao() as conn:
+            conn.execute('''INSERT INTO projetos (cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)''', (cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id))
+
+    def atualizar_projeto(self, projeto_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
+        with self.bd.transacao() as conn:
+            conn.execute('''UPDATE projetos SET nome_projeto=?, tipo_projeto=?, valor=?, data_entrega=?, recorrente=?
+                            WHERE id=? AND usuario_id=?''', (nome_projeto, tipo_projeto, valor, data_entrega, recorrente, projeto_id, usuario_id))
+
+    def excluir_projeto(self, projeto_id, usuario_id):
+        with self.bd.transacao() as conn:
+            conn.execute("DELETE FROM projetos WHERE id=? AND usuario_id=?", (projeto_id, usuario_id))
+
+    def inserir_em_lote(self, tabela, linhas):
+        colunas = COLUNAS_LOTE[tabela]
+        comando = f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})"
+        with self.bd.transacao() as conn:
+            conn.execute(SUSPENDER_GATILHOS)
+            ultimo_id = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}").fetchone()[0]
+            conn.executemany(comando, linhas)
+            conn.execute(REATIVAR_GATILHOS)
+            for atualizacao in ATUALIZACOES_LOTE[tabela]:
+                conn.execute(atualizacao, (ultimo_id,))
+
+class RepositorioSQLAlchemy(Repositorio):
+    def __init__(self, url):
+        _importar_sqlalchemy()
+        self.engine = sa.create_engine(url, pool_pre_ping=True)
+
+        metadata = sa.MetaData()
+        self.usuarios = sa.Table('usuarios', metadata,
+                                 sa.Column('id', sa.Integer, primary_key=True),
+                                 sa.Column('username', sa.Text, nullable=False, unique=True),
+                                 sa.Column('password', sa.Text, nullable=False))
+        self.clientes = sa.Table('clientes', metadata,
+                                 sa.Column('id', sa.Integer, primary_key=True),
+                                 sa.Column('nome', sa.Text, nullable=False),
+                                 sa.Column('email', sa.Text),
+                                 sa.Column('telefone', sa.Text),
+                                 sa.Column('usuario_id', sa.Integer, sa.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False))
+        self.pagamentos = sa.Table('pagamentos', metadata,
+                                   sa.Column('id', sa.Integer, primary_key=True),
+                                   sa.Column('cliente_id', sa.Integer, sa.ForeignKey('clientes.id', ondelete='CASCADE'), nullable=False),
+                                   sa.Column('tipo_pagamento', sa.Text, nullable=False),
+                                   sa.Column('valor', sa.Integer, nullable=False),
+                                   sa.Column('data_pagamento', sa.Text, nullable=False),
+                                   sa.Column('status', sa.Text, nullable=False),
+                                   sa.Column('usuario_id', sa.Integer, sa.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False))
+        self.projetos = sa.Table('projetos', metadata,
+                                 sa.Column('id', sa.Integer, primary_key=True),
+                                 sa.Column('cliente_id', sa.Integer, sa.ForeignKey('clientes.id', ondelete='CASCADE'), nullable=False),
+                                 sa.Column('nome_projeto', sa.Text, nullable=False),
+                                 sa.Column('tipo_projeto', sa.Text, nullable=False),
+                                 sa.Column('valor', sa.Integer, nullable=False),
+                                 sa.Column('data_entrega', sa.Text, nullable=False),
+                                 sa.Column('recorrente', sa.Boolean, nullable=False, default=False),
+                                 sa.Column('usuario_id', sa.Integer, sa.ForeignKey('usuarios.id', ondelete='CASCADE'), nullable=False))
+
+    def buscar_usuario(self, username):
+        with self.engine.connect() as conn:
+            return conn.execute(sa.select(self.usuarios.c.id, self.usuarios.c.password)
+                                .where(self.usuarios.c.username == username)).first()
+
+    def inserir_usuario(self, username, hash_senha):
+        with self.engine.begin() as conn:
+            conn.execute(sa.insert(self.usuarios).values(username=username, password=hash_senha))
+
+    def atualizar_senha(self, usuario_id, hash_senha):
+        with self.engine.begin() as conn:
+            conn.execute(sa.update(self.usuarios).where(self.usuarios.c.id == usuario_id).values(password=hash_senha))
+
+    def inserir_cliente(self, nome, email, telefone, usuario_id):
+        with self.engine.begin() as conn:
+            conn.execute(sa.insert(self.clientes).values(nome=nome, email=email, telefone=telefone, usuario_id=usuario_id))
+
+    def atualizar_cliente(self, cliente_id, nome, email, telefone, usuario_id):
+        with self.engine.begin() as conn:
+            conn.execute(sa.update(self.clientes)
+                         .where(self.clientes.c.id == cliente_id, self.clientes.c.usuario_id == usuario_id)
+                         .values(nome=nome, email=email, telefone=telefone))
+
+    def excluir_cliente(self, cliente_id, usuario_id):
+        with self.engine.begin() as conn:
+            for tabela in (self.pagamentos, self.projetos):
+                conn.execute(sa.delete(tabela).where(tabela.c.cliente_id == cliente_id, tabela.c.usuario_id == usuario_id))
+            conn.execute(sa.delete(self.clientes).where(self.clientes.c.id == cliente_id, self.clientes.c.usuario_id == usuario_id))
+
+    def inserir_pagamento(self, cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
+        with self.engine.begin() as conn:
+            conn.execute(sa.insert(self.pagamentos).values(cliente_id=cliente_id, tipo_pagamento=tipo_pagamento, valor=valor,
+                                                           data_pagamento=data_pagamento, status=status, usuario_id=usuario_id))
+
+    def atualizar_pagamento(self, pagamento_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
+        with self.engine.begin() as conn:
+            conn.execute(sa.update(self.pagamentos)
+                         .where(self.pagamentos.c.id == pagamento_id, self.pagamentos.c.usuario_id == usuario_id)
+                         .values(tipo_pagamento=tipo_pagamento, valor=valor, data_pagamento=data_pagamento, status=status))
+
+    def excluir_pagamento(self, pagamento_id, usuario_id):
+        with self.engine.begin() as conn:
+            conn.execute(sa.delete(self.pagamentos).where(self.pagamentos.c.id == pagamento_id, self.pagamentos.c.usuario_id == usuario_id))
+
+    def inserir_projeto(self, cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
+        with self.engine.begin() as conn:
+            conn.execute(sa.insert(self.projetos).values(cliente_id=cliente_id, nome_projeto=nome_projeto, tipo_projeto=tipo_projeto,
+                                                         valor=valor, data_entrega=data_entrega, recorrente=bool(recorrente),
+                                                         usuario_id=usuario_id))
+
+    def atualizar_projeto(self, projeto_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
+        with self.engine.begin() as conn:
+            conn.execute(sa.update(self.projetos)
+                         .where(self.projetos.c.id == projeto_id, self.projetos.c.usuario_id == usuario_id)
+                         .values(nome_projeto=nome_projeto, tipo_projeto=tipo_projeto, valor=valor,
+                                 data_entrega=data_entrega, recorrente=bool(recorrente)))
+
+    def excluir_projeto(self, projeto_id, usuario_id):
+        with self.engine.begin() as conn:
+            conn.execute(sa.delete(self.projetos).where(self.projetos.c.id == projeto_id, self.projetos.c.usuario_id == usuario_id))
+
+    def inserir_em_lote(self, tabela, linhas):
+        # Uma lista de dicionários vira um único executemany no driver
+        colunas = COLUNAS_LOTE[tabela]
+        with self.engine.begin() as conn:
+            conn.execute(sa.text(SUSPENDER_GATILHOS))
+            ultimo_id = conn.execute(sa.text(f"SELECT COALESCE(MAX(id), 0) FROM {tabela}")).scalar()
+            conn.execute(sa.insert(getattr(self, tabela)), [dict(zip(colunas, linha)) for linha in linhas])
+            conn.execute(sa.text(REATIVAR_GATILHOS))
+            for atualizacao in ATUALIZACOES_LOTE[tabela]:
+                conn.execute(sa.text(atualizacao.replace('?', ':ultimo_id')), {'ultimo_id': ultimo_id})
+
+    def fechar(self):
+        self.engine.dispose()
@@ -0,0 +1,1964 @@
+import atexit
+import multiprocessing
+import os
+import pickle
+import queue
+import re
+import sqlite3
+import threading
+import shutil
+import weakref
+import tempfile
+from contextlib import contextmanager
+from functools import partial
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+import csv
+import io
+import logging
+from itertools import chain, groupby, islice
+from operator import itemgetter
+from xml.sax.saxutils import XMLGenerator
+from fpdf import FPDF
+from datetime import date, datetime, timedelta
+from bisect import bisect_left, bisect_right
+from calendar import monthrange
+from math import ceil
+from heapq import merge
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import bcrypt
+
+from repositorios import REGISTRO_LOTE, RepositorioSQLAlchemy, RepositorioSQLite
+from rastreamento import ARQUIVO_ESTATISTICAS, RASTREAR, ConexaoRastreada, estatisticas_consultas
+
+# Caminho do banco de dados local SQLite
+DB_PATH = 'clientes.db'
+
+# Quantidade de instruções preparadas mantidas em cache por conexão
+CACHE_INSTRUCOES = 256
+
+# Mensagens de diagnóstico vão para o logging (stderr), nunca para a saída da CLI
+registro = logging.getLogger(__name__)
+
+class _FimThread:
+    pass
+
+class GerenciadorConexao:
+    def __init__(self, caminho, cache_instrucoes=CACHE_INSTRUCOES, rastrear=RASTREAR):
+        self.caminho = caminho
+        self.cache_instrucoes = cache_instrucoes
+        self.rastrear = rastrear
+        self._local = threading.local()
+        self._conexoes = []
+        self._trava = threading.Lock()
+
+    def conexao(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None deixa o controle de transações com transacao()
+            conn = sqlite3.connect(self.caminho, cached_statements=self.cache_instrucoes,
+                                   isolation_level=None, check_same_thread=False, timeout=30,
+                                   factory=ConexaoRastreada if self.rastrear else sqlite3.Connection)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._local.conn = conn
+            self._local.profundidade = 0
+            # O marcador some junto com os dados locais quando a thread termina,
+            # e a conexão é fechada nesse momento.
+            self._local.fim_thread = _FimThread()
+            self._local.descartar = weakref.finalize(self._local.fim_thread, self._descartar, conn)
+            with self._trava:
+                self._conexoes.append(conn)
+            registro.debug("Conexão ao banco de dados SQLite aberta (%s).", threading.current_thread().name)
+        return conn
+
+    @contextmanager
+    def transacao(self):
+        conn = self.conexao()
+        profundidade = self._local.profundidade
+        if profundidade == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        else:
+            conn.execute(f"SAVEPOINT sp_{profundidade}")
+        self._local.profundidade = profundidade + 1
+        try:
+            yield conn
+        except BaseException:
+            if profundidade == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO sp_{profundidade}")
+                conn.execute(f"RELEASE sp_{profundidade}")
+            raise
+        else:
+            if profundidade == 0:
+                conn.execute("COMMIT")
+            else:
+                conn.execute(f"RELEASE sp_{profundidade}")
+        finally:
+            self._local.profundidade = profundidade
+
+    def _descartar(self, conn):
+        with self._trava:
+            if conn in self._conexoes:
+                self._conexoes.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.ProgrammingError:
+            pass
+
+    def fechar(self):
+        if getattr(self._local, 'conn', None) is not None:
+            self._local.descartar()
+            self._local.conn = None
+
+    def fechar_todas(self):
+        with self._trava:
+            conexoes, self._conexoes = self._conexoes, []
+        for conn in conexoes:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                pass
+        self._local = threading.local()
+
+bd = GerenciadorConexao(DB_PATH)
+transacao = bd.transacao
+
+if RASTREAR and ARQUIVO_ESTATISTICAS:
+    atexit.register(estatisticas_consultas.gravar, ARQUIVO_ESTATISTICAS)
+
+# Implementação de armazenamento usada nas gravações: 'sqlite' ou 'sqlalchemy'
+REPOSITORIO = os.environ.get('CLIENTES_REPOSITORIO', 'sqlite')
+
+# URL do banco para o repositório SQLAlchemy; o padrão é o mesmo arquivo SQLite
+DB_URL = os.environ.get('CLIENTES_DB_URL')
+
+_repositorio = None
+_trava_repositorio = threading.Lock()
+
+def _arquivo_sqlite(url):
+    encontrado = re.match(r'sqlite(\+\w+)?:///([^?]*)', url)
+    return os.path.abspath(encontrado.group(2)) if encontrado and encontrado.group(2) else None
+
+def obter_repositorio():
+    """Repositório usado nas gravações de usuários, clientes, pagamentos e projetos.
+
+    Só as gravações passam pelo repositório: consultas, relatórios, busca (FTS),
+    resumos, alertas, versao_banco e o login leem direto o arquivo SQLite de bd,
+    e os gatilhos que mantêm FTS, resumos e alterações existem só nele. Por isso
+    o repositório SQLAlchemy também precisa apontar para esse mesmo arquivo;
+    qualquer outro banco é recusado, em vez de dividir os dados em dois lugares.
+    """
+    global _repositorio
+    with _trava_repositorio:
+        if _repositorio is None:
+            if REPOSITORIO == 'sqlalchemy':
+                url = DB_URL or f"sqlite:///{bd.caminho}"
+                if _arquivo_sqlite(url) != os.path.abspath(bd.caminho):
+                    raise ValueError(f"CLIENTES_DB_URL deve apontar para o arquivo SQLite usado pelo sistema ({bd.caminho}).")
+                _repositorio = RepositorioSQLAlchemy(url)
+            elif REPOSITORIO == 'sqlite':
+                _repositorio = RepositorioSQLite(bd)
+            else:
+                raise ValueError(f"Repositório desconhecido: {REPOSITORIO!r}")
+        return _repositorio
+
+def avisar_erro(titulo, mensagem):
+    registro.error("%s: %s", titulo, mensagem)
+
+def conectar_bd():
+    # Fora da thread principal o erro sobe para quem chamou; na principal,
+    # a interface substitui avisar_erro para exibir a mensagem ao usuário.
+    try:
+        return bd.conexao()
+    except Exception as error:
+        registro.error("Erro ao conectar ao banco de dados: %s", error)
+        if threading.current_thread() is not threading.main_thread():
+            raise
+        avisar_erro("Erro", f"Erro ao conectar ao banco de dados: {error}")
+        return None
+
+# Quantidade de linhas buscadas por página nas listas paginadas
+TAMANHO_PAGINA = 200
+
+def versao_banco():
+    # PRAGMA data_version muda quando outra conexão grava no banco; as
+    # gravações feitas pela conexão da própria thread não alteram o valor.
+    conn = bd.conexao()
+    return (id(conn), conn.execute("PRAGMA data_version").fetchone()[0])
+
+class DiretorioClientes:
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._clientes = {}
+        self._ids = {}
+        self._versoes = threading.local()
+
+    def _verificar_versao(self):
+        # A versão é lida antes dos dados; na primeira chamada de cada thread não
+        # há versão anterior para comparar, então o cache de outras threads é descartado.
+        versao = versao_banco()
+        if getattr(self._versoes, 'atual', None) != versao:
+            self.invalidar()
+            self._versoes.atual = versao
+        return versao
+
+    def _carregar(self, usuario_id):
+        versao = self._verificar_versao()
+        with self._trava:
+            clientes = self._clientes.get(usuario_id)
+            if clientes is not None:
+                return clientes, self._ids[usuario_id]
+            clientes = bd.conexao().execute(
+                "SELECT id, nome, email, telefone FROM clientes WHERE usuario_id=? ORDER BY id", (usuario_id,)).fetchall()
+            ids = [cliente[0] for cliente in clientes]
+            # Outra conexão gravou durante a leitura: devolve o resultado sem guardá-lo
+            if versao_banco() == versao:
+                self._clientes[usuario_id] = clientes
+                self._ids[usuario_id] = ids
+            return clientes, ids
+
+    def clientes(self, usuario_id):
+        return self._carregar(usuario_id)[0]
+
+    def resumo(self, usuario_id, limite=None):
+        clientes = self.clientes(usuario_id)
+        if limite is not None:
+            clientes = clientes[:limite]
+        return [(cliente[0], cliente[1]) for cliente in clientes]
+
+    def pagina(self, usuario_id, ancora=None, direcao='proxima', limite=TAMANHO_PAGINA):
+        clientes, ids = self._carregar(usuario_id)
+        if direcao == 'anterior':
+            fim = bisect_left(ids, int(ancora))
+            return clientes[max(0, fim - limite):fim]
+        inicio = bisect_right(ids, int(ancora or 0))
+        return clientes[inicio:inicio + limite]
+
+    def invalidar(self, usuario_id=None):
+        with self._trava:
+            if usuario_id is None:
+                self._clientes.clear()
+                self._ids.clear()
+            else:
+                self._clientes.pop(usuario_id, None)
+                self._ids.pop(usuario_id, None)
+
+diretorio_clientes = DiretorioClientes()
+
+FORMATOS_DATA = ('%Y-%m-%d', '%d-%m-%Y', '%d/%m/%Y', '%d/%m/%y', '%d-%m-%y')
+
+def normalizar_data(valor):
+    if isinstance(valor, datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, date):
+        return valor.isoformat()
+    texto = str(valor).strip()
+    if len(texto) == 10 and texto[4] == '-':
+        try:
+            return date.fromisoformat(texto).isoformat()
+        except ValueError:
+            pass
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.strptime(texto, formato).date().isoformat()
+        except ValueError:
+            continue
+    raise ValueError(f"Data inválida: {valor!r}")
+
+def formatar_data(valor):
+    try:
+        return datetime.strptime(valor, '%Y-%m-%d').strftime('%d-%m-%Y')
+    except (TypeError, ValueError):
+        return valor
+
+def somar_meses(data, meses):
+    total = data.year * 12 + data.month - 1 + meses
+    ano, mes = divmod(total, 12)
+    mes += 1
+    return date(ano, mes, min(data.day, monthrange(ano, mes)[1]))
+
+def gerar_ocorrencias(data_inicial, inicio, fim):
+    # Ocorrências mensais de data_inicial dentro de [inicio, fim], sem percorrer os meses anteriores
+    if not isinstance(data_inicial, date):
+        try:
+            data_inicial = date.fromisoformat(normalizar_data(data_inicial))
+        except ValueError:
+            # Data legada que a migração não conseguiu converter: o projeto fica sem ocorrências
+            registro.warning("Data inválida em projeto recorrente ignorada: %r", data_inicial)
+            return
+    if isinstance(inicio, str):
+        inicio = date.fromisoformat(inicio)
+    if isinstance(fim, str):
+        fim = date.fromisoformat(fim)
+    meses = max(0, (inicio.year - data_inicial.year) * 12 + inicio.month - data_inicial.month - 1)
+    while True:
+        ocorrencia = somar_meses(data_inicial, meses)
+        if ocorrencia > fim:
+            return
+        if ocorrencia >= inicio:
+            yield ocorrencia
+        meses += 1
+
+def proxima_ocorrencia(data_inicial, inicio, fim):
+    return next(gerar_ocorrencias(data_inicial, inicio, fim), None)
+
+CENTAVO = Decimal('0.01')
+
+def texto_para_decimal(texto):
+    return Decimal(str(texto).replace('R$', '').replace('.', '').replace(',', '.').strip())
+
+def decimal_para_centavos(valor):
+    return int(Decimal(valor).quantize(CENTAVO, rounding=ROUND_HALF_UP) * 100)
+
+def centavos_para_decimal(centavos):
+    return Decimal(centavos or 0).scaleb(-2)
+
+def formatar_moeda(valor, simbolo=True):
+    # Formato brasileiro (R$ 1.234,56) sem depender da localidade do sistema
+    valor = Decimal(valor).quantize(CENTAVO, rounding=ROUND_HALF_UP)
+    texto = f"{abs(valor):,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+    if simbolo:
+        texto = f"R$ {texto}"
+    return f"-{texto}" if valor < 0 else texto
+
+def formatar_centavos(centavos):
+    return formatar_moeda(centavos_para_decimal(centavos))
+
+def interpretar_valor(texto):
+    # Aceita tanto "R$ 1.234,56" quanto "1234.56"
+    texto = str(texto)
+    if ',' in texto:
+        return texto_para_decimal(texto)
+    return Decimal(texto.replace('R$', '').strip())
+
+def _valor_legado_para_centavos(valor):
+    if valor is None:
+        return 0
+    if isinstance(valor, str):
+        try:
+            valor = interpretar_valor(valor)
+        except InvalidOperation:
+            return 0
+    return decimal_para_centavos(Decimal(str(valor)))
+
+def _migracao_tabelas_iniciais(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        );
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nome TEXT NOT NULL,
+            email TEXT,
+            telefone TEXT,
+            usuario_id INTEGER NOT NULL,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+        );
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS pagamentos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            tipo_pagamento TEXT NOT NULL,
+            valor DECIMAL(10, 2) NOT NULL,
+            data_pagamento DATE NOT NULL,
+            status TEXT NOT NULL,
+            usuario_id INTEGER NOT NULL,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+        );
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS projetos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            nome_projeto TEXT NOT NULL,
+            tipo_projeto TEXT NOT NULL,
+            valor DECIMAL(10, 2) NOT NULL,
+            data_entrega DATE NOT NULL,
+            recorrente BOOLEAN NOT NULL DEFAULT FALSE,
+            usuario_id INTEGER NOT NULL,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+        );
+    ''')
+
+def _migracao_valores_centavos(conn):
+    conn.create_function('para_centavos', 1, _valor_legado_para_centavos, deterministic=True)
+
+    conn.execute('''
+        CREATE TABLE pagamentos_novo (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            tipo_pagamento TEXT NOT NULL,
+            valor INTEGER NOT NULL,
+            data_pagamento DATE NOT NULL,
+            status TEXT NOT NULL,
+            usuario_id INTEGER NOT NULL,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+        );
+    ''')
+    conn.execute('''
+        INSERT INTO pagamentos_novo (id, cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id)
+        SELECT id, cliente_id, tipo_pagamento, para_centavos(valor), data_pagamento, status, usuario_id FROM pagamentos
+    ''')
+    conn.execute("DROP TABLE pagamentos")
+    conn.execute("ALTER TABLE pagamentos_novo RENAME TO pagamentos")
+
+    conn.execute('''
+        CREATE TABLE projetos_novo (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            nome_projeto TEXT NOT NULL,
+            tipo_projeto TEXT NOT NULL,
+            valor INTEGER NOT NULL,
+            data_entrega DATE NOT NULL,
+            recorrente BOOLEAN NOT NULL DEFAULT FALSE,
+            usuario_id INTEGER NOT NULL,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
+            FOREIGN KEY (usuario_id) REFERENCES usuarios(id) ON DELETE CASCADE
+        );
+    ''')
+    conn.execute('''
+        INSERT INTO projetos_novo (id, cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id)
+        SELECT id, cliente_id, nome_projeto, tipo_projeto, para_centavos(valor), data_entrega, recorrente, usuario_id FROM projetos
+    ''')
+    conn.execute("DROP TABLE projetos")
+    conn.execute("ALTER TABLE projetos_novo RENAME TO projetos")
+
+    # Os índices caem junto com as tabelas antigas; os de pagamentos passam a
+    # cobrir status e valor para que os totais não precisem ler a tabela.
+    conn.execute("CREATE INDEX idx_pagamentos_usuario_cliente ON pagamentos (usuario_id, cliente_id, data_pagamento, status, valor)")
+    conn.execute("CREATE INDEX idx_pagamentos_usuario_status_data ON pagamentos (usuario_id, status, data_pagamento)")
+    conn.execute("CREATE INDEX idx_pagamentos_usuario_data ON pagamentos (usuario_id, data_pagamento, status, valor)")
+    conn.execute("CREATE INDEX idx_projetos_usuario_data ON projetos (usuario_id, data_entrega)")
+    conn.execute("CREATE INDEX idx_projetos_usuario_cliente ON projetos (usuario_id, cliente_id, data_entrega)")
+
+def _reconstruir_resumos(conn):
+    conn.execute("DELETE FROM resumo_pagamentos")
+    conn.execute("DELETE FROM resumo_projetos")
+    conn.execute('''
+        INSERT INTO resumo_pagamentos (usuario_id, cliente_id, mes, status, quantidade, total)
+        SELECT usuario_id, cliente_id, substr(data_pagamento, 1, 7), status, COUNT(*), SUM(valor)
+        FROM pagamentos
+        GROUP BY usuario_id, cliente_id, substr(data_pagamento, 1, 7), status
+    ''')
+    conn.execute('''
+        INSERT INTO resumo_projetos (usuario_id, mes, quantidade, total)
+        SELECT usuario_id, substr(data_entrega, 1, 7), COUNT(*), SUM(valor)
+        FROM projetos
+        GROUP BY usuario_id, substr(data_entrega, 1, 7)
+    ''')
+
+SOMAR_RESUMO_PAGAMENTO = '''
+            INSERT INTO resumo_pagamentos (usuario_id, cliente_id, mes, status, quantidade, total)
+            VALUES (new.usuario_id, new.cliente_id, substr(new.data_pagamento, 1, 7), new.status, 1, new.valor)
+            ON CONFLICT (usuario_id, cliente_id, mes, status)
+            DO UPDATE SET quantidade = quantidade + 1, total = total + excluded.total;
+'''
+
+SOMAR_RESUMO_PROJETO = '''
+            INSERT INTO resumo_projetos (usuario_id, mes, quantidade, total)
+            VALUES (new.usuario_id, substr(new.data_entrega, 1, 7), 1, new.valor)
+            ON CONFLICT (usuario_id, mes)
+            DO UPDATE SET quantidade = quantidade + 1, total = total + excluded.total;
+'''
+
+def _migracao_resumos(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS resumo_pagamentos (
+            usuario_id INTEGER NOT NULL,
+            cliente_id INTEGER NOT NULL,
+            mes TEXT NOT NULL,
+            status TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (usuario_id, cliente_id, mes, status)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_resumo_pagamentos_mes ON resumo_pagamentos (usuario_id, mes, status, total, quantidade)")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS resumo_projetos (
+            usuario_id INTEGER NOT NULL,
+            mes TEXT NOT NULL,
+            quantidade INTEGER NOT NULL,
+            total INTEGER NOT NULL,
+            PRIMARY KEY (usuario_id, mes)
+        ) WITHOUT ROWID
+    ''')
+
+    # Cada alteração soma a linha nova e subtrai a antiga do mês correspondente;
+    # meses que ficam sem lançamentos são removidos.
+    somar_pagamento = SOMAR_RESUMO_PAGAMENTO
+    subtrair_pagamento = '''
+            UPDATE resumo_pagamentos SET quantidade = quantidade - 1, total = total - old.valor
+            WHERE usuario_id = old.usuario_id AND cliente_id = old.cliente_id
+            AND mes = substr(old.data_pagamento, 1, 7) AND status = old.status;
+            DELETE FROM resumo_pagamentos
+            WHERE usuario_id = old.usuario_id AND cliente_id = old.cliente_id
+            AND mes = substr(old.data_pagamento, 1, 7) AND status = old.status AND quantidade <= 0;
+    '''
+    somar_projeto = SOMAR_RESUMO_PROJETO
+    subtrair_projeto = '''
+            UPDATE resumo_projetos SET quantidade = quantidade - 1, total = total - old.valor
+            WHERE usuario_id = old.usuario_id AND mes = substr(old.data_entrega, 1, 7);
+            DELETE FROM resumo_projetos
+            WHERE usuario_id = old.usuario_id AND mes = substr(old.data_entrega, 1, 7) AND quantidade <= 0;
+    '''
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS pagamentos_resumo_ai AFTER INSERT ON pagamentos BEGIN {somar_pagamento} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS pagamentos_resumo_ad AFTER DELETE ON pagamentos BEGIN {subtrair_pagamento} END")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS pagamentos_resumo_au
+        AFTER UPDATE OF usuario_id, cliente_id, valor, data_pagamento, status ON pagamentos
+        BEGIN {subtrair_pagamento} {somar_pagamento} END""")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS projetos_resumo_ai AFTER INSERT ON projetos BEGIN {somar_projeto} END")
+    conn.execute(f"CREATE TRIGGER IF NOT EXISTS projetos_resumo_ad AFTER DELETE ON projetos BEGIN {subtrair_projeto} END")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS projetos_resumo_au
+        AFTER UPDATE OF usuario_id, valor, data_entrega ON projetos
+        BEGIN {subtrair_projeto} {somar_projeto} END""")
+
+    _reconstruir_resumos(conn)
+
+def _migracao_gatilhos_lote(conn):
+    # Os gatilhos de inclusão deixam de rodar linha a linha enquanto houver uma
+    # linha em lotes_importacao; a inserção em lote atualiza resumos e alterações por conta própria.
+    conn.execute("CREATE TABLE IF NOT EXISTS lotes_importacao (ativo INTEGER NOT NULL)")
+    fora_de_lote = "WHEN NOT EXISTS (SELECT 1 FROM lotes_importacao)"
+    gatilhos = {
+        'pagamentos_resumo_ai': ('pagamentos', SOMAR_RESUMO_PAGAMENTO),
+        'projetos_resumo_ai': ('projetos', SOMAR_RESUMO_PROJETO),
+        'pagamentos_alteracoes_ai': ('pagamentos', "INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('pagamentos', new.id, new.usuario_id);"),
+        'projetos_alteracoes_ai': ('projetos', "INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('projetos', new.id, new.usuario_id);"),
+        'clientes_alteracoes_ai': ('clientes', "INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('clientes', new.id, new.usuario_id);"),
+    }
+    for nome, (tabela, corpo) in gatilhos.items():
+        conn.execute(f"DROP TRIGGER IF EXISTS {nome}")
+        conn.execute(f"CREATE TRIGGER {nome} AFTER INSERT ON {tabela} {fora_de_lote} BEGIN {corpo} END")
+
+# Cada item é uma lista de comandos SQL ou uma função que recebe a conexão.
+# A posição na lista (a partir de 1) é a versão gravada em PRAGMA user_version,
+# então novas migrações devem sempre ser adicionadas ao final.
+MIGRACOES = [
+    _migracao_tabelas_iniciais,
+    [
+        "CREATE INDEX IF NOT EXISTS idx_clientes_usuario ON clientes (usuario_id)",
+        "CREATE INDEX IF NOT EXISTS idx_pagamentos_usuario_cliente ON pagamentos (usuario_id, cliente_id, data_pagamento)",
+        "CREATE INDEX IF NOT EXISTS idx_pagamentos_usuario_status_data ON pagamentos (usuario_id, status, data_pagamento)",
+        "CREATE INDEX IF NOT EXISTS idx_projetos_usuario_data ON projetos (usuario_id, data_entrega)",
+        "CREATE INDEX IF NOT EXISTS idx_projetos_usuario_cliente ON projetos (usuario_id, cliente_id, data_entrega)",
+    ],
+    [
+        """CREATE TABLE IF NOT EXISTS tarefas_dados (
+            nome TEXT PRIMARY KEY,
+            concluida_em TEXT NOT NULL
+        )""",
+    ],
+    _migracao_valores_centavos,
+    [
+        "CREATE INDEX IF NOT EXISTS idx_pagamentos_cliente_pagina ON pagamentos (usuario_id, cliente_id, id)",
+    ],
+    [
+        """CREATE VIRTUAL TABLE IF NOT EXISTS clientes_fts USING fts5(
+            nome, email, telefone,
+            content='clientes', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        """CREATE TRIGGER IF NOT EXISTS clientes_fts_ai AFTER INSERT ON clientes BEGIN
+            INSERT INTO clientes_fts (rowid, nome, email, telefone) VALUES (new.id, new.nome, new.email, new.telefone);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS clientes_fts_ad AFTER DELETE ON clientes BEGIN
+            INSERT INTO clientes_fts (clientes_fts, rowid, nome, email, telefone) VALUES ('delete', old.id, old.nome, old.email, old.telefone);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS clientes_fts_au AFTER UPDATE OF nome, email, telefone ON clientes BEGIN
+            INSERT INTO clientes_fts (clientes_fts, rowid, nome, email, telefone) VALUES ('delete', old.id, old.nome, old.email, old.telefone);
+            INSERT INTO clientes_fts (rowid, nome, email, telefone) VALUES (new.id, new.nome, new.email, new.telefone);
+        END""",
+        "INSERT INTO clientes_fts (clientes_fts) VALUES ('rebuild')",
+    ],
+    [
+        """CREATE TABLE IF NOT EXISTS alteracoes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            tabela TEXT NOT NULL,
+            registro_id INTEGER NOT NULL,
+            usuario_id INTEGER NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_alteracoes_usuario_seq ON alteracoes (usuario_id, seq)",
+        """CREATE TRIGGER IF NOT EXISTS pagamentos_alteracoes_ai AFTER INSERT ON pagamentos BEGIN
+            INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('pagamentos', new.id, new.usuario_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS pagamentos_alteracoes_au AFTER UPDATE ON pagamentos BEGIN
+            INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('pagamentos', new.id, new.usuario_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS pagamentos_alteracoes_ad AFTER DELETE ON pagamentos BEGIN
+            INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('pagamentos', old.id, old.usuario_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS projetos_alteracoes_ai AFTER INSERT ON projetos BEGIN
+            INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('projetos', new.id, new.usuario_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS projetos_alteracoes_au AFTER UPDATE ON projetos BEGIN
+            INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('projetos', new.id, new.usuario_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS projetos_alteracoes_ad AFTER DELETE ON projetos BEGIN
+            INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('projetos', old.id, old.usuario_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS clientes_alteracoes_au AFTER UPDATE ON clientes BEGIN
+            INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('clientes', new.id, new.usuario_id);
+        END""",
+    ],
+    _migracao_resumos,
+    [
+        """CREATE TRIGGER IF NOT EXISTS clientes_alteracoes_ai AFTER INSERT ON clientes BEGIN
+            INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('clientes', new.id, new.usuario_id);
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS clientes_alteracoes_ad AFTER DELETE ON clientes BEGIN
+            INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('clientes', old.id, old.usuario_id);
+        END""",
+        "CREATE INDEX IF NOT EXISTS idx_projetos_usuario_pagina ON projetos (usuario_id, id)",
+    ],
+    _migracao_gatilhos_lote,
+    # O índice de busca passa a guardar o usuário (sem indexá-lo), para que o
+    # filtro por usuário aconteça dentro da própria consulta FTS.
+    [
+        "DROP TRIGGER IF EXISTS clientes_fts_ai",
+        "DROP TRIGGER IF EXISTS clientes_fts_ad",
+        "DROP TRIGGER IF EXISTS clientes_fts_au",
+        "DROP TABLE IF EXISTS clientes_fts",
+        """CREATE VIRTUAL TABLE clientes_fts USING fts5(
+            nome, email, telefone, usuario_id UNINDEXED,
+            content='clientes', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        """CREATE TRIGGER clientes_fts_ai AFTER INSERT ON clientes BEGIN
+            INSERT INTO clientes_fts (rowid, nome, email, telefone, usuario_id) VALUES (new.id, new.nome, new.email, new.telefone, new.usuario_id);
+        END""",
+        """CREATE TRIGGER clientes_fts_ad AFTER DELETE ON clientes BEGIN
+            INSERT INTO clientes_fts (clientes_fts, rowid, nome, email, telefone, usuario_id)
+            VALUES ('delete', old.id, old.nome, old.email, old.telefone, old.usuario_id);
+        END""",
+        """CREATE TRIGGER clientes_fts_au AFTER UPDATE OF nome, email, telefone, usuario_id ON clientes BEGIN
+            INSERT INTO clientes_fts (clientes_fts, rowid, nome, email, telefone, usuario_id)
+            VALUES ('delete', old.id, old.nome, old.email, old.telefone, old.usuario_id);
+            INSERT INTO clientes_fts (rowid, nome, email, telefone, usuario_id) VALUES (new.id, new.nome, new.email, new.telefone, new.usuario_id);
+        END""",
+        "INSERT INTO clientes_fts (clientes_fts) VALUES ('rebuild')",
+    ],
+]
+
+def criar_tabelas():
+    # Uma migração que falha é desfeita e o erro sobe: ninguém deve seguir com o esquema pela metade
+    conn = bd.conexao()
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    if versao >= len(MIGRACOES):
+        return
+
+    for numero in range(versao + 1, len(MIGRACOES) + 1):
+        migracao = MIGRACOES[numero - 1]
+        with transacao() as conn:
+            if callable(migracao):
+                migracao(conn)
+            else:
+                for comando in migracao:
+                    conn.execute(comando)
+            conn.execute(f"PRAGMA user_version = {numero}")
+        registro.info("Migração %d aplicada ao banco de dados.", numero)
+    conn.execute("PRAGMA optimize")
+
+# Tamanho dos lotes usados pelas tarefas de dados em segundo plano
+TAMANHO_LOTE_TAREFAS = 500
+
+def migrar_datas_legadas(tamanho_lote=TAMANHO_LOTE_TAREFAS):
+    conn = bd.conexao()
+    for tabela, coluna in (('pagamentos', 'data_pagamento'), ('projetos', 'data_entrega')):
+        ultimo_id = 0
+        invalidas = 0
+        while True:
+            lote = conn.execute(f"SELECT id, {coluna} FROM {tabela} WHERE id > ? ORDER BY id LIMIT ?",
+                                (ultimo_id, tamanho_lote)).fetchall()
+            if not lote:
+                break
+            ultimo_id = lote[-1][0]
+
+            alteracoes = []
+            for registro_id, valor in lote:
+                try:
+                    data_iso = normalizar_data(valor)
+                except ValueError:
+                    invalidas += 1
+                    continue
+                if data_iso != valor:
+                    alteracoes.append((data_iso, registro_id))
+
+            if alteracoes:
+                with transacao() as conn:
+                    conn.executemany(f"UPDATE {tabela} SET {coluna}=? WHERE id=?", alteracoes)
+        if invalidas:
+            registro.warning("%d datas inválidas mantidas sem alteração em '%s'.", invalidas, tabela)
+
+# Tarefas executadas uma única vez por banco, em segundo plano, após as migrações
+TAREFAS_DADOS = [
+    ('datas_iso', migrar_datas_legadas),
+]
+
+def executar_tarefas_dados():
+    try:
+        conn = bd.conexao()
+        concluidas = {linha[0] for linha in conn.execute("SELECT nome FROM tarefas_dados")}
+        for nome, tarefa in TAREFAS_DADOS:
+            if nome in concluidas:
+                continue
+            tarefa()
+            with transacao() as conn:
+                conn.execute("INSERT INTO tarefas_dados (nome, concluida_em) VALUES (?, ?)",
+                             (nome, datetime.now().isoformat(timespec='seconds')))
+            registro.info("Tarefa de dados '%s' concluída.", nome)
+    except Exception:
+        registro.exception("Erro ao executar tarefas de dados")
+    finally:
+        bd.fechar()
+
+def iniciar_tarefas_dados():
+    conn = bd.conexao()
+    concluidas = {linha[0] for linha in conn.execute("SELECT nome FROM tarefas_dados")}
+    if all(nome in concluidas for nome, _ in TAREFAS_DADOS):
+        return None
+    thread = threading.Thread(target=executar_tarefas_dados, name="tarefas-dados", daemon=True)
+    thread.start()
+    return thread
+
+# Fator de custo do bcrypt; senhas com outro custo são refeitas no próximo login
+BCRYPT_CUSTO = int(os.environ.get('BCRYPT_CUSTO', '12'))
+
+# Falhas seguidas permitidas antes de bloquear o usuário e duração do bloqueio, em segundos
+MAX_TENTATIVAS_LOGIN = 5
+BLOQUEIO_LOGIN_INICIAL = 30
+BLOQUEIO_LOGIN_MAXIMO = 900
+
+# Segundos sem novas falhas (contados do fim do bloqueio) após os quais as falhas de um usuário são esquecidas
+ESQUECER_FALHAS_APOS = 900
+
+# Usuários acompanhados ao mesmo tempo; acima disso os mais antigos são descartados
+MAX_USUARIOS_TENTATIVAS = 10000
+
+class LoginBloqueado(Exception):
+    pass
+
+class ControleTentativas:
+    # _falhas guarda (falhas, bloqueado_até, última falha) na ordem da última
+    # falha; qualquer nome pode entrar aqui (inclusive pela API), então o
+    # tamanho é limitado.
+    def __init__(self, max_tentativas=MAX_TENTATIVAS_LOGIN, bloqueio_inicial=BLOQUEIO_LOGIN_INICIAL, bloqueio_maximo=BLOQUEIO_LOGIN_MAXIMO,
+                 esquecer_apos=ESQUECER_FALHAS_APOS, max_usuarios=MAX_USUARIOS_TENTATIVAS):
+        self.max_tentativas = max_tentativas
+        self.bloqueio_inicial = bloqueio_inicial
+        self.bloqueio_maximo = bloqueio_maximo
+        self.esquecer_apos = timedelta(seconds=esquecer_apos)
+        self.max_usuarios = max_usuarios
+        self._falhas = {}
+        self._trava = threading.Lock()
+
+    def _esquecida(self, entrada, agora):
+        _, bloqueado_ate, ultima_falha = entrada
+        return agora - max(ultima_falha, bloqueado_ate or ultima_falha) > self.esquecer_apos
+
+    def _limpar(self, agora):
+        for username in [username for username, entrada in self._falhas.items() if self._esquecida(entrada, agora)]:
+            del self._falhas[username]
+        while len(self._falhas) >= self.max_usuarios:
+            del self._falhas[next(iter(self._falhas))]
+
+    def verificar(self, username):
+        with self._trava:
+            bloqueado_ate = self._falhas.get(username, (0, None, None))[1]
+        if bloqueado_ate is not None:
+            restante = (bloqueado_ate - datetime.now()).total_seconds()
+            if restante > 0:
+                raise LoginBloqueado(f"Muitas tentativas de login. Tente novamente em {ceil(restante)} segundos.")
+
+    def registrar_falha(self, username):
+        agora = datetime.now()
+        with self._trava:
+            anterior = self._falhas.pop(username, None)
+            falhas = 1 if anterior is None or self._esquecida(anterior, agora) else anterior[0] + 1
+            bloqueado_ate = None
+            if falhas >= self.max_tentativas:
+                # O bloqueio dobra a cada falha além do limite
+                segundos = min(self.bloqueio_maximo, self.bloqueio_inicial * 2 ** (falhas - self.max_tentativas))
+                bloqueado_ate = agora + timedelta(seconds=segundos)
+            if len(self._falhas) >= self.max_usuarios:
+                self._limpar(agora)
+            self._falhas[username] = (falhas, bloqueado_ate, agora)
+
+    def registrar_sucesso(self, username):
+        with self._trava:
+            self._falhas.pop(username, None)
+
+tentativas_login = ControleTentativas()
+
+def _custo_hash(hash_senha):
+    try:
+        return int(hash_senha.split(b'$')[2])
+    except (IndexError, ValueError):
+        return None
+
+def gerar_hash_senha(password, custo=None):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(custo or BCRYPT_CUSTO)).decode('utf-8')
+
+_hash_ficticio = None
+
+def _verificar_senha_ficticia(password):
+    # Usuários inexistentes também pagam um bcrypt, para que o tempo de resposta não revele quais nomes existem
+    global _hash_ficticio
+    if _hash_ficticio is None:
+        _hash_ficticio = gerar_hash_senha(os.urandom(16).hex()).encode('utf-8')
+    bcrypt.checkpw(password.encode('utf-8'), _hash_ficticio)
+
+def verificar_login(username, password):
+    tentativas_login.verificar(username)
+    repositorio = obter_repositorio()
+    user = repositorio.buscar_usuario(username)
+
+    if user:
+        stored_hash = user[1].encode('utf-8')
+        if bcrypt.checkpw(password.encode('utf-8'), stored_hash):
+            tentativas_login.registrar_sucesso(username)
+            if _custo_hash(stored_hash) != BCRYPT_CUSTO:
+                repositorio.atualizar_senha(user[0], gerar_hash_senha(password))
+            return user[0]
+    else:
+        _verificar_senha_ficticia(password)
+    tentativas_login.registrar_falha(username)
+    return None
+
+def buscar_usuario_id(username):
+    usuario = obter_repositorio().buscar_usuario(username)
+    return usuario[0] if usuario else None
+
+def registrar_usuario(username, password):
+    repositorio = obter_repositorio()
+    if repositorio.buscar_usuario(username):
+        raise ValueError("Nome de usuário já existe.")
+
+    repositorio.inserir_usuario(username, gerar_hash_senha(password))
+    registro.info("Usuário %s registrado.", username)
+
+def cadastrar_cliente(nome, email, telefone, usuario_id):
+    obter_repositorio().inserir_cliente(nome, email, telefone, usuario_id)
+    diretorio_clientes.invalidar(usuario_id)
+
+def editar_cliente(cliente_id, nome, email, telefone, usuario_id):
+    obter_repositorio().atualizar_cliente(cliente_id, nome, email, telefone, usuario_id)
+    diretorio_clientes.invalidar(usuario_id)
+
+def excluir_cliente(cliente_id, usuario_id):
+    obter_repositorio().excluir_cliente(cliente_id, usuario_id)
+    diretorio_clientes.invalidar(usuario_id)
+
+def cadastrar_pagamento(cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
+    obter_repositorio().inserir_pagamento(cliente_id, tipo_pagamento, decimal_para_centavos(valor),
+                                          normalizar_data(data_pagamento), status, usuario_id)
+
+def editar_pagamento(pagamento_id, tipo_pagamento, valor, data_pagamento, status, usuario_id):
+    obter_repositorio().atualizar_pagamento(pagamento_id, tipo_pagamento, decimal_para_centavos(valor),
+                                            normalizar_data(data_pagamento), status, usuario_id)
+
+def excluir_pagamento(pagamento_id, usuario_id):
+    obter_repositorio().excluir_pagamento(pagamento_id, usuario_id)
+
+def cadastrar_projeto(cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
+    obter_repositorio().inserir_projeto(cliente_id, nome_projeto, tipo_projeto, decimal_para_centavos(valor),
+                                        normalizar_data(data_entrega), recorrente, usuario_id)
+
+def editar_projeto(projeto_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id):
+    obter_repositorio().atualizar_projeto(projeto_id, nome_projeto, tipo_projeto, decimal_para_centavos(valor),
+                                          normalizar_data(data_entrega), recorrente, usuario_id)
+
+def excluir_projeto(projeto_id, usuario_id):
+    obter_repositorio().excluir_projeto(projeto_id, usuario_id)
+
+# Quantidade de registros de alteração mantidos no log após a poda
+ALTERACOES_MANTIDAS = 100000
+
+def podar_alteracoes(manter=ALTERACOES_MANTIDAS):
+    # A leitura dos limites usa só a chave primária; a transação de escrita só é aberta se houver o que podar
+    menor, maior = bd.conexao().execute("SELECT MIN(seq), MAX(seq) FROM alteracoes").fetchone()
+    if menor is None or menor > maior - manter:
+        return
+    with transacao() as conn:
+        conn.execute("DELETE FROM alteracoes WHERE seq <= (SELECT MAX(seq) FROM alteracoes) - ?", (manter,))
+
+# Dias de antecedência com que pagamentos e entregas entram nos alertas
+DIAS_ANTECEDENCIA_ALERTA = 7
+
+# Quantidade de ids consultados por vez ao aplicar alterações
+LOTE_IDS_ALERTAS = 500
+
+CONSULTA_ALERTAS_PAGAMENTOS = """
+    SELECT p.id, p.data_pagamento, c.nome, p.tipo_pagamento, p.valor, 0
+    FROM pagamentos p
+    JOIN clientes c ON p.cliente_id = c.id
+    WHERE p.status = 'Em Aberto' AND p.data_pagamento <= ? AND p.usuario_id = ?
+"""
+
+CONSULTA_ALERTAS_PROJETOS = """
+    SELECT p.id, p.data_entrega, c.nome, p.nome_projeto, NULL, p.recorrente
+    FROM projetos p
+    JOIN clientes c ON p.cliente_id = c.id
+    WHERE p.data_entrega <= ? AND p.usuario_id = ?
+"""
+
+class MotorAlertas:
+    CONSULTAS = {'pagamentos': CONSULTA_ALERTAS_PAGAMENTOS, 'projetos': CONSULTA_ALERTAS_PROJETOS}
+
+    def __init__(self, usuario_id, antecedencia=DIAS_ANTECEDENCIA_ALERTA):
+        self.usuario_id = usuario_id
+        self.antecedencia = antecedencia
+        self.itens = {'pagamentos': {}, 'projetos': {}}
+        self.dispensados = set()
+        self.ultimo_seq = None
+        self.dia = None
+        self._alertas = None
+        self._trava = threading.Lock()
+
+    def atualizar(self):
+        with self._trava:
+            conn = bd.conexao()
+            hoje = date.today()
+            menor_seq, maior_seq = conn.execute("SELECT MIN(seq), MAX(seq) FROM alteracoes").fetchone()
+            maior_seq = maior_seq or 0
+            podado = self.ultimo_seq is not None and menor_seq is not None and menor_seq > self.ultimo_seq + 1
+            if self.dia != hoje or podado:
+                self._carregar_tudo(conn, hoje)
+                self._alertas = None
+            elif maior_seq > self.ultimo_seq:
+                self._aplicar_alteracoes(conn, maior_seq)
+                self._alertas = None
+            self.ultimo_seq = maior_seq
+            return self.alertas()
+
+    def _limite(self):
+        return (self.dia + timedelta(days=self.antecedencia)).isoformat()
+
+    def _itens(self, linhas):
+        # Projetos recorrentes entram pela ocorrência que cai entre hoje e o limite
+        for registro_id, data, cliente, descricao, valor, recorrente in linhas:
+            if recorrente:
+                ocorrencia = proxima_ocorrencia(data, self.dia, self._limite())
+                if ocorrencia is None:
+                    continue
+                data = ocorrencia.isoformat()
+            yield registro_id, (data, cliente, descricao, valor)
+
+    def _carregar_tudo(self, conn, hoje):
+        self.dia = hoje
+        for tabela, consulta in self.CONSULTAS.items():
+            self.itens[tabela] = dict(self._itens(conn.execute(consulta, (self._limite(), self.usuario_id))))
+
+    def _aplicar_alteracoes(self, conn, maior_seq):
+        alterados = {'pagamentos': set(), 'projetos': set(), 'clientes': set()}
+        for tabela, registro_id in conn.execute(
+                "SELECT tabela, registro_id FROM alteracoes WHERE usuario_id=? AND seq > ? AND seq <= ?",
+                (self.usuario_id, self.ultimo_seq, maior_seq)):
+            alterados[tabela].add(registro_id)
+        if any(REGISTRO_LOTE in ids for ids in alterados.values()):
+            # Importação em lote: uma marca por lote em vez de uma por linha
+            self._carregar_tudo(conn, self.dia)
+            return
+        for tabela, consulta in self.CONSULTAS.items():
+            itens = self.itens[tabela]
+            ids = list(alterados[tabela])
+            for inicio in range(0, len(ids), LOTE_IDS_ALERTAS):
+                lote = ids[inicio:inicio + LOTE_IDS_ALERTAS]
+                for registro_id in lote:
+                    itens.pop(registro_id, None)
+                filtro = f" AND p.id IN ({', '.join('?' * len(lote))})"
+                itens.update(self._itens(conn.execute(consulta + filtro, (self._limite(), self.usuario_id, *lote))))
+            clientes = list(alterados['clientes'])
+            for inicio in range(0, len(clientes), LOTE_IDS_ALERTAS):
+                lote = clientes[inicio:inicio + LOTE_IDS_ALERTAS]
+                filtro = f" AND p.cliente_id IN ({', '.join('?' * len(lote))})"
+                itens.update(self._itens(conn.execute(consulta + filtro, (self._limite(), self.usuario_id, *lote))))
+
+    def alertas(self):
+        # O cache vale enquanto nenhum item novo tiver sido dispensado
+        if self._alertas is not None and self._alertas[0] == len(self.dispensados):
+            return self._alertas[1]
+        dispensados = set(self.dispensados)
+        alertas = [(data, tabela, registro_id, cliente, descricao, valor)
+                   for tabela, itens in self.itens.items()
+                   for registro_id, (data, cliente, descricao, valor) in itens.items()
+                   if (tabela, registro_id) not in dispensados]
+        alertas.sort()
+        self._alertas = (len(dispensados), alertas)
+        return alertas
+
+    def dispensar(self, tabela, registro_id):
+        self.dispensados.add((tabela, registro_id))
+
+def buscar_alertas(usuario_id):
+    # Consulta avulsa (CLI e API): as mesmas regras do painel de alertas, sem manter o motor
+    if not conectar_bd():
+        return [], []
+    pagamentos, projetos = [], []
+    for data, tabela, _, cliente, descricao, valor in MotorAlertas(usuario_id).atualizar():
+        if tabela == 'pagamentos':
+            pagamentos.append((cliente, descricao, valor, data))
+        else:
+            projetos.append((cliente, descricao, data))
+    return pagamentos, projetos
+
+# Quantidade de sugestões exibidas na busca de clientes
+LIMITE_SUGESTOES = 15
+
+CONSULTA_BUSCA_CLIENTES = """
+    SELECT rowid, nome
+    FROM clientes_fts
+    WHERE clientes_fts MATCH ? AND usuario_id = ?
+    ORDER BY rank
+    LIMIT ?
+"""
+
+def buscar_clientes(usuario_id, texto, limite=LIMITE_SUGESTOES):
+    conn = conectar_bd()
+    if not conn:
+        return []
+    termos = re.findall(r'\w+', texto)
+    if not termos:
+        return diretorio_clientes.resumo(usuario_id, limite)
+
+    # Primeiro todos os termos como prefixo; se faltar resultado, completa com uma
+    # busca aproximada pelos três primeiros caracteres de qualquer um dos termos.
+    encontrados = conn.execute(CONSULTA_BUSCA_CLIENTES, (" ".join(f'"{termo}"*' for termo in termos), usuario_id, limite)).fetchall()
+    prefixos = [termo[:3] for termo in termos if len(termo) >= 3]
+    if len(encontrados) < limite and prefixos:
+        aproximada = " OR ".join(f'"{prefixo}"*' for prefixo in prefixos)
+        vistos = {cliente[0] for cliente in encontrados}
+        for cliente in conn.execute(CONSULTA_BUSCA_CLIENTES, (aproximada, usuario_id, limite * 2)):
+            if cliente[0] not in vistos:
+                encontrados.append(cliente)
+                vistos.add(cliente[0])
+                if len(encontrados) >= limite:
+                    break
+    return encontrados
+
+def totais_cliente(cliente_id, usuario_id):
+    conn = conectar_bd()
+    if conn:
+        return conn.execute('''
+            SELECT COALESCE(SUM(CASE WHEN status = 'Pago' THEN total END), 0),
+                   COALESCE(SUM(CASE WHEN status = 'Em Aberto' THEN total END), 0),
+                   COALESCE(SUM(quantidade), 0)
+            FROM resumo_pagamentos
+            WHERE usuario_id = ? AND cliente_id = ?
+        ''', (usuario_id, cliente_id)).fetchone()
+
+def reconstruir_resumos():
+    with transacao() as conn:
+        _reconstruir_resumos(conn)
+
+# Quantidade de meses e de clientes exibidos no painel
+MESES_PAINEL = 12
+CLIENTES_PAINEL = 10
+
+def buscar_painel(usuario_id, meses=MESES_PAINEL, clientes=CLIENTES_PAINEL):
+    conn = conectar_bd()
+    if not conn:
+        return None
+    totais = conn.execute('''
+        SELECT COALESCE(SUM(CASE WHEN status = 'Pago' THEN total END), 0),
+               COALESCE(SUM(CASE WHEN status = 'Em Aberto' THEN total END), 0),
+               COALESCE(SUM(quantidade), 0)
+        FROM resumo_pagamentos
+        WHERE usuario_id = ?
+    ''', (usuario_id,)).fetchone()
+    por_mes = conn.execute('''
+        SELECT mes,
+               SUM(CASE WHEN status = 'Pago' THEN total ELSE 0 END),
+               SUM(CASE WHEN status = 'Em Aberto' THEN total ELSE 0 END),
+               SUM(quantidade)
+        FROM resumo_pagamentos
+        WHERE usuario_id = ?
+        GROUP BY mes
+        ORDER BY mes DESC
+        LIMIT ?
+    ''', (usuario_id, meses)).fetchall()
+    projetos = dict(conn.execute('''
+        SELECT mes, total FROM resumo_projetos
+        WHERE usuario_id = ?
+        ORDER BY mes DESC
+        LIMIT ?
+    ''', (usuario_id, meses)).fetchall())
+    if por_mes:
+        # O resumo só conhece a data gravada dos projetos recorrentes; as demais
+        # ocorrências mensais dentro dos meses exibidos são somadas aqui.
+        ano, mes = map(int, por_mes[0][0].split('-'))
+        inicio, fim = f"{por_mes[-1][0]}-01", date(ano, mes, monthrange(ano, mes)[1]).isoformat()
+        for valor, data_entrega in conn.execute(
+                "SELECT valor, data_entrega FROM projetos WHERE usuario_id = ? AND recorrente AND data_entrega <= ?",
+                (usuario_id, fim)):
+            for ocorrencia in gerar_ocorrencias(data_entrega, inicio, fim):
+                if ocorrencia.isoformat() != data_entrega:
+                    mes = ocorrencia.isoformat()[:7]
+                    projetos[mes] = projetos.get(mes, 0) + valor
+    maiores_abertos = conn.execute('''
+        SELECT c.nome, SUM(r.total) AS aberto
+        FROM resumo_pagamentos r
+        JOIN clientes c ON c.id = r.cliente_id
+        WHERE r.usuario_id = ? AND r.status = 'Em Aberto'
+        GROUP BY r.cliente_id
+        ORDER BY aberto DESC
+        LIMIT ?
+    ''', (usuario_id, clientes)).fetchall()
+    return {
+        'totais': totais,
+        'por_mes': [(mes, pago, aberto, quantidade, projetos.get(mes, 0)) for mes, pago, aberto, quantidade in por_mes],
+        'maiores_abertos': maiores_abertos,
+    }
+
+def _pagina_por_chave(consulta, parametros, ancora, direcao, limite):
+    conn = conectar_bd()
+    if not conn:
+        return []
+    if direcao == 'anterior':
+        linhas = conn.execute(f"{consulta} AND id < ? ORDER BY id DESC LIMIT ?",
+                              (*parametros, ancora, limite)).fetchall()
+        linhas.reverse()
+        return linhas
+    return conn.execute(f"{consulta} AND id > ? ORDER BY id LIMIT ?",
+                        (*parametros, ancora or 0, limite)).fetchall()
+
+def listar_clientes_pagina(usuario_id, ancora=None, direcao='proxima', limite=TAMANHO_PAGINA):
+    return _pagina_por_chave("SELECT id, nome, email, telefone FROM clientes WHERE usuario_id=?",
+                             (usuario_id,), ancora, direcao, limite)
+
+def listar_pagamentos_pagina(cliente_id, usuario_id, ancora=None, direcao='proxima', limite=TAMANHO_PAGINA):
+    return _pagina_por_chave("SELECT id, tipo_pagamento, valor, data_pagamento, status FROM pagamentos WHERE usuario_id=? AND cliente_id=?",
+                             (usuario_id, cliente_id), ancora, direcao, limite)
+
+def listar_projetos_pagina(usuario_id, ancora=None, direcao='proxima', limite=TAMANHO_PAGINA):
+    return _pagina_por_chave("SELECT id, cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente FROM projetos WHERE usuario_id=?",
+                             (usuario_id,), ancora, direcao, limite)
+
+def versao_dados(usuario_id):
+    # Cresce a cada alteração nos dados do usuário; serve de base para ETags
+    return conectar_bd().execute("SELECT COALESCE(MAX(seq), 0) FROM alteracoes WHERE usuario_id=?", (usuario_id,)).fetchone()[0]
+
+def carregar_projetos(usuario_id):
+    conn = conectar_bd()
+    if conn:
+        return conn.execute('''
+            SELECT clientes.nome, projetos.nome_projeto, projetos.data_entrega, projetos.recorrente, projetos.id
+            FROM projetos
+            JOIN clientes ON projetos.cliente_id = clientes.id
+            WHERE projetos.usuario_id = ?
+            ORDER BY projetos.data_entrega, projetos.id
+        ''', (usuario_id,)).fetchall()
+
+def buscar_projeto(projeto_id, usuario_id):
+    # Mesma forma das linhas de carregar_projetos, para atualizar uma linha só
+    return conectar_bd().execute('''
+        SELECT clientes.nome, projetos.nome_projeto, projetos.data_entrega, projetos.recorrente, projetos.id
+        FROM projetos
+        JOIN clientes ON projetos.cliente_id = clientes.id
+        WHERE projetos.id = ? AND projetos.usuario_id = ?
+    ''', (projeto_id, usuario_id)).fetchone()
+
+# Quantidade de linhas lidas do cursor e gravadas por vez nas exportações
+TAMANHO_LOTE_EXPORTACAO = 1000
+
+CONSULTA_RELATORIO_PAGAMENTOS = """
+    SELECT c.id, c.nome, c.email, c.telefone, p.id, p.tipo_pagamento, p.valor, p.data_pagamento, p.status 
+    FROM clientes c
+    JOIN pagamentos p ON c.id = p.cliente_id AND p.usuario_id = c.usuario_id
+    WHERE c.usuario_id = ? AND c.id = ?
+    AND p.data_pagamento BETWEEN ? AND ?
+    ORDER BY p.data_pagamento, p.id
+"""
+
+CONSULTA_RELATORIO_PROJETOS = """
+    SELECT c.id, c.nome, c.email, c.telefone, pr.id, pr.tipo_projeto, pr.valor, pr.data_entrega, pr.recorrente
+    FROM clientes c
+    JOIN projetos pr ON c.id = pr.cliente_id AND pr.usuario_id = c.usuario_id
+    WHERE c.usuario_id = ? AND c.id = ?
+    AND pr.data_entrega BETWEEN ? AND ? AND NOT pr.recorrente
+    ORDER BY pr.data_entrega, pr.id
+"""
+
+CONSULTA_RELATORIO_PROJETOS_RECORRENTES = """
+    SELECT c.id, c.nome, c.email, c.telefone, pr.id, pr.tipo_projeto, pr.valor, pr.data_entrega, pr.recorrente
+    FROM clientes c
+    JOIN projetos pr ON c.id = pr.cliente_id AND pr.usuario_id = c.usuario_id
+    WHERE c.usuario_id = ? AND c.id = ?
+    AND pr.data_entrega <= ? AND pr.recorrente
+"""
+
+def _iterar_cursor(consulta, parametros, tamanho_lote=TAMANHO_LOTE_EXPORTACAO):
+    cursor = bd.conexao().cursor()
+    cursor.arraysize = tamanho_lote
+    try:
+        cursor.execute(consulta, parametros)
+        while True:
+            lote = cursor.fetchmany()
+            if not lote:
+                break
+            yield from lote
+    finally:
+        cursor.close()
+
+def _ocorrencias_projeto(projeto, data_inicial, data_final):
+    for ocorrencia in gerar_ocorrencias(projeto[7], data_inicial, data_final):
+        yield projeto[:7] + (ocorrencia.isoformat(),) + projeto[8:]
+
+def iterar_projetos_relatorio(usuario_id, cliente_id, data_inicial, data_final):
+    unicos = _iterar_cursor(CONSULTA_RELATORIO_PROJETOS, (usuario_id, cliente_id, data_inicial, data_final))
+    recorrentes = bd.conexao().execute(CONSULTA_RELATORIO_PROJETOS_RECORRENTES, (usuario_id, cliente_id, data_final)).fetchall()
+    if not recorrentes:
+        return unicos
+    ocorrencias = [_ocorrencias_projeto(projeto, data_inicial, data_final) for projeto in recorrentes]
+    return merge(unicos, *ocorrencias, key=lambda linha: (linha[7], linha[4]))
+
+def iterar_dados_relatorio(usuario_id, cliente_id, tipo_relatorio, data_inicial, data_final):
+    fontes = []
+    if tipo_relatorio in ['Pagamentos', 'Ambos']:
+        fontes.append(_iterar_cursor(CONSULTA_RELATORIO_PAGAMENTOS, (usuario_id, cliente_id, data_inicial, data_final)))
+    if tipo_relatorio in ['Projetos', 'Ambos']:
+        fontes.append(iterar_projetos_relatorio(usuario_id, cliente_id, data_inicial, data_final))
+
+    for fonte in fontes:
+        for linha in fonte:
+            yield _linha_relatorio(linha)
+
+def _linha_relatorio(linha):
+    return linha[:6] + (centavos_para_decimal(linha[6]),) + linha[7:9]
+
+def em_lotes(linhas, tamanho=TAMANHO_LOTE_EXPORTACAO):
+    iterador = iter(linhas)
+    while True:
+        lote = list(islice(iterador, tamanho))
+        if not lote:
+            return
+        yield lote
+
+CABECALHO_CSV = ["Cliente ID", "Nome", "Email", "Telefone", "Pagamento ID", "Tipo de Pagamento", "Valor", "Data", "Status"]
+
+def exportar_csv(dados, filepath, progresso=None):
+    total = 0
+    with open(filepath, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(CABECALHO_CSV)
+        for lote in em_lotes(dados):
+            writer.writerows(lote)
+            total += len(lote)
+            if progresso:
+                progresso(total)
+    return total
+
+def gerar_csv(dados):
+    # Produz o CSV em blocos de texto, um por lote, para respostas em streaming
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CABECALHO_CSV)
+    for lote in em_lotes(dados):
+        writer.writerows(lote)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def _elemento_xml(gerador, nome, valor):
+    gerador.startElement(nome, {})
+    if valor is not None:
+        gerador.characters(str(valor))
+    gerador.endElement(nome)
+
+def exportar_xml(dados, filepath, progresso=None):
+    total = 0
+    with open(filepath, mode='wb') as file:
+        gerador = XMLGenerator(file, encoding='utf-8', short_empty_elements=True)
+        gerador.startDocument()
+        gerador.startElement("Clientes", {})
+        for lote in em_lotes(dados):
+            for row in lote:
+                gerador.startElement("Cliente", {})
+                _elemento_xml(gerador, "ClienteID", row[0])
+                _elemento_xml(gerador, "Nome", row[1])
+                _elemento_xml(gerador, "Email", row[2])
+                _elemento_xml(gerador, "Telefone", row[3])
+                gerador.startElement("Pagamento", {})
+                _elemento_xml(gerador, "PagamentoID", row[4])
+                _elemento_xml(gerador, "TipoPagamento", row[5])
+                _elemento_xml(gerador, "Valor", row[6])
+                _elemento_xml(gerador, "Data", row[7])
+                _elemento_xml(gerador, "Status", row[8])
+                gerador.endElement("Pagamento")
+                gerador.endElement("Cliente")
+            total += len(lote)
+            if progresso:
+                progresso(total)
+        gerador.endElement("Clientes")
+        gerador.endDocument()
+    return total
+
+# Linhas enviadas a cada processo ao gerar PDFs grandes em paralelo
+LINHAS_POR_PARTE_PDF = 5000
+PROCESSOS_PDF = max(1, (os.cpu_count() or 1) - 1)
+
+def _texto_pdf(valor):
+    # As fontes padrão do FPDF só cobrem latin-1
+    return "" if valor is None else str(valor).encode('latin-1', 'replace').decode('latin-1')
+
+class RelatorioPDF(FPDF):
+    COLUNAS = (("ID", 25, 'C'), ("Tipo", 65, 'L'), ("Valor (R$)", 35, 'R'), ("Data", 30, 'C'), ("Status", 35, 'L'))
+    ALTURA_LINHA = 7
+
+    def __init__(self, titulo="Relatório de Clientes e Pagamentos", total_paginas=None):
+        # total_paginas=None numera com o alias do FPDF; as partes geradas em
+        # paralelo recebem o total já calculado pelo processo principal.
+        super().__init__()
+        self.titulo = _texto_pdf(titulo)
+        self.total_paginas = total_paginas
+        self.pagina_inicial = 1
+        self.inicio_parcial = False
+        self.cliente_atual = None
+        self.subtotal = Decimal(0)
+        self._textos_ajustados = {}
+        self.set_auto_page_break(auto=True, margin=15)
+        if total_paginas is None:
+            self.alias_nb_pages()
+
+    def header(self):
+        # Uma parte que começa no meio de uma página não repete o cabeçalho da parte anterior
+        if self.inicio_parcial and self.page_no() == 1:
+            return
+        self.set_font("Arial", "B", 12)
+        self.cell(0, 10, txt=self.titulo, ln=1, align='C')
+        self.set_font("Arial", "B", 9)
+        self.set_fill_color(220, 220, 220)
+        for titulo, largura, _ in self.COLUNAS:
+            self.cell(largura, self.ALTURA_LINHA, txt=titulo, border=1, align='C', fill=1)
+        self.ln()
+        self.set_font("Arial", size=9)
+
+    def footer(self):
+        if self.inicio_parcial and self.page_no() == 1:
+            return
+        total = "{nb}" if self.total_paginas is None else self.total_paginas
+        self.set_y(-12)
+        self.set_font("Arial", "I", 8)
+        self.cell(0, 8, txt=f"Página {self.page_no() + self.pagina_inicial - 1}/{total}", align='C')
+
+    def iniciar_na_linha(self, linha, geometria):
+        # Posiciona a primeira linha da parte onde ela cairia no relatório inteiro
+        topo, linhas_por_pagina = geometria
+        pagina, posicao = divmod(linha, linhas_por_pagina)
+        self.pagina_inicial = pagina + 1
+        self.inicio_parcial = posicao > 0
+        self.add_page()
+        if self.inicio_parcial:
+            self.set_font("Arial", size=9)
+            self.y = topo
+            for _ in range(posicao):
+                self.y += self.ALTURA_LINHA
+
+    def ajustar(self, texto, largura):
+        # As métricas da fonte do corpo são as mesmas em todas as páginas, então
+        # o texto já ajustado a uma largura é reaproveitado entre linhas e páginas.
+        chave = (texto, largura)
+        ajustado = self._textos_ajustados.get(chave)
+        if ajustado is None:
+            ajustado = texto
+            limite = largura - 2
+            if self.get_string_width(ajustado) > limite:
+                while ajustado and self.get_string_width(ajustado + "...") > limite:
+                    ajustado = ajustado[:-1]
+                ajustado += "..."
+            if len(self._textos_ajustados) > 50000:
+                self._textos_ajustados.clear()
+            self._textos_ajustados[chave] = ajustado
+        return ajustado
+
+    def faixa_cliente(self, row):
+        self.set_font("Arial", "B", 9)
+        self.set_fill_color(240, 240, 240)
+        texto = f"Cliente {row[0]} - {_texto_pdf(row[1])}  |  {_texto_pdf(row[2])}  |  {_texto_pdf(row[3])}"
+        self.cell(0, self.ALTURA_LINHA, txt=self.ajustar(texto, 190), border=1, ln=1, fill=1)
+        self.set_font("Arial", size=9)
+
+    def linha_subtotal(self):
+        self.set_font("Arial", "B", 9)
+        largura_rotulo = self.COLUNAS[0][1] + self.COLUNAS[1][1]
+        largura_resto = sum(coluna[1] for coluna in self.COLUNAS[3:])
+        self.cell(largura_rotulo, self.ALTURA_LINHA, txt="Subtotal", border=1, align='R')
+        self.cell(self.COLUNAS[2][1], self.ALTURA_LINHA, txt=_texto_pdf(formatar_moeda(self.subtotal, simbolo=False)), border=1, align='R')
+        self.cell(largura_resto, self.ALTURA_LINHA, txt="", border=1, ln=1)
+        self.set_font("Arial", size=9)
+
+    def adicionar_linha(self, row):
+        if row[0] != self.cliente_atual:
+            if self.cliente_atual is not None:
+                self.linha_subtotal()
+            self.cliente_atual = row[0]
+            self.subtotal = Decimal(0)
+            self.faixa_cliente(row)
+
+        valor = row[6] or Decimal(0)
+        self.subtotal += valor
+        valores = (row[4], row[5], formatar_moeda(valor, simbolo=False), formatar_data(row[7]), row[8])
+        for (_, largura, alinhamento), texto in zip(self.COLUNAS, valores):
+            self.cell(largura, self.ALTURA_LINHA, txt=self.ajustar(_texto_pdf(texto), largura), border=1, align=alinhamento)
+        self.ln()
+
+    def concluir(self, continua=False):
+        if self.cliente_atual is not None and not continua:
+            self.linha_subtotal()
+
+def _geometria_pdf():
+    # Todas as linhas do relatório (faixa do cliente, pagamento, subtotal) têm a
+    # mesma altura; devolve a posição da primeira linha abaixo do cabeçalho e
+    # quantas linhas cabem em uma página, com as mesmas contas do FPDF.
+    pdf = RelatorioPDF(total_paginas=1)
+    pdf.add_page()
+    topo = y = pdf.get_y()
+    linhas_por_pagina = 0
+    while not y + RelatorioPDF.ALTURA_LINHA > pdf.page_break_trigger:
+        linhas_por_pagina += 1
+        y += RelatorioPDF.ALTURA_LINHA
+    return topo, linhas_por_pagina
+
+def _renderizar_parte_pdf(caminho_linhas, caminho, cliente_inicial, subtotal_inicial, continua, linha_inicial, total_paginas):
+    with open(caminho_linhas, 'rb') as file:
+        linhas = pickle.load(file)
+    pdf = RelatorioPDF(total_paginas=total_paginas)
+    pdf.cliente_atual = cliente_inicial
+    pdf.subtotal = subtotal_inicial
+    pdf.iniciar_na_linha(linha_inicial, _geometria_pdf())
+    for row in linhas:
+        pdf.adicionar_linha(row)
+    pdf.concluir(continua)
+    pdf.output(caminho)
+    return caminho
+
+def _carregar_pypdf():
+    # pypdf é opcional e só é importado quando um relatório grande precisa dele
+    try:
+        import pypdf
+    except ImportError:
+        return None
+    return pypdf
+
+def _exportar_pdf_em_partes(pypdf, linhas, proxima, iterador, filepath, progresso, processos):
+    # As linhas são gravadas em partes no diretório temporário enquanto se conta
+    # o total de páginas; depois cada processo desenha uma parte já na posição e
+    # com a numeração que ela teria no relatório gerado de uma vez só.
+    diretorio = tempfile.mkdtemp(prefix="relatorio_pdf_")
+    topo, linhas_por_pagina = _geometria_pdf()
+    partes = []
+    total = 0
+    try:
+        linhas_pdf = 0
+        cliente_anterior = None
+        subtotal = Decimal(0)
+        continua = False
+        while linhas:
+            cliente_inicial = cliente_anterior if continua else None
+            subtotal_inicial = subtotal if continua else Decimal(0)
+            linha_inicial = linhas_pdf
+            for row in linhas:
+                if row[0] != cliente_anterior:
+                    # Subtotal do cliente anterior e faixa do novo
+                    linhas_pdf += 1 if cliente_anterior is None else 2
+                    cliente_anterior = row[0]
+                    subtotal = Decimal(0)
+                subtotal += row[6] or Decimal(0)
+                linhas_pdf += 1
+            continua = proxima is not None and proxima[0] == cliente_anterior
+
+            caminho_linhas = os.path.join(diretorio, f"parte_{len(partes):05d}.pickle")
+            with open(caminho_linhas, 'wb') as file:
+                pickle.dump(linhas, file, protocol=pickle.HIGHEST_PROTOCOL)
+            partes.append((caminho_linhas, cliente_inicial, subtotal_inicial, continua, linha_inicial, len(linhas)))
+
+            if proxima is None:
+                break
+            linhas = [proxima] + list(islice(iterador, LINHAS_POR_PARTE_PDF - 1))
+            proxima = next(iterador, None)
+        linhas = None
+        total_paginas = -(-(linhas_pdf + 1) // linhas_por_pagina)
+
+        pool = ProcessPoolExecutor(max_workers=processos, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            futuros = {}
+            for numero, (caminho_linhas, cliente_inicial, subtotal_inicial, continua, linha_inicial, quantidade) in enumerate(partes):
+                caminho = os.path.join(diretorio, f"parte_{numero:05d}.pdf")
+                futuro = pool.submit(_renderizar_parte_pdf, caminho_linhas, caminho, cliente_inicial, subtotal_inicial,
+                                     continua, linha_inicial, total_paginas)
+                futuros[futuro] = quantidade
+            for futuro in as_completed(futuros):
+                futuro.result()
+                total += futuros[futuro]
+                if progresso:
+                    progresso(total)
+        except BaseException:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        else:
+            pool.shutdown()
+
+        # A primeira página de uma parte que começa no meio de uma página é sobreposta à última da parte anterior
+        escritor = pypdf.PdfWriter()
+        for numero, (_, _, _, _, linha_inicial, _) in enumerate(partes):
+            leitor = pypdf.PdfReader(os.path.join(diretorio, f"parte_{numero:05d}.pdf"))
+            paginas = iter(leitor.pages)
+            if linha_inicial % linhas_por_pagina:
+                escritor.pages[-1].merge_page(next(paginas))
+            for pagina in paginas:
+                escritor.add_page(pagina)
+        with open(filepath, mode='wb') as file:
+            escritor.write(file)
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+    return total
+
+def exportar_pdf(dados, filepath, progresso=None, processos=None):
+    if processos is None:
+        processos = PROCESSOS_PDF
+    iterador = iter(dados)
+    linhas = list(islice(iterador, LINHAS_POR_PARTE_PDF))
+    proxima = next(iterador, None)
+
+    # Relatórios que cabem em uma parte não compensam o custo de abrir processos
+    if processos > 1 and proxima is not None:
+        pypdf = _carregar_pypdf()
+        if pypdf is not None:
+            return _exportar_pdf_em_partes(pypdf, linhas, proxima, iterador, filepath, progresso, processos)
+
+    pdf = RelatorioPDF()
+    pdf.add_page()
+    restantes = chain(linhas, [proxima] if proxima is not None else [], iterador)
+    total = 0
+    for total, row in enumerate(restantes, start=1):
+        if progresso and total % TAMANHO_LOTE_EXPORTACAO == 0:
+            progresso(total)
+        pdf.adicionar_linha(row)
+    pdf.concluir()
+    pdf.output(filepath)
+    return total
+
+EXPORTADORES = {'csv': exportar_csv, 'xml': exportar_xml, 'pdf': exportar_pdf}
+
+def gerar_relatorio(exportador, filepath, usuario_id, cliente_id, tipo_relatorio, data_inicial, data_final, progresso=None):
+    dados = iterar_dados_relatorio(usuario_id, cliente_id, tipo_relatorio, data_inicial, data_final)
+    return exportador(dados, filepath, progresso=progresso)
+
+# Relatórios de todos os clientes: uma consulta só, ordenada por cliente e,
+# dentro de cada cliente, pagamentos, projetos recorrentes e projetos únicos
+# (a última coluna indica a origem da linha).
+CONSULTA_LOTE_PAGAMENTOS = """
+    SELECT c.id, c.nome, c.email, c.telefone, p.id, p.tipo_pagamento, p.valor, p.data_pagamento, p.status, 0
+    FROM pagamentos p
+    JOIN clientes c ON c.id = p.cliente_id AND c.usuario_id = p.usuario_id
+    WHERE p.usuario_id = ? AND p.data_pagamento BETWEEN ? AND ?
+"""
+
+CONSULTA_LOTE_PROJETOS_RECORRENTES = """
+    SELECT c.id, c.nome, c.email, c.telefone, pr.id, pr.tipo_projeto, pr.valor, pr.data_entrega, pr.recorrente, 1
+    FROM projetos pr
+    JOIN clientes c ON c.id = pr.cliente_id AND c.usuario_id = pr.usuario_id
+    WHERE pr.usuario_id = ? AND pr.data_entrega <= ? AND pr.recorrente
+"""
+
+CONSULTA_LOTE_PROJETOS = """
+    SELECT c.id, c.nome, c.email, c.telefone, pr.id, pr.tipo_projeto, pr.valor, pr.data_entrega, pr.recorrente, 2
+    FROM projetos pr
+    JOIN clientes c ON c.id = pr.cliente_id AND c.usuario_id = pr.usuario_id
+    WHERE pr.usuario_id = ? AND pr.data_entrega BETWEEN ? AND ? AND NOT pr.recorrente
+"""
+
+def _consulta_lote(usuario_id, tipo_relatorio, data_inicial, data_final):
+    partes = []
+    parametros = []
+    if tipo_relatorio in ['Pagamentos', 'Ambos']:
+        partes.append(CONSULTA_LOTE_PAGAMENTOS)
+        parametros += [usuario_id, data_inicial, data_final]
+    if tipo_relatorio in ['Projetos', 'Ambos']:
+        partes += [CONSULTA_LOTE_PROJETOS_RECORRENTES, CONSULTA_LOTE_PROJETOS]
+        parametros += [usuario_id, data_final, usuario_id, data_inicial, data_final]
+    if not partes:
+        raise ValueError(f"Tipo de relatório inválido: {tipo_relatorio!r}")
+    return " UNION ALL ".join(partes) + " ORDER BY 1, 10, 8, 5", parametros
+
+def _linhas_cliente_lote(linhas, data_inicial, data_final):
+    # Mesma ordem de iterar_dados_relatorio: os pagamentos, depois os projetos
+    # por data, com as ocorrências dos recorrentes (poucos, lidos antes dos
+    # únicos) intercaladas aos projetos únicos sem carregar o cliente inteiro.
+    linha = next(linhas, None)
+    while linha is not None and linha[9] == 0:
+        yield _linha_relatorio(linha)
+        linha = next(linhas, None)
+    recorrentes = []
+    while linha is not None and linha[9] == 1:
+        recorrentes.append(linha[:9])
+        linha = next(linhas, None)
+    projetos = chain([linha] if linha is not None else [], linhas)
+    if recorrentes:
+        ocorrencias = [_ocorrencias_projeto(projeto, data_inicial, data_final) for projeto in recorrentes]
+        projetos = merge(projetos, *ocorrencias, key=lambda linha: (linha[7], linha[4]))
+    for linha in projetos:
+        yield _linha_relatorio(linha)
+
+def iterar_relatorio_lote(usuario_id, tipo_relatorio, data_inicial, data_final):
+    # Produz (cliente_id, linhas) para cada cliente com movimento no período;
+    # as linhas de um cliente devem ser consumidas antes de avançar para o próximo.
+    consulta, parametros = _consulta_lote(usuario_id, tipo_relatorio, data_inicial, data_final)
+    for cliente_id, linhas in groupby(_iterar_cursor(consulta, parametros), key=itemgetter(0)):
+        yield cliente_id, _linhas_cliente_lote(linhas, data_inicial, data_final)
+
+def gerar_relatorios_lote(formato, destino, usuario_id, tipo_relatorio, data_inicial, data_final, separar=True, progresso=None,
+                          exportador=None, arquivos=None):
+    # separar=True grava um arquivo por cliente no diretório destino; senão, um arquivo só.
+    # Cada arquivo entra em "arquivos" antes de ser gravado, para quem precisar apagá-los se a exportação parar no meio.
+    exportador = exportador or EXPORTADORES[formato]
+    arquivos = [] if arquivos is None else arquivos
+    clientes = iterar_relatorio_lote(usuario_id, tipo_relatorio, data_inicial, data_final)
+    if not separar:
+        dados = chain.from_iterable(linhas for _, linhas in clientes)
+        arquivos.append(destino)
+        return exportador(dados, destino, progresso=progresso), arquivos
+
+    os.makedirs(destino, exist_ok=True)
+    total = 0
+    for cliente_id, linhas in clientes:
+        caminho = os.path.join(destino, f"relatorio_cliente_{cliente_id}.{formato}")
+        arquivos.append(caminho)
+        progresso_cliente = partial(_progresso_deslocado, progresso, total) if progresso else None
+        total += exportador(linhas, caminho, progresso=progresso_cliente)
+        if progresso:
+            progresso(total)
+    return total, arquivos
+
+def _progresso_deslocado(progresso, anteriores, linhas):
+    progresso(anteriores + linhas)
+
+# Processos que geram os arquivos CSV e XML das exportações em fila; os PDFs têm processos próprios
+PROCESSOS_EXPORTACAO = max(1, min(4, (os.cpu_count() or 1) // 2))
+
+# PDFs da fila gerados ao mesmo tempo; cada um divide as suas partes entre PROCESSOS_PDF / PDFS_SIMULTANEOS processos
+PDFS_SIMULTANEOS = 2
+
+NA_FILA = 'Na fila'
+EM_ANDAMENTO = 'Em andamento'
+CONCLUIDO = 'Concluído'
+CANCELADO = 'Cancelado'
+FALHOU = 'Erro'
+
+class ExportacaoCancelada(Exception):
+    pass
+
+def _executar_exportacao(caminho_banco, chave, formato, destino, usuario_id, cliente_id, tipo_relatorio,
+                         data_inicial, data_final, separar, processos_pdf, eventos, cancelamento):
+    # Roda em um processo do pool, que guarda a conexão entre um trabalho e outro;
+    # o progresso volta pela fila do Manager
+    if bd.caminho != caminho_banco:
+        bd.fechar_todas()
+        bd.caminho = caminho_banco
+    if cancelamento.is_set():
+        raise ExportacaoCancelada()
+    eventos.put((chave, EM_ANDAMENTO, 0))
+
+    def progresso(linhas):
+        if cancelamento.is_set():
+            raise ExportacaoCancelada()
+        eventos.put((chave, EM_ANDAMENTO, linhas))
+
+    exportador = partial(exportar_pdf, processos=processos_pdf) if formato == 'pdf' else EXPORTADORES[formato]
+    arquivos = []
+    criou_diretorio = cliente_id is None and separar and not os.path.isdir(destino)
+    try:
+        if cliente_id is None:
+            total, _ = gerar_relatorios_lote(formato, destino, usuario_id, tipo_relatorio, data_inicial, data_final,
+                                             separar=separar, progresso=progresso, exportador=exportador, arquivos=arquivos)
+        else:
+            arquivos.append(destino)
+            total = gerar_relatorio(exportador, destino, usuario_id, cliente_id, tipo_relatorio, data_inicial, data_final,
+                                    progresso=progresso)
+    except BaseException:
+        # Apaga tudo o que o trabalho gravou, inclusive os arquivos por cliente já concluídos
+        for arquivo in arquivos:
+            if os.path.isfile(arquivo):
+                os.remove(arquivo)
+        if criou_diretorio:
+            try:
+                os.rmdir(destino)
+            except OSError:
+                pass
+        raise
+    return total
+
+class TarefaExportacao:
+    def __init__(self, formato, destino, futuro):
+        self.formato = formato
+        self.destino = destino
+        self.futuro = futuro
+        self.estado = NA_FILA
+        self.linhas = 0
+        self.erro = None
+
+    @property
+    def encerrada(self):
+        return self.estado in (CONCLUIDO, CANCELADO, FALHOU)
+
+class TrabalhoExportacao:
+    def __init__(self, trabalho_id, descricao, cancelamento):
+        self.id = trabalho_id
+        self.descricao = descricao
+        self.cancelamento = cancelamento
+        self.tarefas = {}
+
+    @property
+    def encerrado(self):
+        return all(tarefa.encerrada for tarefa in self.tarefas.values())
+
+class FilaExportacao:
+    # Os trabalhos rodam em processos criados com "spawn" (seguro com as threads
+    # da interface); o progresso chega por uma fila do Manager e o cancelamento
+    # é um Event compartilhado, verificado a cada lote de linhas exportado.
+    def __init__(self, processos=PROCESSOS_EXPORTACAO, processos_pdf=PROCESSOS_PDF, pdfs_simultaneos=PDFS_SIMULTANEOS):
+        self.processos = processos
+        self.processos_pdf = processos_pdf
+        self.pdfs_simultaneos = pdfs_simultaneos
+        self.trabalhos = {}
+        self._proximo_id = 1
+        self._contexto = multiprocessing.get_context('spawn')
+        self._gerenciador = None
+        self._eventos = None
+        self._pool = None
+        self._pool_pdf = None
+
+    def _iniciar(self):
+        if self._gerenciador is None:
+            self._gerenciador = self._contexto.Manager()
+            self._eventos = self._gerenciador.Queue()
+            self._pool = ProcessPoolExecutor(max_workers=self.processos, mp_context=self._contexto)
+            # Cada trabalho PDF abre o seu próprio pool para desenhar as partes (exportar_pdf)
+            self._pool_pdf = ProcessPoolExecutor(max_workers=self.pdfs_simultaneos, mp_context=self._contexto)
+
+    def submeter(self, descricao, destinos, usuario_id, cliente_id, tipo_relatorio, data_inicial, data_final, separar=True):
+        # destinos: {formato: caminho}; cliente_id=None exporta todos os clientes (gerar_relatorios_lote)
+        formatos_invalidos = set(destinos) - set(EXPORTADORES)
+        if formatos_invalidos:
+            raise ValueError(f"Formatos inválidos: {', '.join(sorted(formatos_invalidos))}")
+        self._iniciar()
+        trabalho = TrabalhoExportacao(self._proximo_id, descricao, self._gerenciador.Event())
+        self._proximo_id += 1
+        processos_pdf = max(1, -(-self.processos_pdf // self.pdfs_simultaneos))
+        for formato, destino in destinos.items():
+            pool = self._pool_pdf if formato == 'pdf' else self._pool
+            futuro = pool.submit(_executar_exportacao, bd.caminho, (trabalho.id, formato), formato, destino, usuario_id,
+                                 cliente_id, tipo_relatorio, data_inicial, data_final, separar, processos_pdf,
+                                 self._eventos, trabalho.cancelamento)
+            trabalho.tarefas[formato] = TarefaExportacao(formato, destino, futuro)
+        self.trabalhos[trabalho.id] = trabalho
+        return trabalho
+
+    def cancelar(self, trabalho_id):
+        trabalho = self.trabalhos[trabalho_id]
+        trabalho.cancelamento.set()
+        # As tarefas ainda na fila do pool nem chegam a começar; as demais param no próximo lote de linhas
+        for tarefa in trabalho.tarefas.values():
+            tarefa.futuro.cancel()
+
+    def atualizar(self):
+        # Aplica os eventos dos processos e o resultado das tarefas terminadas; devolve os trabalhos alterados
+        alterados = set()
+        while self._eventos is not None:
+            try:
+                (trabalho_id, formato), estado, linhas = self._eventos.get_nowait()
+            except queue.Empty:
+                break
+            # Trabalhos já removidos da lista ainda podem ter eventos na fila
+            trabalho = self.trabalhos.get(trabalho_id)
+            tarefa = trabalho.tarefas.get(formato) if trabalho else None
+            if tarefa is not None and not tarefa.encerrada:
+                tarefa.estado = estado
+                tarefa.linhas = linhas
+                alterados.add(trabalho_id)
+        for trabalho in self.trabalhos.values():
+            for tarefa in trabalho.tarefas.values():
+                if tarefa.encerrada or not tarefa.futuro.done():
+                    continue
+                if tarefa.futuro.cancelled():
+                    tarefa.estado = CANCELADO
+                else:
+                    erro = tarefa.futuro.exception()
+                    if isinstance(erro, ExportacaoCancelada):
+                        tarefa.estado = CANCELADO
+                    elif erro is not None:
+                        tarefa.estado = FALHOU
+                        tarefa.erro = str(erro)
+                    else:
+                        tarefa.estado = CONCLUIDO
+                        tarefa.linhas = tarefa.futuro.result()
+                alterados.add(trabalho.id)
+        return [self.trabalhos[trabalho_id] for trabalho_id in sorted(alterados)]
+
+    def pendentes(self):
+        return any(not trabalho.encerrado for trabalho in self.trabalhos.values())
+
+    def remover_encerrados(self):
+        for trabalho_id in [trabalho.id for trabalho in self.trabalhos.values() if trabalho.encerrado]:
+            del self.trabalhos[trabalho_id]
+
+    def encerrar(self):
+        for trabalho in self.trabalhos.values():
+            if not trabalho.encerrado:
+                self.cancelar(trabalho.id)
+        if self._gerenciador is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool_pdf.shutdown(cancel_futures=True)
+            self._gerenciador.shutdown()
+            self._gerenciador = None
+            self._eventos = None
+
+# Linhas gravadas por transação na importação em massa
+TAMANHO_LOTE_IMPORTACAO = 5000
+
+# Cache de páginas (KiB) da conexão durante a importação: as inserções espalhadas
+# pelos índices de pagamentos e projetos deixam de reler as mesmas páginas do disco
+CACHE_IMPORTACAO_KB = 65536
+STATUS_PAGAMENTO = ('Pago', 'Em Aberto')
+VALORES_VERDADEIROS = ('1', 'true', 'sim', 's', 'mensal', 'recorrente')
+VALORES_FALSOS = ('0', 'false', 'nao', 'não', 'n', 'unico', 'único', '')
+
+class ResultadoImportacao:
+    def __init__(self, arquivo_rejeitados):
+        self.inseridos = 0
+        self.rejeitados = 0
+        self.exemplos_rejeitados = []
+        self.arquivo_rejeitados = arquivo_rejeitados
+        self._arquivo = None
+        self._writer = None
+
+    def rejeitar(self, numero_linha, linha, motivo):
+        self.rejeitados += 1
+        if len(self.exemplos_rejeitados) < 20:
+            self.exemplos_rejeitados.append((numero_linha, motivo))
+        if self._writer is None:
+            self._arquivo = open(self.arquivo_rejeitados, mode='w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._arquivo)
+            self._writer.writerow(["linha", "motivo", *linha.keys()])
+        self._writer.writerow([numero_linha, motivo, *linha.values()])
+
+    def fechar(self):
+        if self._arquivo:
+            self._arquivo.close()
+        if not self.rejeitados:
+            self.arquivo_rejeitados = None
+
+def _campo_obrigatorio(linha, campo):
+    valor = (linha.get(campo) or '').strip()
+    if not valor:
+        raise ValueError(f"campo '{campo}' vazio")
+    return valor
+
+def _campo_opcional(linha, campo):
+    return (linha.get(campo) or '').strip()
+
+def _cliente_importado(linha, clientes_validos):
+    try:
+        cliente_id = int(_campo_obrigatorio(linha, 'cliente_id'))
+    except ValueError as erro:
+        raise ValueError(f"cliente_id inválido: {erro}")
+    if cliente_id not in clientes_validos:
+        raise ValueError(f"cliente {cliente_id} não encontrado")
+    return cliente_id
+
+def _valor_importado(linha):
+    try:
+        return decimal_para_centavos(interpretar_valor(_campo_obrigatorio(linha, 'valor')))
+    except InvalidOperation:
+        raise ValueError(f"valor inválido: {linha.get('valor')!r}")
+
+def _validar_cliente_importado(linha, usuario_id, clientes_validos):
+    return (_campo_obrigatorio(linha, 'nome'), _campo_opcional(linha, 'email'), _campo_opcional(linha, 'telefone'), usuario_id)
+
+def _validar_pagamento_importado(linha, usuario_id, clientes_validos):
+    status = _campo_obrigatorio(linha, 'status')
+    if status not in STATUS_PAGAMENTO:
+        raise ValueError(f"status inválido: {status!r}")
+    return (_cliente_importado(linha, clientes_validos), _campo_obrigatorio(linha, 'tipo_pagamento'), _valor_importado(linha),
+            normalizar_data(_campo_obrigatorio(linha, 'data_pagamento')), status, usuario_id)
+
+def _validar_projeto_importado(linha, usuario_id, clientes_validos):
+    recorrente = _campo_opcional(linha, 'recorrente').lower()
+    if recorrente not in VALORES_VERDADEIROS + VALORES_FALSOS:
+        raise ValueError(f"recorrente inválido: {recorrente!r}")
+    return (_cliente_importado(linha, clientes_validos), _campo_obrigatorio(linha, 'nome_projeto'), _campo_obrigatorio(linha, 'tipo_projeto'),
+            _valor_importado(linha), normalizar_data(_campo_obrigatorio(linha, 'data_entrega')), recorrente in VALORES_VERDADEIROS, usuario_id)
+
+# Colunas esperadas no CSV e função que valida e converte cada linha
+IMPORTACOES = {
+    'clientes': (('nome', 'email', 'telefone'), _validar_cliente_importado),
+    'pagamentos': (('cliente_id', 'tipo_pagamento', 'valor', 'data_pagamento', 'status'), _validar_pagamento_importado),
+    'projetos': (('cliente_id', 'nome_projeto', 'tipo_projeto', 'valor', 'data_entrega', 'recorrente'), _validar_projeto_importado),
+}
+
+def importar_csv(tabela, filepath, usuario_id, progresso=None, tamanho_lote=TAMANHO_LOTE_IMPORTACAO):
+    colunas, validar = IMPORTACOES[tabela]
+    repositorio = obter_repositorio()
+    conn = bd.conexao()
+
+    clientes_validos = None
+    if tabela != 'clientes':
+        clientes_validos = {linha[0] for linha in conn.execute("SELECT id FROM clientes WHERE usuario_id=?", (usuario_id,))}
+
+    resultado = ResultadoImportacao(os.path.splitext(filepath)[0] + "_rejeitados.csv")
+    cache_anterior = conn.execute("PRAGMA cache_size").fetchone()[0]
+    conn.execute(f"PRAGMA cache_size = -{CACHE_IMPORTACAO_KB}")
+    try:
+        with open(filepath, newline='', encoding='utf-8-sig') as file:
+            amostra = file.read(4096)
+            file.seek(0)
+            try:
+                dialeto = csv.Sniffer().sniff(amostra, delimiters=',;\t')
+            except csv.Error:
+                dialeto = csv.excel
+            leitor = csv.DictReader(file, dialect=dialeto)
+            leitor.fieldnames = [campo.strip().lower() for campo in leitor.fieldnames or []]
+            obrigatorias = [coluna for coluna in colunas if coluna not in ('email', 'telefone', 'recorrente')]
+            ausentes = [coluna for coluna in obrigatorias if coluna not in leitor.fieldnames]
+            if ausentes:
+                raise ValueError(f"Colunas ausentes no arquivo: {', '.join(ausentes)}")
+
+            lote = []
+            for linha in leitor:
+                try:
+                    lote.append(validar(linha, usuario_id, clientes_validos))
+                except ValueError as erro:
+                    # line_num conta linhas físicas: campos entre aspas podem ter quebras de linha
+                    resultado.rejeitar(leitor.line_num, linha, str(erro))
+                    continue
+                if len(lote) >= tamanho_lote:
+                    repositorio.inserir_em_lote(tabela, lote)
+                    resultado.inseridos += len(lote)
+                    lote = []
+                    if progresso:
+                        progresso(resultado.inseridos)
+            if lote:
+                repositorio.inserir_em_lote(tabela, lote)
+                resultado.inseridos += len(lote)
+                if progresso:
+                    progresso(resultado.inseridos)
+    finally:
+        conn.execute(f"PRAGMA cache_size = {cache_anterior}")
+        resultado.fechar()
+        if tabela == 'clientes':
+            diretorio_clientes.invalidar(usuario_id)
+    return resultado
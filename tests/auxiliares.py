@@ -0,0 +1,15 @@
+import servicos
+
+
+def consultar(sql, parametros=()):
+    return servicos.bd.conexao().execute(sql, parametros).fetchall()
+
+
+def criar_usuario(nome='ana'):
+    servicos.registrar_usuario(nome, 'segredo')
+    return servicos.buscar_usuario_id(nome)
+
+
+def criar_cliente(usuario_id, nome='Cliente A', email='', telefone=''):
+    servicos.cadastrar_cliente(nome, email, telefone, usuario_id)
+    return consultar("SELECT MAX(id) FROM clientes")[0][0]
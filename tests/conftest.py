@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import servicos
+from repositorios import RepositorioSQLAlchemy, RepositorioSQLite
+
+
+@pytest.fixture(params=['sqlite', 'sqlalchemy'])
+def repositorio(request, tmp_path, monkeypatch):
+    caminho = str(tmp_path / 'clientes.db')
+    monkeypatch.setattr(servicos.bd, 'caminho', caminho)
+    monkeypatch.setattr(servicos, 'BCRYPT_CUSTO', 4)
+    monkeypatch.setattr(servicos, 'tentativas_login', servicos.ControleTentativas())
+    servicos.diretorio_clientes.invalidar()
+    servicos.criar_tabelas()
+    if request.param == 'sqlalchemy':
+        pytest.importorskip('sqlalchemy')
+        repositorio = RepositorioSQLAlchemy(f"sqlite:///{caminho}")
+    else:
+        repositorio = RepositorioSQLite(servicos.bd)
+    monkeypatch.setattr(servicos, '_repositorio', repositorio)
+    yield repositorio
+    repositorio.fechar()
+    servicos.bd.fechar_todas()
@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import servicos
+from auxiliares import consultar, criar_cliente, criar_usuario
+
+
+def dia(dias):
+    return (date.today() + timedelta(days=dias)).isoformat()
+
+
+def ultimo_id(tabela):
+    return consultar(f"SELECT MAX(id) FROM {tabela}")[0][0]
+
+
+def motor_contando_cargas(usuario_id, monkeypatch):
+    motor = servicos.MotorAlertas(usuario_id)
+    cargas = []
+    original = motor._carregar_tudo
+    monkeypatch.setattr(motor, '_carregar_tudo', lambda conn, hoje: (cargas.append(hoje), original(conn, hoje)))
+    return motor, cargas
+
+
+def resumo(alertas):
+    return [(data, tabela, cliente, descricao) for data, tabela, _, cliente, descricao, _ in alertas]
+
+
+def test_motor_aplica_alteracoes_sem_recarregar(repositorio, monkeypatch):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana')
+    servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('10'), dia(1), 'Em Aberto', usuario_id)
+    proximo = ultimo_id('pagamentos')
+    servicos.cadastrar_pagamento(cliente_id, 'Boleto', Decimal('20'), dia(30), 'Em Aberto', usuario_id)
+    distante = ultimo_id('pagamentos')
+    motor, cargas = motor_contando_cargas(usuario_id, monkeypatch)
+    assert resumo(motor.atualizar()) == [(dia(1), 'pagamentos', 'Ana', 'Pix')]
+
+    servicos.editar_pagamento(distante, 'Boleto', Decimal('20'), dia(3), 'Em Aberto', usuario_id)
+    servicos.editar_pagamento(proximo, 'Pix', Decimal('10'), dia(1), 'Pago', usuario_id)
+    servicos.cadastrar_projeto(cliente_id, 'Site', 'Web', Decimal('50'), dia(2), False, usuario_id)
+    assert resumo(motor.atualizar()) == [(dia(2), 'projetos', 'Ana', 'Site'), (dia(3), 'pagamentos', 'Ana', 'Boleto')]
+
+    # Renomear o cliente atualiza os itens dele; excluir o projeto o tira da lista
+    servicos.editar_cliente(cliente_id, 'Ana Maria', '', '', usuario_id)
+    servicos.excluir_projeto(ultimo_id('projetos'), usuario_id)
+    assert resumo(motor.atualizar()) == [(dia(3), 'pagamentos', 'Ana Maria', 'Boleto')]
+    assert len(cargas) == 1
+
+
+def test_motor_ignora_alteracoes_de_outro_usuario(repositorio, monkeypatch):
+    usuario_id = criar_usuario()
+    outro = criar_usuario('bruno')
+    servicos.cadastrar_pagamento(criar_cliente(outro, 'Bruno'), 'Pix', Decimal('1'), dia(1), 'Em Aberto', outro)
+    motor, cargas = motor_contando_cargas(usuario_id, monkeypatch)
+    assert motor.atualizar() == []
+    servicos.cadastrar_pagamento(criar_cliente(outro, 'Carla'), 'Pix', Decimal('1'), dia(1), 'Em Aberto', outro)
+    assert motor.atualizar() == []
+    assert len(cargas) == 1
+
+
+def test_motor_recarrega_apos_importacao_em_lote(repositorio, tmp_path, monkeypatch):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana')
+    motor, cargas = motor_contando_cargas(usuario_id, monkeypatch)
+    assert motor.atualizar() == []
+    arquivo = tmp_path / 'pagamentos.csv'
+    arquivo.write_text("cliente_id,tipo_pagamento,valor,data_pagamento,status\n"
+                       f"{cliente_id},Pix,10.00,{dia(1)},Em Aberto\n{cliente_id},Boleto,5.00,{dia(2)},Pago\n", encoding='utf-8')
+    assert servicos.importar_csv('pagamentos', str(arquivo), usuario_id).inseridos == 2
+    assert resumo(motor.atualizar()) == [(dia(1), 'pagamentos', 'Ana', 'Pix')]
+    assert len(cargas) == 2
+
+
+def test_motor_recarrega_quando_o_log_foi_podado(repositorio, monkeypatch):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana')
+    motor, cargas = motor_contando_cargas(usuario_id, monkeypatch)
+    motor.atualizar()
+    for dias in (1, 2, 3):
+        servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('1'), dia(dias), 'Em Aberto', usuario_id)
+    servicos.podar_alteracoes(manter=1)
+    assert [alerta[0] for alerta in motor.atualizar()] == [dia(1), dia(2), dia(3)]
+    assert len(cargas) == 2
+
+
+def test_dispensar_tira_o_item_da_lista(repositorio):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana')
+    servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('1'), dia(1), 'Em Aberto', usuario_id)
+    servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('2'), dia(2), 'Em Aberto', usuario_id)
+    motor = servicos.MotorAlertas(usuario_id)
+    motor.dispensar('pagamentos', motor.atualizar()[0][2])
+    assert [alerta[0] for alerta in motor.alertas()] == [dia(2)]
+
+
+def test_buscar_alertas_segue_o_motor(repositorio):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana')
+    servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('12.34'), dia(2), 'Em Aberto', usuario_id)
+    servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('1'), dia(20), 'Em Aberto', usuario_id)
+    # Recorrente iniciado há um ano: entra pela ocorrência de amanhã, não pela data gravada
+    inicio = servicos.somar_meses(date.today() + timedelta(days=1), -12)
+    servicos.cadastrar_projeto(cliente_id, 'Manutenção', 'Web', Decimal('50'), inicio.isoformat(), True, usuario_id)
+    pagamentos, projetos = servicos.buscar_alertas(usuario_id)
+    assert pagamentos == [('Ana', 'Pix', 1234, dia(2))]
+    assert projetos == [('Ana', 'Manutenção', servicos.somar_meses(inicio, 12).isoformat())]
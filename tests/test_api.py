@@ -0,0 +1,113 @@
+from base64 import b64encode
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('flask')
+
+import api
+import servicos
+from auxiliares import criar_cliente, criar_usuario
+
+
+def autorizacao(username='ana', password='segredo'):
+    return {'Authorization': 'Basic ' + b64encode(f"{username}:{password}".encode('utf-8')).decode('ascii')}
+
+
+@pytest.fixture
+def cliente_http(repositorio):
+    return api.criar_app().test_client()
+
+
+def test_exige_autenticacao(cliente_http):
+    criar_usuario()
+    assert cliente_http.get('/api/clientes').status_code == 401
+    resposta = cliente_http.get('/api/clientes', headers=autorizacao(password='errada'))
+    assert resposta.status_code == 401
+    assert resposta.headers['WWW-Authenticate'].startswith('Basic')
+
+
+def test_login_bloqueado_responde_429(cliente_http):
+    criar_usuario()
+    for _ in range(servicos.MAX_TENTATIVAS_LOGIN):
+        cliente_http.get('/api/clientes', headers=autorizacao(password='errada'))
+    assert cliente_http.get('/api/clientes', headers=autorizacao()).status_code == 429
+
+
+def test_paginacao_por_chave(cliente_http):
+    usuario_id = criar_usuario()
+    ids = [criar_cliente(usuario_id, f'Cliente {numero}') for numero in range(5)]
+    criar_cliente(criar_usuario('bruno'), 'De outro usuário')
+
+    primeira = cliente_http.get('/api/clientes?limite=2', headers=autorizacao()).get_json()
+    assert [item['id'] for item in primeira['itens']] == ids[:2]
+    assert primeira['proximo'] == ids[1]
+    segunda = cliente_http.get(f"/api/clientes?limite=2&depois={primeira['proximo']}", headers=autorizacao()).get_json()
+    assert [item['id'] for item in segunda['itens']] == ids[2:4]
+    ultima = cliente_http.get(f"/api/clientes?limite=2&depois={segunda['proximo']}", headers=autorizacao()).get_json()
+    assert [item['id'] for item in ultima['itens']] == ids[4:]
+    assert ultima['proximo'] is None
+
+
+def test_parametros_de_paginacao(cliente_http, monkeypatch):
+    usuario_id = criar_usuario()
+    for numero in range(4):
+        criar_cliente(usuario_id, f'Cliente {numero}')
+    monkeypatch.setattr(api, 'LIMITE_MAXIMO_API', 3)
+    assert len(cliente_http.get('/api/clientes?limite=500', headers=autorizacao()).get_json()['itens']) == 3
+    assert len(cliente_http.get('/api/clientes?limite=0', headers=autorizacao()).get_json()['itens']) == 1
+    assert cliente_http.get('/api/clientes?limite=dez', headers=autorizacao()).status_code == 400
+    assert cliente_http.get('/api/clientes?depois=x', headers=autorizacao()).status_code == 400
+
+
+def test_etag_responde_304_ate_os_dados_mudarem(cliente_http):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana')
+    primeira = cliente_http.get('/api/clientes', headers=autorizacao())
+    etag = primeira.headers['ETag']
+    assert primeira.status_code == 200 and etag
+
+    repetida = cliente_http.get('/api/clientes', headers={**autorizacao(), 'If-None-Match': etag})
+    assert repetida.status_code == 304
+    assert repetida.headers['ETag'] == etag
+
+    # Gravações de outro usuário não mudam a versão; as do próprio usuário, sim
+    criar_cliente(criar_usuario('bruno'), 'Bruno')
+    assert cliente_http.get('/api/clientes', headers={**autorizacao(), 'If-None-Match': etag}).status_code == 304
+    servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('1'), date.today().isoformat(), 'Pago', usuario_id)
+    atualizada = cliente_http.get('/api/clientes', headers={**autorizacao(), 'If-None-Match': etag})
+    assert atualizada.status_code == 200
+    assert atualizada.headers['ETag'] != etag
+
+
+def test_alertas(cliente_http):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana')
+    amanha = (date.today() + timedelta(days=1)).isoformat()
+    servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('12.30'), amanha, 'Em Aberto', usuario_id)
+    assert cliente_http.get('/api/alertas', headers=autorizacao()).get_json() == {
+        'pagamentos': [{'cliente': 'Ana', 'tipo_pagamento': 'Pix', 'valor': '12.30', 'data_pagamento': amanha}],
+        'projetos': [],
+    }
+
+
+def test_cache_de_credenciais_expira_e_descarta_os_mais_antigos(monkeypatch):
+    relogio = SimpleNamespace(agora=100.0)
+    monkeypatch.setattr(api, 'time', SimpleNamespace(monotonic=lambda: relogio.agora))
+    cache = api.CacheCredenciais(validade=10, max_usuarios=2)
+    cache.guardar('ana', 'segredo', 1)
+    assert cache.buscar('ana', 'segredo') == 1
+    assert cache.buscar('ana', 'errada') is None
+
+    cache.guardar('bruno', 'senha', 2)
+    cache.buscar('ana', 'segredo')
+    cache.guardar('carla', 'senha', 3)
+    # Bruno era o usado há mais tempo
+    assert cache.buscar('bruno', 'senha') is None
+    assert cache.buscar('ana', 'segredo') == 1
+
+    relogio.agora += 10
+    assert cache.buscar('ana', 'segredo') is None
+    assert cache.buscar('carla', 'senha') is None
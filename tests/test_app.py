@@ -0,0 +1,86 @@
+import locale
+import threading
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip('tkinter')
+pytest.importorskip('tkcalendar')
+try:
+    import app
+except locale.Error:
+    pytest.skip("locale pt_BR.UTF-8 indisponível", allow_module_level=True)
+
+import servicos
+from auxiliares import criar_cliente, criar_usuario
+
+
+class ArvoreFalsa:
+    # Só o que ListaProjetos usa de um ttk.Treeview
+    def __init__(self):
+        self.linhas = []
+
+    def winfo_exists(self):
+        return True
+
+    def get_children(self):
+        return [iid for iid, _ in self.linhas]
+
+    def exists(self, iid):
+        return iid in self.get_children()
+
+    def index(self, iid):
+        return self.get_children().index(iid)
+
+    def delete(self, *iids):
+        self.linhas = [linha for linha in self.linhas if linha[0] not in iids]
+
+    def insert(self, pai, posicao, iid, values):
+        self.linhas.insert(len(self.linhas) if posicao == app.END else posicao, (iid, values))
+
+    def selection(self):
+        return ()
+
+
+class ExecutorEmThread:
+    # Como o ExecutorBD, roda a tarefa em outra thread (com outra conexão) e o retorno na principal
+    def submeter(self, funcao, *args, ao_concluir=None, ao_falhar=None, **kwargs):
+        resultado = []
+        thread = threading.Thread(target=lambda: resultado.append(funcao(*args, **kwargs)))
+        thread.start()
+        thread.join()
+        if ao_concluir:
+            ao_concluir(resultado[0])
+
+
+def test_edicao_propria_nao_recarrega_a_lista_de_projetos(repositorio):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana')
+    for nome, data in (('Site', '2024-03-01'), ('Loja', '2024-05-01')):
+        servicos.cadastrar_projeto(cliente_id, nome, 'Web', Decimal('10'), data, False, usuario_id)
+    site, loja = [linha[0] for linha in servicos.bd.conexao().execute("SELECT id FROM projetos ORDER BY id")]
+    executor = ExecutorEmThread()
+    lista = app.ListaProjetos(ArvoreFalsa(), executor)
+    recargas = []
+    recarregar = lista.recarregar
+    lista.recarregar = lambda: (recargas.append(1), recarregar())
+
+    lista.exibir(usuario_id)
+    assert lista.tree.get_children() == [str(site), str(loja)]
+
+    executor.submeter(servicos.editar_projeto, site, 'Site novo', 'Web', Decimal('10'), '2024-06-01', False, usuario_id,
+                      ao_concluir=lambda _: lista.atualizar_linha(site))
+    lista.exibir(usuario_id)
+    assert len(recargas) == 1
+    assert lista.tree.get_children() == [str(loja), str(site)]
+
+    executor.submeter(servicos.excluir_projeto, loja, usuario_id, ao_concluir=lambda _: lista.remover_linha(loja))
+    lista.exibir(usuario_id)
+    assert len(recargas) == 1
+    assert lista.tree.get_children() == [str(site)]
+
+    # Gravação que a janela não acompanhou: a lista é recarregada
+    executor.submeter(servicos.cadastrar_projeto, cliente_id, 'Blog', 'Web', Decimal('5'), '2024-01-01', False, usuario_id)
+    lista.exibir(usuario_id)
+    assert len(recargas) == 2
+    assert len(lista.tree.get_children()) == 2
@@ -0,0 +1,49 @@
+import servicos
+from auxiliares import consultar, criar_cliente, criar_usuario
+
+
+def nomes(clientes):
+    return [nome for _, nome in clientes]
+
+
+def test_busca_por_prefixo_sem_acentos(repositorio):
+    usuario_id = criar_usuario()
+    jose = criar_cliente(usuario_id, 'José da Silva', 'jose@exemplo.com', '11 9999-0000')
+    criar_cliente(usuario_id, 'Maria Souza', 'maria@exemplo.com')
+    assert servicos.buscar_clientes(usuario_id, 'jos') == [(jose, 'José da Silva')]
+    assert nomes(servicos.buscar_clientes(usuario_id, 'silva jo')) == ['José da Silva']
+    # A busca exata vem primeiro; a aproximada ("exe"*) completa com os outros
+    assert nomes(servicos.buscar_clientes(usuario_id, 'maria@exemplo')) == ['Maria Souza', 'José da Silva']
+    # Texto sem termos devolve os primeiros clientes do diretório
+    assert nomes(servicos.buscar_clientes(usuario_id, '  ')) == ['José da Silva', 'Maria Souza']
+
+
+def test_busca_aproximada_completa_os_resultados(repositorio):
+    usuario_id = criar_usuario()
+    criar_cliente(usuario_id, 'Mariana Lopes')
+    criar_cliente(usuario_id, 'Marcos Lima')
+    # "mariza" não existe; a busca aproximada usa o prefixo "mar"
+    assert sorted(nomes(servicos.buscar_clientes(usuario_id, 'mariza'))) == ['Marcos Lima', 'Mariana Lopes']
+
+
+def test_busca_acompanha_edicao_e_exclusao(repositorio):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Antigo Nome')
+    servicos.editar_cliente(cliente_id, 'Novo Nome', '', '', usuario_id)
+    assert servicos.buscar_clientes(usuario_id, 'antigo') == []
+    assert nomes(servicos.buscar_clientes(usuario_id, 'novo')) == ['Novo Nome']
+    servicos.excluir_cliente(cliente_id, usuario_id)
+    assert servicos.buscar_clientes(usuario_id, 'novo') == []
+
+
+def test_busca_filtra_o_usuario_dentro_do_indice(repositorio):
+    ana = criar_usuario()
+    bruno = criar_usuario('bruno')
+    # Os clientes de outro usuário casam melhor com a busca e são muitos mais que o limite
+    repositorio.inserir_em_lote('clientes', [(f'Silva Silva {numero}', 'silva@silva.com', '', bruno) for numero in range(50)])
+    criar_cliente(ana, 'Pedro Silva')
+    assert nomes(servicos.buscar_clientes(ana, 'silva', limite=5)) == ['Pedro Silva']
+    assert len(servicos.buscar_clientes(bruno, 'silva', limite=5)) == 5
+
+    plano = " ".join(linha[-1] for linha in consultar(f"EXPLAIN QUERY PLAN {servicos.CONSULTA_BUSCA_CLIENTES}", ('"silva"*', ana, 5)))
+    assert "clientes_fts" in plano and "clientes c" not in plano
@@ -0,0 +1,56 @@
+import logging
+import sqlite3
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+import cli
+import servicos
+from auxiliares import consultar, criar_cliente, criar_usuario
+
+
+def test_saida_da_cli_tem_so_os_dados(repositorio, capsys, caplog):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Cliente A')
+    amanha = date.today() + timedelta(days=1)
+    servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('12.34'), amanha.isoformat(), 'Em Aberto', usuario_id)
+    servicos.bd.fechar_todas()
+    capsys.readouterr()
+
+    with caplog.at_level(logging.DEBUG):
+        assert cli.main(['--banco', servicos.bd.caminho, 'alertas', '--usuario', 'ana']) == 0
+    saida = capsys.readouterr().out
+    assert saida.splitlines() == [f"Pagamento\t{amanha.strftime('%d-%m-%Y')}\tCliente A\tPix\t{servicos.formatar_centavos(1234)}"]
+    # A mensagem de conexão aberta continua disponível, mas no logging
+    assert any('Conexão ao banco' in mensagem for mensagem in caplog.messages)
+
+
+def test_estatisticas_comecam_pelos_totais(repositorio, capsys):
+    criar_usuario()
+    servicos.bd.fechar_todas()
+    capsys.readouterr()
+    assert cli.main(['--banco', servicos.bd.caminho, 'estatisticas', '--usuario', 'ana']) == 0
+    assert capsys.readouterr().out.startswith("Pago: ")
+
+
+def test_migracao_com_erro_interrompe(repositorio, monkeypatch):
+    versao = consultar("PRAGMA user_version")[0][0]
+
+    def migracao_com_erro(conn):
+        conn.execute("CREATE TABLE tabela_nova (id INTEGER)")
+        conn.execute("SELECT * FROM tabela_inexistente")
+
+    monkeypatch.setattr(servicos, 'MIGRACOES', servicos.MIGRACOES + [migracao_com_erro])
+    with pytest.raises(sqlite3.OperationalError):
+        servicos.criar_tabelas()
+    assert consultar("PRAGMA user_version")[0][0] == versao
+    assert consultar("SELECT name FROM sqlite_master WHERE name = 'tabela_nova'") == []
+
+
+def test_cli_sai_com_erro_se_a_migracao_falha(repositorio, monkeypatch, capsys):
+    monkeypatch.setattr(servicos, 'MIGRACOES', servicos.MIGRACOES + [["SELECT * FROM tabela_inexistente"]])
+    assert cli.main(['--banco', servicos.bd.caminho, 'estatisticas', '--usuario', 'ana']) == 1
+    saida = capsys.readouterr()
+    assert saida.out == ""
+    assert "tabela_inexistente" in saida.err
@@ -0,0 +1,71 @@
+import sqlite3
+import threading
+
+import servicos
+from auxiliares import criar_cliente, criar_usuario
+
+
+def gravar_por_fora(usuario_id, nome):
+    # Simula outro processo gravando no banco, sem passar por servicos
+    conn = sqlite3.connect(servicos.bd.caminho)
+    with conn:
+        conn.execute("INSERT INTO clientes (nome, email, telefone, usuario_id) VALUES (?, '', '', ?)",
+                     (nome, usuario_id))
+    conn.close()
+
+
+def nomes(usuario_id):
+    return [cliente[1] for cliente in servicos.diretorio_clientes.clientes(usuario_id)]
+
+
+def em_outra_thread(funcao):
+    thread = threading.Thread(target=funcao)
+    thread.start()
+    thread.join()
+
+
+def test_gravacao_externa_invalida_o_cache(repositorio):
+    usuario_id = criar_usuario()
+    criar_cliente(usuario_id, 'Ana')
+    assert nomes(usuario_id) == ['Ana']
+    gravar_por_fora(usuario_id, 'Bruno')
+    assert nomes(usuario_id) == ['Ana', 'Bruno']
+
+
+def test_primeira_chamada_da_thread_nao_usa_cache_antigo(repositorio):
+    usuario_id = criar_usuario()
+    criar_cliente(usuario_id, 'Ana')
+    em_outra_thread(lambda: nomes(usuario_id))
+    gravar_por_fora(usuario_id, 'Bruno')
+    assert nomes(usuario_id) == ['Ana', 'Bruno']
+
+
+def test_gravacao_durante_a_carga_nao_fica_no_cache(repositorio, monkeypatch):
+    usuario_id = criar_usuario()
+    criar_cliente(usuario_id, 'Ana')
+    nomes(usuario_id)
+    servicos.diretorio_clientes.invalidar()
+    original = servicos.versao_banco
+    chamadas = []
+
+    def versao_com_gravacao():
+        chamadas.append(1)
+        # A segunda leitura acontece depois do SELECT: grava antes dela
+        if len(chamadas) == 2:
+            gravar_por_fora(usuario_id, 'Bruno')
+        return original()
+
+    monkeypatch.setattr(servicos, 'versao_banco', versao_com_gravacao)
+    assert nomes(usuario_id) == ['Ana']
+    monkeypatch.setattr(servicos, 'versao_banco', original)
+    assert nomes(usuario_id) == ['Ana', 'Bruno']
+
+
+def test_pagina_sem_cache_usa_os_ids_lidos(repositorio):
+    usuario_id = criar_usuario()
+    for nome in ('Ana', 'Bruno', 'Carla'):
+        criar_cliente(usuario_id, nome)
+    primeira = servicos.diretorio_clientes.pagina(usuario_id, limite=2)
+    assert [cliente[1] for cliente in primeira] == ['Ana', 'Bruno']
+    seguinte = servicos.diretorio_clientes.pagina(usuario_id, primeira[-1][0], limite=2)
+    assert [cliente[1] for cliente in seguinte] == ['Carla']
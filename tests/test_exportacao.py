@@ -0,0 +1,129 @@
+import csv
+import inspect
+from decimal import Decimal
+from xml.etree import ElementTree
+
+import pytest
+
+import servicos
+from auxiliares import criar_cliente, criar_usuario
+
+
+@pytest.fixture
+def relatorio(repositorio):
+    # Um cliente com 2500 pagamentos (mais de dois lotes de exportação) e um projeto
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana & <Filhos>', 'ana@exemplo.com', '1111')
+    repositorio.inserir_em_lote('pagamentos', [(cliente_id, 'Pix', 100 + numero, f'2024-{numero % 12 + 1:02d}-10', 'Pago', usuario_id)
+                                               for numero in range(2500)])
+    servicos.cadastrar_projeto(cliente_id, 'Site', 'Web', Decimal('50'), '2024-06-01', False, usuario_id)
+    return usuario_id, cliente_id
+
+
+def dados(relatorio, tipo='Ambos'):
+    usuario_id, cliente_id = relatorio
+    return servicos.iterar_dados_relatorio(usuario_id, cliente_id, tipo, '2024-01-01', '2024-12-31')
+
+
+def test_exportar_csv(relatorio, tmp_path):
+    caminho = tmp_path / 'relatorio.csv'
+    progresso = []
+    assert servicos.exportar_csv(dados(relatorio), caminho, progresso=progresso.append) == 2501
+    assert progresso == [1000, 2000, 2501]
+
+    with open(caminho, newline='', encoding='utf-8') as file:
+        linhas = list(csv.reader(file))
+    assert linhas[0] == servicos.CABECALHO_CSV
+    assert len(linhas) == 2502
+    assert linhas[1][:4] == [str(relatorio[1]), 'Ana & <Filhos>', 'ana@exemplo.com', '1111']
+    assert linhas[1][6:9] == ['1.00', '2024-01-10', 'Pago']
+    assert linhas[-1][4:8] == [linhas[-1][4], 'Web', '50.00', '2024-06-01']
+    # Pagamentos em ordem de data
+    datas = [linha[7] for linha in linhas[1:-1]]
+    assert datas == sorted(datas)
+
+
+def test_gerar_csv_em_blocos_igual_ao_arquivo(relatorio, tmp_path):
+    caminho = tmp_path / 'relatorio.csv'
+    servicos.exportar_csv(dados(relatorio), caminho)
+    blocos = list(servicos.gerar_csv(dados(relatorio)))
+    assert len(blocos) == 3
+    with open(caminho, newline='', encoding='utf-8') as file:
+        assert "".join(blocos) == file.read()
+
+
+def test_linhas_do_relatorio_vem_de_um_gerador(relatorio):
+    linhas = dados(relatorio, 'Pagamentos')
+    assert inspect.isgenerator(linhas)
+    assert next(linhas)[6] == Decimal('1.00')
+    assert sum(1 for _ in linhas) == 2499
+
+
+def test_exportar_xml(relatorio, tmp_path):
+    caminho = tmp_path / 'relatorio.xml'
+    progresso = []
+    assert servicos.exportar_xml(dados(relatorio), caminho, progresso=progresso.append) == 2501
+    assert progresso == [1000, 2000, 2501]
+
+    raiz = ElementTree.parse(caminho).getroot()
+    clientes = raiz.findall('Cliente')
+    assert raiz.tag == 'Clientes' and len(clientes) == 2501
+    primeiro = clientes[0]
+    assert primeiro.findtext('Nome') == 'Ana & <Filhos>'
+    assert primeiro.findtext('Pagamento/Valor') == '1.00'
+    assert primeiro.findtext('Pagamento/Data') == '2024-01-10'
+    assert clientes[-1].findtext('Pagamento/TipoPagamento') == 'Web'
+
+
+def test_exportar_xml_campos_vazios(tmp_path):
+    caminho = tmp_path / 'vazio.xml'
+    linhas = [(1, 'Cliente', None, None, 7, 'Pix', Decimal('2.50'), '2024-01-01', 'Pago')]
+    assert servicos.exportar_xml(linhas, caminho) == 1
+    cliente = ElementTree.parse(caminho).getroot().find('Cliente')
+    assert cliente.find('Email').text is None
+    assert cliente.findtext('Pagamento/PagamentoID') == '7'
+
+    assert servicos.exportar_xml([], caminho) == 0
+    assert ElementTree.parse(caminho).getroot().findall('Cliente') == []
+
+
+def linhas_pdf(quantidade):
+    # Clientes de tamanhos variados, para que as partes comecem no meio de clientes e de páginas
+    tamanhos = [1, 3, 40, 7, 120, 2, 65]
+    numero = 0
+    cliente_id = 0
+    while numero < quantidade:
+        cliente_id += 1
+        for _ in range(tamanhos[cliente_id % len(tamanhos)]):
+            numero += 1
+            yield (cliente_id, f'Cliente {cliente_id}', f'c{cliente_id}@exemplo.com', '1199', numero, 'Pix',
+                   Decimal(numero % 9000 + 1) / 100, '2024-05-01', 'Pago')
+            if numero >= quantidade:
+                return
+
+
+def textos_pdf(pypdf, caminho):
+    # Uma parte que começa no meio de uma página é sobreposta à anterior, então a ordem do texto na página muda
+    return [sorted(pagina.extract_text().split('\n')) for pagina in pypdf.PdfReader(caminho).pages]
+
+
+def test_pdf_em_partes_igual_ao_sequencial(tmp_path, monkeypatch):
+    pypdf = pytest.importorskip('pypdf')
+    monkeypatch.setattr(servicos, 'LINHAS_POR_PARTE_PDF', 97)
+    sequencial = tmp_path / 'sequencial.pdf'
+    partes = tmp_path / 'partes.pdf'
+    assert servicos.exportar_pdf(linhas_pdf(500), sequencial, processos=1) == 500
+    progresso = []
+    assert servicos.exportar_pdf(linhas_pdf(500), partes, progresso=progresso.append, processos=2) == 500
+    assert sorted(progresso) == progresso and progresso[-1] == 500
+
+    esperado = textos_pdf(pypdf, sequencial)
+    assert len(esperado) > 5
+    assert textos_pdf(pypdf, partes) == esperado
+    assert f"Página {len(esperado)}/{len(esperado)}" in esperado[-1]
+
+
+def test_pdf_pequeno_nao_abre_processos(tmp_path, monkeypatch):
+    monkeypatch.setattr(servicos, '_exportar_pdf_em_partes', None)
+    assert servicos.exportar_pdf(linhas_pdf(20), tmp_path / 'pequeno.pdf', processos=4) == 20
+    assert (tmp_path / 'pequeno.pdf').stat().st_size > 0
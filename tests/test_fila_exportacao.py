@@ -0,0 +1,112 @@
+import os
+import queue
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+import servicos
+from auxiliares import criar_cliente, criar_usuario
+
+
+@pytest.fixture
+def clientes(repositorio):
+    usuario_id = criar_usuario()
+    ids = [criar_cliente(usuario_id, nome) for nome in ('Ana', 'Bruno', 'Carla')]
+    for cliente_id in ids:
+        servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal('10'), '2024-01-10', 'Pago', usuario_id)
+    return usuario_id, ids
+
+
+class EventosQueCancelam(queue.Queue):
+    # Pede o cancelamento assim que um cliente inteiro já foi gravado
+    def __init__(self, cancelamento, apos_linhas):
+        super().__init__()
+        self.cancelamento = cancelamento
+        self.apos_linhas = apos_linhas
+
+    def put(self, evento, *args, **kwargs):
+        super().put(evento, *args, **kwargs)
+        if evento[2] >= self.apos_linhas:
+            self.cancelamento.set()
+
+
+def exportar_lote(clientes, destino, eventos, cancelamento):
+    usuario_id, _ = clientes
+    return servicos._executar_exportacao(servicos.bd.caminho, (1, 'csv'), 'csv', destino, usuario_id, None, 'Ambos',
+                                         '2024-01-01', '2024-12-31', True, 1, eventos, cancelamento)
+
+
+def test_cancelamento_apaga_os_arquivos_ja_gravados(clientes, tmp_path):
+    destino = str(tmp_path / 'lote')
+    cancelamento = threading.Event()
+    with pytest.raises(servicos.ExportacaoCancelada):
+        exportar_lote(clientes, destino, EventosQueCancelam(cancelamento, 1), cancelamento)
+    assert not os.path.exists(destino)
+
+
+def test_cancelamento_mantem_diretorio_que_ja_existia(clientes, tmp_path):
+    destino = tmp_path / 'lote'
+    destino.mkdir()
+    (destino / 'outro.txt').write_text('x')
+    cancelamento = threading.Event()
+    with pytest.raises(servicos.ExportacaoCancelada):
+        exportar_lote(clientes, str(destino), EventosQueCancelam(cancelamento, 2), cancelamento)
+    assert os.listdir(destino) == ['outro.txt']
+
+
+def test_trabalho_cancelado_antes_de_comecar_nao_grava_nada(clientes, tmp_path):
+    cancelamento = threading.Event()
+    cancelamento.set()
+    eventos = queue.Queue()
+    with pytest.raises(servicos.ExportacaoCancelada):
+        exportar_lote(clientes, str(tmp_path / 'lote'), eventos, cancelamento)
+    assert eventos.empty()
+    assert not os.path.exists(tmp_path / 'lote')
+
+
+def esperar(fila, limite=120):
+    fim = time.monotonic() + limite
+    while fila.pendentes():
+        assert time.monotonic() < fim, "exportação não terminou"
+        fila.atualizar()
+        time.sleep(0.05)
+    fila.atualizar()
+
+
+def test_fila_conclui_e_cancela_trabalhos(clientes, tmp_path):
+    usuario_id, ids = clientes
+    fila = servicos.FilaExportacao(processos=1, processos_pdf=1, pdfs_simultaneos=1)
+    try:
+        concluido = fila.submeter("Ana", {'csv': str(tmp_path / 'ana.csv')}, usuario_id, ids[0], 'Ambos',
+                                  '2024-01-01', '2024-12-31')
+        cancelado = fila.submeter("Todos", {'csv': str(tmp_path / 'todos'), 'xml': str(tmp_path / 'todos_xml')},
+                                  usuario_id, None, 'Ambos', '2024-01-01', '2024-12-31')
+        fila.cancelar(cancelado.id)
+        esperar(fila)
+
+        tarefa = concluido.tarefas['csv']
+        assert (tarefa.estado, tarefa.linhas) == (servicos.CONCLUIDO, 1)
+        assert os.path.isfile(tmp_path / 'ana.csv')
+        assert {tarefa.estado for tarefa in cancelado.tarefas.values()} == {servicos.CANCELADO}
+        assert not os.path.exists(tmp_path / 'todos') and not os.path.exists(tmp_path / 'todos_xml')
+
+        # Eventos atrasados de trabalhos removidos ou de tarefas encerradas são ignorados
+        fila.remover_encerrados()
+        assert fila.trabalhos == {}
+        fila._eventos.put(((concluido.id, 'csv'), servicos.EM_ANDAMENTO, 0))
+        fila.trabalhos[cancelado.id] = cancelado
+        fila._eventos.put(((cancelado.id, 'csv'), servicos.EM_ANDAMENTO, 5))
+        fila._eventos.put(((cancelado.id, 'xml'), servicos.EM_ANDAMENTO, 5))
+        assert fila.atualizar() == []
+        assert cancelado.tarefas['csv'].estado == servicos.CANCELADO
+    finally:
+        fila.encerrar()
+
+
+def test_formato_invalido_e_recusado(clientes, tmp_path):
+    fila = servicos.FilaExportacao()
+    with pytest.raises(ValueError):
+        fila.submeter("Ana", {'docx': str(tmp_path / 'ana.docx')}, clientes[0], clientes[1][0], 'Ambos', '2024-01-01', '2024-12-31')
+    assert fila.trabalhos == {}
@@ -0,0 +1,83 @@
+import csv
+
+import pytest
+
+import servicos
+from auxiliares import consultar, criar_cliente, criar_usuario
+
+
+def gravar(caminho, texto):
+    caminho.write_text(texto, encoding='utf-8-sig')
+    return str(caminho)
+
+
+def rejeitados(resultado):
+    with open(resultado.arquivo_rejeitados, newline='', encoding='utf-8') as file:
+        return [(int(linha['linha']), linha['motivo']) for linha in csv.DictReader(file)]
+
+
+def test_importar_clientes_com_ponto_e_virgula(repositorio, tmp_path):
+    usuario_id = criar_usuario()
+    arquivo = gravar(tmp_path / 'clientes.csv', " Nome ;EMAIL;Telefone\nAna;ana@exemplo.com;1111\nBruno;;\n;sem@nome.com;2222\n")
+    resultado = servicos.importar_csv('clientes', arquivo, usuario_id)
+    assert (resultado.inseridos, resultado.rejeitados) == (2, 1)
+    assert consultar("SELECT nome, email, telefone FROM clientes ORDER BY id") == [('Ana', 'ana@exemplo.com', '1111'), ('Bruno', '', '')]
+    assert rejeitados(resultado) == [(4, "campo 'nome' vazio")]
+    # A busca e o diretório de clientes já enxergam os importados
+    assert [nome for _, nome in servicos.buscar_clientes(usuario_id, 'bru')] == ['Bruno']
+    assert len(servicos.diretorio_clientes.clientes(usuario_id)) == 2
+
+
+def test_importar_pagamentos_rejeita_linhas_invalidas(repositorio, tmp_path):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id)
+    outro_cliente = criar_cliente(criar_usuario('bruno'), 'Cliente do Bruno')
+    arquivo = gravar(tmp_path / 'pagamentos.csv', "\n".join([
+        "cliente_id,tipo_pagamento,valor,data_pagamento,status",
+        f"{cliente_id},Pix,\"R$ 1.234,56\",05/01/2024,Pago",
+        f"{cliente_id},\"Boleto\nem duas linhas\",10.00,2024-02-01,Em Aberto",
+        f"{cliente_id},Pix,10.00,2024-02-01,Cancelado",
+        f"{outro_cliente},Pix,10.00,2024-02-01,Pago",
+        f"{cliente_id},Pix,dez,2024-02-01,Pago",
+        f"{cliente_id},Pix,10.00,31/02/2024,Pago",
+        "abc,Pix,10.00,2024-02-01,Pago",
+    ]) + "\n")
+    resultado = servicos.importar_csv('pagamentos', arquivo, usuario_id)
+    assert (resultado.inseridos, resultado.rejeitados) == (2, 5)
+    assert consultar("SELECT tipo_pagamento, valor, data_pagamento FROM pagamentos ORDER BY id") == [
+        ('Pix', 123456, '2024-01-05'), ('Boleto\nem duas linhas', 1000, '2024-02-01')]
+    # Os números são das linhas físicas do arquivo, contando a quebra dentro das aspas
+    linhas = rejeitados(resultado)
+    assert [numero for numero, _ in linhas] == [5, 6, 7, 8, 9]
+    assert linhas[0][1] == "status inválido: 'Cancelado'"
+    assert linhas[1][1] == f"cliente {outro_cliente} não encontrado"
+    assert linhas[2][1] == "valor inválido: 'dez'"
+    assert linhas[3][1].startswith("Data inválida")
+    assert linhas[4][1].startswith("cliente_id inválido")
+    assert resultado.exemplos_rejeitados == linhas
+
+
+def test_importar_projetos_em_lotes(repositorio, tmp_path):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id)
+    linhas = [f"{cliente_id},Projeto {numero},Web,{numero}.50,2024-{numero % 12 + 1:02d}-15,{'sim' if numero % 2 else 'não'}"
+              for numero in range(25)]
+    arquivo = gravar(tmp_path / 'projetos.csv', "cliente_id,nome_projeto,tipo_projeto,valor,data_entrega,recorrente\n" + "\n".join(linhas))
+    progresso = []
+    resultado = servicos.importar_csv('projetos', arquivo, usuario_id, progresso=progresso.append, tamanho_lote=10)
+    assert resultado.inseridos == 25 and resultado.rejeitados == 0
+    assert resultado.arquivo_rejeitados is None
+    assert progresso == [10, 20, 25]
+    assert consultar("SELECT SUM(recorrente), SUM(valor) FROM projetos") == [(12, sum(numero * 100 + 50 for numero in range(25)))]
+
+    resumos = consultar("SELECT * FROM resumo_projetos ORDER BY 1, 2")
+    servicos.reconstruir_resumos()
+    assert consultar("SELECT * FROM resumo_projetos ORDER BY 1, 2") == resumos
+
+
+def test_importar_sem_colunas_obrigatorias(repositorio, tmp_path):
+    usuario_id = criar_usuario()
+    arquivo = gravar(tmp_path / 'pagamentos.csv', "cliente_id,valor\n1,10\n")
+    with pytest.raises(ValueError, match="tipo_pagamento"):
+        servicos.importar_csv('pagamentos', arquivo, usuario_id)
+    assert consultar("SELECT COUNT(*) FROM pagamentos") == [(0,)]
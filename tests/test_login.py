@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import servicos
+from auxiliares import criar_usuario
+
+
+class Relogio(datetime):
+    agora = datetime(2024, 1, 1, 12, 0, 0)
+
+    @classmethod
+    def now(cls, tz=None):
+        return cls.agora
+
+    @classmethod
+    def avancar(cls, segundos):
+        cls.agora += timedelta(seconds=segundos)
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    monkeypatch.setattr(Relogio, 'agora', datetime(2024, 1, 1, 12, 0, 0))
+    monkeypatch.setattr(servicos, 'datetime', Relogio)
+    return Relogio
+
+
+def falhar(controle, username, vezes):
+    for _ in range(vezes):
+        controle.registrar_falha(username)
+
+
+def test_bloqueia_apos_o_limite_e_dobra_o_tempo(relogio):
+    controle = servicos.ControleTentativas(max_tentativas=3, bloqueio_inicial=30, bloqueio_maximo=100)
+    falhar(controle, 'ana', 2)
+    controle.verificar('ana')
+    falhar(controle, 'ana', 1)
+    with pytest.raises(servicos.LoginBloqueado, match="30 segundos"):
+        controle.verificar('ana')
+    controle.verificar('bruno')
+
+    relogio.avancar(30)
+    controle.verificar('ana')
+    falhar(controle, 'ana', 1)
+    with pytest.raises(servicos.LoginBloqueado, match="60 segundos"):
+        controle.verificar('ana')
+    relogio.avancar(60)
+    falhar(controle, 'ana', 1)
+    with pytest.raises(servicos.LoginBloqueado, match="100 segundos"):
+        controle.verificar('ana')
+
+
+def test_sucesso_e_tempo_sem_falhas_zeram_a_contagem(relogio):
+    controle = servicos.ControleTentativas(max_tentativas=3, esquecer_apos=60)
+    falhar(controle, 'ana', 2)
+    controle.registrar_sucesso('ana')
+    falhar(controle, 'ana', 2)
+    controle.verificar('ana')
+
+    relogio.avancar(61)
+    falhar(controle, 'ana', 2)
+    controle.verificar('ana')
+    falhar(controle, 'ana', 1)
+    with pytest.raises(servicos.LoginBloqueado):
+        controle.verificar('ana')
+
+
+def test_quantidade_de_usuarios_acompanhados_e_limitada(relogio):
+    controle = servicos.ControleTentativas(max_tentativas=1, max_usuarios=3)
+    for username in ('a', 'b', 'c', 'd'):
+        falhar(controle, username, 1)
+    assert list(controle._falhas) == ['b', 'c', 'd']
+    # O mais antigo foi descartado e não está mais bloqueado
+    controle.verificar('a')
+    with pytest.raises(servicos.LoginBloqueado):
+        controle.verificar('d')
+
+
+def test_login_bloqueado_nem_confere_a_senha(repositorio, relogio, monkeypatch):
+    usuario_id = criar_usuario()
+    for _ in range(servicos.MAX_TENTATIVAS_LOGIN):
+        assert servicos.verificar_login('ana', 'errada') is None
+    with monkeypatch.context() as m:
+        m.setattr(servicos.bcrypt, 'checkpw', lambda *args: pytest.fail("senha conferida durante o bloqueio"))
+        with pytest.raises(servicos.LoginBloqueado):
+            servicos.verificar_login('ana', 'segredo')
+    servicos.tentativas_login.registrar_sucesso('ana')
+    assert servicos.verificar_login('ana', 'segredo') == usuario_id
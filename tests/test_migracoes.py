@@ -0,0 +1,128 @@
+import sqlite3
+from decimal import ROUND_HALF_UP, Decimal
+
+import pytest
+
+import servicos
+from auxiliares import consultar, criar_cliente, criar_usuario
+
+
+@pytest.fixture
+def banco_legado(tmp_path, monkeypatch):
+    # Banco com o esquema anterior às migrações: valores decimais, datas no formato de entrada e user_version 0
+    caminho = str(tmp_path / 'legado.db')
+    conn = sqlite3.connect(caminho)
+    servicos._migracao_tabelas_iniciais(conn)
+    conn.execute("INSERT INTO usuarios (id, username, password) VALUES (1, 'ana', 'x')")
+    conn.execute("INSERT INTO clientes (id, nome, email, telefone, usuario_id) VALUES (1, 'Cliente A', '', '', 1)")
+    conn.executemany("INSERT INTO pagamentos (cliente_id, tipo_pagamento, valor, data_pagamento, status, usuario_id) VALUES (1, 'Pix', ?, ?, ?, 1)",
+                     [(10.5, '05-01-2024', 'Pago'), ('R$ 1.234,56', '31/12/2023', 'Em Aberto'), ('0.125', '2024-02-10', 'Pago'),
+                      ('abc', 'sem data', 'Pago')])
+    conn.executemany("INSERT INTO projetos (cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id) VALUES (1, ?, 'Web', ?, ?, ?, 1)",
+                     [('Site', 99.999, '15/03/2024', 0), ('Manutenção', '150', '31-01-2024', 1)])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(servicos.bd, 'caminho', caminho)
+    servicos.diretorio_clientes.invalidar()
+    yield caminho
+    servicos.bd.fechar_todas()
+
+
+def indices(tabela):
+    return {linha[1] for linha in consultar(f"PRAGMA index_list({tabela})")}
+
+
+def test_migracoes_levam_banco_legado_a_versao_atual(banco_legado):
+    servicos.criar_tabelas()
+    assert consultar("PRAGMA user_version")[0][0] == len(servicos.MIGRACOES)
+    assert {'idx_pagamentos_usuario_cliente', 'idx_pagamentos_usuario_status_data', 'idx_pagamentos_usuario_data',
+            'idx_pagamentos_cliente_pagina'} <= indices('pagamentos')
+    assert {'idx_projetos_usuario_data', 'idx_projetos_usuario_cliente', 'idx_projetos_usuario_pagina'} <= indices('projetos')
+    assert 'idx_clientes_usuario' in indices('clientes')
+    assert consultar("SELECT COUNT(*) FROM pagamentos") == [(4,)]
+    assert consultar("SELECT COUNT(*) FROM projetos") == [(2,)]
+
+    # Rodar de novo não reaplica nada
+    servicos.criar_tabelas()
+    assert consultar("PRAGMA user_version")[0][0] == len(servicos.MIGRACOES)
+
+
+def test_consultas_frequentes_usam_indices(repositorio):
+    planos = {
+        'alertas': (servicos.CONSULTA_ALERTAS_PAGAMENTOS, ('2024-01-01', 1)),
+        'pagina': ("SELECT id FROM pagamentos WHERE usuario_id = ? AND cliente_id = ? AND id > ? ORDER BY id LIMIT 10", (1, 1, 0)),
+        'projetos': ("SELECT id FROM projetos WHERE usuario_id = ? AND id > ? ORDER BY id LIMIT 10", (1, 0)),
+    }
+    for nome, (consulta, parametros) in planos.items():
+        plano = " ".join(linha[-1] for linha in consultar(f"EXPLAIN QUERY PLAN {consulta}", parametros))
+        assert "USING" in plano and "SCAN p " not in plano and "SCAN pagamentos" not in plano, (nome, plano)
+
+
+def test_podar_alteracoes(repositorio):
+    with servicos.transacao() as conn:
+        conn.executemany("INSERT INTO alteracoes (tabela, registro_id, usuario_id) VALUES ('pagamentos', ?, 1)",
+                         [(numero,) for numero in range(10)])
+    servicos.podar_alteracoes(manter=20)
+    assert consultar("SELECT COUNT(*) FROM alteracoes") == [(10,)]
+
+    servicos.podar_alteracoes(manter=3)
+    assert consultar("SELECT registro_id FROM alteracoes ORDER BY seq") == [(7,), (8,), (9,)]
+
+
+@pytest.mark.parametrize('entrada, esperado', [
+    ('2024-02-29', '2024-02-29'), ('05-01-2024', '2024-01-05'), ('31/12/2023', '2023-12-31'), ('07/03/24', '2024-03-07'),
+])
+def test_normalizar_data(entrada, esperado):
+    assert servicos.normalizar_data(entrada) == esperado
+
+
+@pytest.mark.parametrize('entrada', ['2024-02-30', '31/02/2024', 'amanhã', ''])
+def test_normalizar_data_recusa_datas_invalidas(entrada):
+    with pytest.raises(ValueError):
+        servicos.normalizar_data(entrada)
+
+
+def test_tarefa_de_dados_converte_datas_legadas_para_iso(banco_legado):
+    servicos.criar_tabelas()
+    servicos.executar_tarefas_dados()
+    assert consultar("SELECT data_pagamento FROM pagamentos ORDER BY id") == [
+        ('2024-01-05',), ('2023-12-31',), ('2024-02-10',), ('sem data',)]
+    assert consultar("SELECT data_entrega FROM projetos ORDER BY id") == [('2024-03-15',), ('2024-01-31',)]
+    assert consultar("SELECT nome FROM tarefas_dados") == [('datas_iso',)]
+
+    # Os gatilhos acompanham a troca das datas: os resumos ficam iguais aos reconstruídos
+    resumos = consultar("SELECT * FROM resumo_pagamentos ORDER BY 1, 2, 3, 4")
+    servicos.reconstruir_resumos()
+    assert consultar("SELECT * FROM resumo_pagamentos ORDER BY 1, 2, 3, 4") == resumos
+    assert servicos.iniciar_tarefas_dados() is None
+
+
+def test_migracao_converte_valores_para_centavos(banco_legado):
+    servicos.criar_tabelas()
+    assert consultar("SELECT valor FROM pagamentos ORDER BY id") == [(1050,), (123456,), (13,), (0,)]
+    assert consultar("SELECT valor FROM projetos ORDER BY id") == [(10000,), (15000,)]
+    assert consultar("SELECT typeof(valor) FROM pagamentos GROUP BY 1") == [('integer',)]
+
+
+@pytest.mark.parametrize('valor, centavos', [
+    (Decimal('10.5'), 1050), (Decimal('0.005'), 1), (Decimal('0.004'), 0), (Decimal('-2.345'), -235), (Decimal('1234.56'), 123456),
+])
+def test_decimal_para_centavos_arredonda_meio_para_cima(valor, centavos):
+    assert servicos.decimal_para_centavos(valor) == centavos
+    assert servicos.centavos_para_decimal(centavos) == valor.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def test_formatar_centavos():
+    assert servicos.formatar_centavos(123456789) == "R$ 1.234.567,89"
+    assert servicos.formatar_centavos(-5) == "-R$ 0,05"
+    assert servicos.formatar_centavos(None) == "R$ 0,00"
+    assert servicos.interpretar_valor("R$ 1.234,56") == Decimal('1234.56')
+    assert servicos.interpretar_valor("1234.56") == Decimal('1234.56')
+
+
+def test_totais_cliente_somam_em_centavos(repositorio):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id)
+    for valor, status in [('0.10', 'Pago'), ('0.20', 'Pago'), ('1234.56', 'Em Aberto')]:
+        servicos.cadastrar_pagamento(cliente_id, 'Pix', Decimal(valor), '2024-01-01', status, usuario_id)
+    assert tuple(servicos.totais_cliente(cliente_id, usuario_id)) == (30, 123456, 3)
@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+from decimal import Decimal
+
+import servicos
+from auxiliares import criar_cliente, criar_usuario
+
+
+def test_ocorrencias_limitam_o_dia_ao_fim_do_mes():
+    ocorrencias = list(servicos.gerar_ocorrencias('2024-01-31', '2024-01-01', '2024-05-31'))
+    assert ocorrencias == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30), date(2024, 5, 31)]
+    assert list(servicos.gerar_ocorrencias('2023-01-31', '2023-02-01', '2023-03-01')) == [date(2023, 2, 28)]
+
+
+def test_ocorrencias_comecam_no_inicio_do_periodo():
+    assert list(servicos.gerar_ocorrencias('2020-03-15', '2024-06-16', '2024-08-15')) == [date(2024, 7, 15), date(2024, 8, 15)]
+    assert list(servicos.gerar_ocorrencias('2024-06-10', '2024-01-01', '2024-06-09')) == []
+    assert servicos.proxima_ocorrencia(date(2024, 1, 31), date(2024, 2, 1), date(2024, 2, 29)) == date(2024, 2, 29)
+    assert servicos.proxima_ocorrencia('2024-01-31', '2024-02-01', '2024-02-28') is None
+
+
+def test_data_legada_em_outro_formato_e_aceita():
+    assert list(servicos.gerar_ocorrencias('31/01/2024', '2024-02-01', '2024-03-31')) == [date(2024, 2, 29), date(2024, 3, 31)]
+
+
+def test_data_invalida_nao_gera_ocorrencias(caplog):
+    assert list(servicos.gerar_ocorrencias('2024-02-30', '2024-01-01', '2024-12-31')) == []
+    assert servicos.proxima_ocorrencia('abc', '2024-01-01', '2024-12-31') is None
+    assert "2024-02-30" in caplog.text
+
+
+def test_data_invalida_nao_quebra_alertas_nem_relatorios(repositorio):
+    usuario_id = criar_usuario()
+    cliente_id = criar_cliente(usuario_id, 'Ana')
+    amanha = date.today() + timedelta(days=1)
+    servicos.cadastrar_projeto(cliente_id, 'Mensal', 'Web', Decimal('10'), amanha.isoformat(), True, usuario_id)
+    with servicos.transacao() as conn:
+        conn.execute("INSERT INTO projetos (cliente_id, nome_projeto, tipo_projeto, valor, data_entrega, recorrente, usuario_id)"
+                     " VALUES (?, 'Legado', 'Web', 500, '2024-02-30', 1, ?)", (cliente_id, usuario_id))
+
+    assert [(descricao, data) for data, _, _, _, descricao, _ in servicos.MotorAlertas(usuario_id).atualizar()] == [
+        ('Mensal', amanha.isoformat())]
+    linhas = list(servicos.iterar_dados_relatorio(usuario_id, cliente_id, 'Projetos', date.today().isoformat(),
+                                                  servicos.somar_meses(amanha, 1).isoformat()))
+    assert [linha[7] for linha in linhas] == [amanha.isoformat(), servicos.somar_meses(amanha, 1).isoformat()]
@@ -0,0 +1,20 @@
+import json
+import sqlite3
+
+import rastreamento
+
+
+def test_executemany_registra_o_plano_com_os_parametros_do_lote(tmp_path, monkeypatch):
+    log = tmp_path / 'lentas.jsonl'
+    monkeypatch.setattr(rastreamento, 'log_consultas_lentas', rastreamento.LogConsultasLentas(str(log), limite_ms=0))
+    conn = sqlite3.connect(str(tmp_path / 'banco.db'), factory=rastreamento.ConexaoRastreada)
+    conn.execute("CREATE TABLE itens (id INTEGER PRIMARY KEY, valor INTEGER)")
+    conn.executemany("INSERT INTO itens (id, valor) VALUES (?, 0)", ((numero,) for numero in range(5)))
+    conn.executemany("UPDATE itens SET valor = ? WHERE id = ?", ((numero * 10, numero) for numero in range(5)))
+    assert conn.execute("SELECT SUM(valor) FROM itens").fetchone() == (100,)
+    conn.close()
+
+    registros = {registro['sql']: registro for registro in map(json.loads, log.read_text(encoding='utf-8').splitlines())}
+    plano = registros["UPDATE itens SET valor = ? WHERE id = ?"]['plano']
+    assert plano and not any('indisponível' in linha for linha in plano)
+    assert registros["UPDATE itens SET valor = ? WHERE id = ?"]['linhas'] == 5
@@ -0,0 +1,82 @@
+import csv
+import os
+from decimal import Decimal
+
+import pytest
+
+import servicos
+from auxiliares import criar_cliente, criar_usuario
+
+INICIO, FIM = '2024-01-01', '2024-06-30'
+
+
+@pytest.fixture
+def carteira(repositorio):
+    # Clientes com pagamentos, recorrentes intercalados a projetos únicos, só projetos e sem movimento
+    usuario_id = criar_usuario()
+    ana = criar_cliente(usuario_id, 'Ana')
+    bruno = criar_cliente(usuario_id, 'Bruno')
+    criar_cliente(usuario_id, 'Carla')
+    davi = criar_cliente(usuario_id, 'Davi')
+    for dia in ('2024-03-10', '2024-01-05', '2024-07-01', '2023-12-31'):
+        servicos.cadastrar_pagamento(ana, 'Pix', Decimal('10'), dia, 'Pago', usuario_id)
+    servicos.cadastrar_projeto(ana, 'Manutenção', 'Web', Decimal('30'), '2023-11-15', True, usuario_id)
+    servicos.cadastrar_projeto(ana, 'Site', 'Web', Decimal('100'), '2024-02-15', False, usuario_id)
+    servicos.cadastrar_projeto(ana, 'Loja', 'Web', Decimal('200'), '2024-04-20', False, usuario_id)
+    servicos.cadastrar_projeto(bruno, 'App', 'Mobile', Decimal('50'), '2024-05-01', False, usuario_id)
+    servicos.cadastrar_pagamento(davi, 'Boleto', Decimal('5'), '2024-06-30', 'Em Aberto', usuario_id)
+    outro = criar_usuario('bruno')
+    servicos.cadastrar_pagamento(criar_cliente(outro, 'Eva'), 'Pix', Decimal('1'), '2024-02-01', 'Pago', outro)
+    return usuario_id, [ana, bruno, davi]
+
+
+@pytest.mark.parametrize('tipo', ['Ambos', 'Pagamentos', 'Projetos'])
+def test_lote_igual_aos_relatorios_por_cliente(carteira, tipo):
+    usuario_id, clientes = carteira
+    lote = [(cliente_id, list(linhas)) for cliente_id, linhas in servicos.iterar_relatorio_lote(usuario_id, tipo, INICIO, FIM)]
+    esperado = [(cliente_id, list(servicos.iterar_dados_relatorio(usuario_id, cliente_id, tipo, INICIO, FIM)))
+                for cliente_id in clientes]
+    assert lote == [(cliente_id, linhas) for cliente_id, linhas in esperado if linhas]
+
+
+def test_ordem_das_linhas_de_um_cliente(carteira):
+    usuario_id, (ana, _, _) = carteira
+    cliente_id, linhas = next(servicos.iterar_relatorio_lote(usuario_id, 'Ambos', INICIO, FIM))
+    assert cliente_id == ana
+    assert [(linha[5], linha[7]) for linha in linhas] == [
+        ('Pix', '2024-01-05'), ('Pix', '2024-03-10'),
+        ('Web', '2024-01-15'), ('Web', '2024-02-15'), ('Web', '2024-02-15'), ('Web', '2024-03-15'),
+        ('Web', '2024-04-15'), ('Web', '2024-04-20'), ('Web', '2024-05-15'), ('Web', '2024-06-15')]
+
+
+def test_um_arquivo_por_cliente(carteira, tmp_path):
+    usuario_id, clientes = carteira
+    progresso = []
+    total, arquivos = servicos.gerar_relatorios_lote('csv', str(tmp_path / 'lote'), usuario_id, 'Ambos', INICIO, FIM,
+                                                     progresso=progresso.append)
+    assert arquivos == [str(tmp_path / 'lote' / f'relatorio_cliente_{cliente_id}.csv') for cliente_id in clientes]
+    assert sorted(os.listdir(tmp_path / 'lote')) == sorted(os.path.basename(arquivo) for arquivo in arquivos)
+    for cliente_id, arquivo in zip(clientes, arquivos):
+        individual = tmp_path / f'{cliente_id}.csv'
+        servicos.gerar_relatorio(servicos.exportar_csv, individual, usuario_id, cliente_id, 'Ambos', INICIO, FIM)
+        with open(arquivo, encoding='utf-8') as lote, open(individual, encoding='utf-8') as file:
+            assert lote.read() == file.read()
+    assert total == 12
+    assert progresso[-1] == total
+    assert progresso == sorted(progresso)
+
+
+def test_arquivo_unico(carteira, tmp_path):
+    usuario_id, clientes = carteira
+    caminho = str(tmp_path / 'todos.csv')
+    total, arquivos = servicos.gerar_relatorios_lote('csv', caminho, usuario_id, 'Ambos', INICIO, FIM, separar=False)
+    assert (total, arquivos) == (12, [caminho])
+    with open(caminho, newline='', encoding='utf-8') as file:
+        linhas = list(csv.reader(file))
+    assert linhas[0] == servicos.CABECALHO_CSV
+    assert [int(linha[0]) for linha in linhas[1:]] == [clientes[0]] * 10 + [clientes[1], clientes[2]]
+
+
+def test_tipo_invalido(carteira):
+    with pytest.raises(ValueError):
+        next(servicos.iterar_relatorio_lote(carteira[0], 'Outros', INICIO, FIM))
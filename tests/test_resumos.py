@@ -0,0 +1,55 @@
+from decimal import Decimal
+
+import servicos
+from auxiliares import consultar, criar_cliente, criar_usuario
+
+
+def resumos():
+    return (consultar("SELECT usuario_id, cliente_id, mes, status, quantidade, total FROM resumo_pagamentos ORDER BY 1, 2, 3, 4"),
+            consultar("SELECT usuario_id, mes, quantidade, total FROM resumo_projetos ORDER BY 1, 2"))
+
+
+def ultimo_id(tabela):
+    return consultar(f"SELECT MAX(id) FROM {tabela}")[0][0]
+
+
+def test_gatilhos_mantem_os_resumos_iguais_a_reconstrucao(repositorio, tmp_path):
+    usuario_id = criar_usuario()
+    ana = criar_cliente(usuario_id, 'Ana')
+    bruno = criar_cliente(usuario_id, 'Bruno')
+    servicos.cadastrar_pagamento(ana, 'Pix', Decimal('10'), '2024-01-05', 'Pago', usuario_id)
+    servicos.cadastrar_pagamento(ana, 'Pix', Decimal('20'), '2024-01-20', 'Em Aberto', usuario_id)
+    servicos.editar_pagamento(ultimo_id('pagamentos'), 'Pix', Decimal('25'), '2024-02-01', 'Pago', usuario_id)
+    servicos.cadastrar_pagamento(bruno, 'Boleto', Decimal('7'), '2024-02-10', 'Em Aberto', usuario_id)
+    servicos.excluir_pagamento(ultimo_id('pagamentos'), usuario_id)
+    servicos.cadastrar_projeto(ana, 'Site', 'Web', Decimal('100'), '2024-01-15', False, usuario_id)
+    servicos.cadastrar_projeto(bruno, 'Loja', 'Web', Decimal('50'), '2024-02-15', False, usuario_id)
+    servicos.editar_projeto(ultimo_id('projetos'), 'Loja', 'Web', Decimal('60'), '2024-03-15', False, usuario_id)
+    arquivo = tmp_path / 'pagamentos.csv'
+    arquivo.write_text(f"cliente_id,tipo_pagamento,valor,data_pagamento,status\n{bruno},Pix,3.00,2024-03-01,Pago\n"
+                       f"{bruno},Pix,4.00,2024-03-02,Em Aberto\n", encoding='utf-8')
+    servicos.importar_csv('pagamentos', str(arquivo), usuario_id)
+
+    mantidos = resumos()
+    assert mantidos[1] == [(usuario_id, '2024-01', 1, 10000), (usuario_id, '2024-03', 1, 6000)]
+    servicos.reconstruir_resumos()
+    assert resumos() == mantidos
+
+
+def test_painel_soma_as_ocorrencias_dos_recorrentes(repositorio):
+    usuario_id = criar_usuario()
+    ana = criar_cliente(usuario_id, 'Ana')
+    bruno = criar_cliente(usuario_id, 'Bruno')
+    for mes in ('01', '02', '03'):
+        servicos.cadastrar_pagamento(ana, 'Pix', Decimal('10'), f'2024-{mes}-10', 'Pago', usuario_id)
+    servicos.cadastrar_pagamento(bruno, 'Pix', Decimal('5'), '2024-03-20', 'Em Aberto', usuario_id)
+    servicos.cadastrar_projeto(ana, 'Site', 'Web', Decimal('100'), '2024-02-01', False, usuario_id)
+    servicos.cadastrar_projeto(ana, 'Manutenção', 'Web', Decimal('30'), '2024-01-31', True, usuario_id)
+    # Começa depois do último mês exibido: não entra
+    servicos.cadastrar_projeto(bruno, 'Hospedagem', 'Web', Decimal('8'), '2024-04-01', True, usuario_id)
+
+    painel = servicos.buscar_painel(usuario_id, meses=3)
+    assert painel['totais'] == (3000, 500, 4)
+    assert painel['por_mes'] == [('2024-03', 1000, 500, 2, 3000), ('2024-02', 1000, 0, 1, 13000), ('2024-01', 1000, 0, 1, 3000)]
+    assert painel['maiores_abertos'] == [('Bruno', 500)]
+    assert [linha[0] for linha in servicos.buscar_painel(usuario_id, meses=2)['por_mes']] == ['2024-03', '2024-02']